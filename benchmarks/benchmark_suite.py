@@ -0,0 +1,209 @@
+'''
+Benchmark suite for parsing, parts list operations, and exporting, run against synthetic Bricklink parts lists.
+
+Usage: python benchmarks/benchmark_suite.py [--sizes 1000 10000 100000 1000000] [--repeat 3] [--output results.json]
+
+Results are printed as they're measured, and optionally written out as JSON so that they can be compared over time.
+'''
+
+import argparse
+import contextlib
+import gzip
+import io
+import json
+import platform
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+
+sys.path.append(str(Path(__file__).absolute().parent.parent / 'src'))
+# pylint: disable=import-error
+import compressed_io
+from enums import Engine, StorageMode
+from operations import Operations
+from parts_list import PartsList
+# pylint: enable=import-error
+
+from generate_parts_list import generate_parts_list
+
+DEFAULT_SIZES = [1000, 10000, 100000]
+
+## Each benchmark takes the dataset for a given size, does any setup that shouldn't be timed, and returns the callable
+## that actually gets timed.
+BENCHMARKS: Dict[str, Callable[[dict], Callable[[], None]]] = {}
+
+
+def benchmark(name: str):
+    def _register(function: Callable[[dict], Callable[[], None]]):
+        BENCHMARKS[name] = function
+        return function
+
+    return _register
+
+## Benchmarks
+
+@benchmark('import')
+def _bench_import(dataset: dict):
+    parts_list = PartsList()
+    return lambda: parts_list._import_list(dataset['path_a'])
+
+
+@benchmark('import_columnar')
+def _bench_import_columnar(dataset: dict):
+    parts_list = PartsList(storage = StorageMode.COLUMNAR)
+    return lambda: parts_list._import_list(dataset['path_a'])
+
+
+@benchmark('import_lazy')
+def _bench_import_lazy(dataset: dict):
+    parts_list = PartsList(storage = StorageMode.LAZY)
+    return lambda: parts_list._import_list(dataset['path_a'])
+
+
+@benchmark('import_gzip')
+def _bench_import_gzip(dataset: dict):
+    ## Only compress the file once, the first time it's needed
+    if ('path_a_gzip' not in dataset):
+        dataset['path_a_gzip'] = dataset['directory'] / (dataset['path_a'].name + '.gz')
+        with gzip.open(dataset['path_a_gzip'], 'wb') as gzip_file:
+            gzip_file.write(dataset['path_a'].read_bytes())
+
+    parts_list = PartsList()
+    return lambda: parts_list._import_list(dataset['path_a_gzip'])
+
+
+## The same import, but through the general csv reader rather than the fast path for Bricklink's exports
+@benchmark('import_columnar_general')
+def _bench_import_columnar_general(dataset: dict):
+    parts_list = PartsList(storage = StorageMode.COLUMNAR)
+    parts_list.use_fast_csv = False
+    return lambda: parts_list._import_list(dataset['path_a'])
+
+
+def _register_operation_benchmarks(engine: Engine):
+    @benchmark('union_{}'.format(engine.value))
+    def _bench_union(dataset: dict):
+        return lambda: Operations.union(dataset['list_a'], dataset['list_b'], engine = engine)
+
+    @benchmark('difference_{}'.format(engine.value))
+    def _bench_difference(dataset: dict):
+        return lambda: Operations.difference(dataset['list_a'], dataset['list_b'], engine = engine)
+
+    @benchmark('intersection_{}'.format(engine.value))
+    def _bench_intersection(dataset: dict):
+        return lambda: Operations.intersection(dataset['list_a'], dataset['list_b'], engine = engine)
+
+for _engine in Engine:
+    _register_operation_benchmarks(_engine)
+
+
+@benchmark('set_any_color')
+def _bench_set_any_color(dataset: dict):
+    parts_list = dataset['list_a'].clone()
+    return lambda: parts_list.set_any_color(['Red', 'Blue', 'Trans-Clear'])
+
+
+@benchmark('clone')
+def _bench_clone(dataset: dict):
+    return dataset['list_a'].clone
+
+
+@benchmark('export_csv')
+def _bench_export_csv(dataset: dict):
+    return lambda: dataset['list_a'].export_csv(dataset['directory'] / 'export.csv')
+
+
+@benchmark('export_csv_gzip')
+def _bench_export_csv_gzip(dataset: dict):
+    return lambda: dataset['list_a'].export_csv(dataset['directory'] / 'export.csv.gz')
+
+
+## zstandard is optional, so only benchmark it when it's there
+if (compressed_io.zstandard != None):
+    @benchmark('export_csv_zstd')
+    def _bench_export_csv_zstd(dataset: dict):
+        return lambda: dataset['list_a'].export_csv(dataset['directory'] / 'export.csv.zst')
+
+
+@benchmark('export_simple_csv')
+def _bench_export_simple_csv(dataset: dict):
+    return lambda: dataset['list_a'].export_simple_csv(dataset['directory'] / 'export-simple.csv')
+
+## Running
+
+def build_dataset(directory: Path, size: int) -> dict:
+    ## Both lists draw from the same pool of part numbers, so they partially overlap
+    item_count = max(1, size // 4)
+    path_a = directory / 'a-{}.csv'.format(size)
+    path_b = directory / 'b-{}.csv'.format(size)
+    generate_parts_list(path_a, size, seed = 1, item_count = item_count)
+    generate_parts_list(path_b, size, seed = 2, item_count = item_count)
+
+    return {
+        'directory': directory,
+        'path_a': path_a,
+        'path_b': path_b,
+        'list_a': PartsList(path_a),
+        'list_b': PartsList(path_b)
+    }
+
+
+def time_benchmark(factory: Callable[[dict], Callable[[], None]], dataset: dict, repeat: int) -> dict:
+    timings = []
+    for _ in range(repeat):
+        function = factory(dataset)
+
+        ## Keep any progress messages (ex: from the exporters) out of the results
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            function()
+            timings.append(time.perf_counter() - start)
+
+    return {'best_seconds': min(timings), 'mean_seconds': sum(timings) / len(timings)}
+
+
+def run_suite(sizes: List[int], repeat: int = 3, names: List[str] = None, log: Callable[[str], None] = print) -> dict:
+    results = []
+
+    with tempfile.TemporaryDirectory() as directory:
+        for size in sizes:
+            dataset = build_dataset(Path(directory), size)
+
+            for name, factory in BENCHMARKS.items():
+                if (names != None and name not in names):
+                    continue
+
+                result = {'name': name, 'size': size, 'repeat': repeat}
+                try:
+                    result.update(time_benchmark(factory, dataset, repeat))
+                    log('{:<24} {:>9} lots  best {:.4f}s  mean {:.4f}s'.format(name, size, result['best_seconds'], result['mean_seconds']))
+                except Exception as exception:
+                    ## Keep going, so one broken benchmark doesn't hide the rest of the results
+                    result['error'] = repr(exception)
+                    log('{:<24} {:>9} lots  failed: {}'.format(name, size, result['error']))
+
+                results.append(result)
+
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'results': results
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description = 'Benchmarks parsing, operations, and exporting of Bricklink parts lists')
+    parser.add_argument('--sizes', type = int, nargs = '+', default = DEFAULT_SIZES, help = 'The lot counts to generate parts lists with')
+    parser.add_argument('--repeat', type = int, default = 3, help = 'The number of times to run each benchmark')
+    parser.add_argument('--benchmark', dest = 'names', action = 'append', choices = list(BENCHMARKS.keys()), help = 'Only run the given benchmark, can be used multiple times')
+    parser.add_argument('--output', type = Path, help = 'A path to write the results to as JSON')
+    arguments = parser.parse_args()
+
+    suite_results = run_suite(arguments.sizes, arguments.repeat, arguments.names)
+
+    if (arguments.output != None):
+        with open(arguments.output, 'w') as output_file:
+            json.dump(suite_results, output_file, indent = 4)
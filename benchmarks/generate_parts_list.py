@@ -0,0 +1,83 @@
+'''
+Generates synthetic Bricklink parts list .csv files, for benchmarking purposes.
+
+Usage: python benchmarks/generate_parts_list.py <lot count> <output path> [--seed N]
+'''
+
+import argparse
+import csv
+import random
+from pathlib import Path
+
+HEADER = ['BLItemNo', 'ElementId', 'LdrawId', 'PartName', 'BLColorId', 'LDrawColorId', 'ColorName', 'ColorCategory', 'Qty', 'Weight']
+
+## (BLColorId, LDrawColorId, ColorName, ColorCategory)
+COLORS = [
+    ('1', '15', 'White', 'Solid Colors'),
+    ('2', '19', 'Tan', 'Solid Colors'),
+    ('3', '14', 'Yellow', 'Solid Colors'),
+    ('4', '25', 'Orange', 'Solid Colors'),
+    ('5', '4', 'Red', 'Solid Colors'),
+    ('6', '2', 'Green', 'Solid Colors'),
+    ('7', '1', 'Blue', 'Solid Colors'),
+    ('8', '6', 'Brown', 'Solid Colors'),
+    ('11', '0', 'Black', 'Solid Colors'),
+    ('12', '36', 'Trans-Red', 'Transparent Colors'),
+    ('15', '47', 'Trans-Clear', 'Transparent Colors'),
+    ('34', '27', 'Lime', 'Solid Colors'),
+    ('36', '10', 'Bright Green', 'Solid Colors'),
+    ('42', '43', 'Trans-Medium Blue', 'Transparent Colors'),
+    ('59', '320', 'Dark Red', 'Solid Colors'),
+    ('63', '272', 'Dark Blue', 'Solid Colors'),
+    ('69', '28', 'Dark Tan', 'Solid Colors'),
+    ('80', '288', 'Dark Green', 'Solid Colors'),
+    ('85', '72', 'Dark Bluish Gray', 'Solid Colors'),
+    ('86', '71', 'Light Bluish Gray', 'Solid Colors'),
+    ('88', '70', 'Reddish Brown', 'Solid Colors'),
+    ('95', '80', 'Flat Silver', 'Pearl Colors'),
+    ('103', '226', 'Bright Light Yellow', 'Solid Colors'),
+    ('156', '323', 'Medium Azure', 'Solid Colors')
+]
+
+PART_NAMES = ['Brick {} x {}', 'Plate {} x {}', 'Tile {} x {}', 'Slope 45 {} x {}', 'Brick, Modified {} x {} with Studs on 1 Side', 'Plate, Round {} x {}']
+
+
+def generate_rows(lot_count: int, seed: int = 0, item_count: int = None):
+    '''
+    Yields lot_count rows with unique (BLItemNo, ColorName) pairs. Lists generated with the same item_count share the
+    same pool of part numbers, so they overlap with each other like real inventories do.
+    '''
+
+    generator = random.Random(seed)
+    item_count = item_count if item_count != None else max(1, lot_count // 4)
+    keys = generator.sample(range(item_count * len(COLORS)), min(lot_count, item_count * len(COLORS)))
+
+    for key in keys:
+        item, color_index = divmod(key, len(COLORS))
+        bl_color_id, l_draw_color_id, color_name, color_category = COLORS[color_index]
+        bl_item_no = str(3000 + item)
+        name = PART_NAMES[item % len(PART_NAMES)].format(1 + item % 4, 1 + item % 8)
+        qty = generator.randint(1, 50)
+
+        yield [bl_item_no, bl_item_no + str(color_index), bl_item_no, name, bl_color_id, l_draw_color_id, color_name, color_category, qty, round(qty * generator.uniform(0.1, 5.0), 2)]
+
+
+def generate_parts_list(path: Path, lot_count: int, seed: int = 0, item_count: int = None):
+    with open(path, 'w', newline = '') as csv_file:
+        writer = csv.writer(csv_file)
+        writer.writerow(HEADER)
+        writer.writerows(generate_rows(lot_count, seed, item_count))
+
+        ## Bricklink exports end with a blank row and some totals
+        writer.writerow([''] * len(HEADER))
+        writer.writerow(['Total qty', 'Total Weight'] + [''] * (len(HEADER) - 2))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description = 'Generates a synthetic Bricklink parts list .csv file')
+    parser.add_argument('lot_count', type = int)
+    parser.add_argument('path', type = Path)
+    parser.add_argument('--seed', type = int, default = 0)
+    arguments = parser.parse_args()
+
+    generate_parts_list(arguments.path, arguments.lot_count, arguments.seed)
@@ -0,0 +1,64 @@
+'''
+Micro-benchmark for the Part representation, comparing the slotted Part against the original __dict__ backed one.
+
+Usage: python benchmarks/part_benchmark.py
+'''
+
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).absolute().parent.parent / 'src'))
+# pylint: disable=import-error
+from part import Part
+# pylint: enable=import-error
+
+CSV_LINE = ['3001', '300121', '3001', 'Brick 2 x 4', '5', '4', 'Red', 'Solid Colors', '1', '2.32']
+
+
+class DictPart:
+    '''
+    The original Part layout, with every field stored in a per-instance __dict__
+    '''
+
+    def __init__(self, csv_line):
+        self._bl_item_no = csv_line[0]
+        self.element_id = csv_line[1]
+        self.l_draw_id = csv_line[2]
+        self.part_name = csv_line[3]
+        self.bl_color_id = csv_line[4]
+        self.l_draw_color_id = csv_line[5]
+        self._color_name = csv_line[6]
+        self.color_category = csv_line[7]
+        self.qty = int(csv_line[8])
+        self.weight = float(csv_line[9])
+
+
+def get_object_size(instance) -> int:
+    size = sys.getsizeof(instance)
+    if (hasattr(instance, '__dict__')):
+        size += sys.getsizeof(instance.__dict__)
+
+    return size
+
+
+def main(number: int = 200000):
+    part = Part(CSV_LINE)
+
+    print('Object size (bytes, excluding field values):')
+    print('  dict Part:    {}'.format(get_object_size(DictPart(CSV_LINE))))
+    print('  slotted Part: {}'.format(get_object_size(part)))
+
+    print('Cost of {} operations (seconds):'.format(number))
+    timings = {
+        'clone via to_csv() re-parse': lambda: Part(part.to_csv()),
+        'clone via field copy': part.clone,
+        'uncached id': lambda: Part.build_id(part.bl_item_no, part.color_name),
+        'cached id': lambda: part.id
+    }
+    for name, function in timings.items():
+        print('  {}: {:.4f}'.format(name, timeit.timeit(function, number = number)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+'''
+Benchmark comparing the loop engine's pairwise union fold against the batched engine's single pass k-way
+accumulation, for increasing numbers of input parts lists.
+
+Usage: python benchmarks/union_benchmark.py [--list-counts 10 100 1000] [--lots 500] [--repeat 3] [--output results.json]
+'''
+
+import argparse
+import json
+import platform
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, List
+
+sys.path.append(str(Path(__file__).absolute().parent.parent / 'src'))
+# pylint: disable=import-error
+from enums import Engine
+from operations import Operations
+from parts_list import PartsList
+# pylint: enable=import-error
+
+from benchmark_suite import time_benchmark
+from generate_parts_list import generate_parts_list
+
+DEFAULT_LIST_COUNTS = [10, 100, 1000]
+
+
+def build_parts_lists(directory: Path, list_count: int, lots: int) -> List[PartsList]:
+    ## Every list draws from the same pool of part numbers, so most keys show up in many of them
+    item_count = max(1, lots // 2)
+
+    parts_lists = []
+    for index in range(list_count):
+        path = directory / 'list-{}.csv'.format(index)
+        generate_parts_list(path, lots, seed = index, item_count = item_count)
+        parts_lists.append(PartsList(path))
+
+    return parts_lists
+
+
+def run_benchmark(list_counts: List[int], lots: int, repeat: int = 3, log: Callable[[str], None] = print) -> dict:
+    results = []
+
+    with tempfile.TemporaryDirectory() as directory:
+        for list_count in list_counts:
+            parts_lists = build_parts_lists(Path(directory), list_count, lots)
+
+            for engine in Engine:
+                result = {'name': 'union_{}'.format(engine.value), 'list_count': list_count, 'lots': lots, 'repeat': repeat}
+                result.update(time_benchmark(lambda _: lambda: Operations.union(*parts_lists, engine = engine), None, repeat))
+                log('{:<16} {:>5} lists  best {:.4f}s  mean {:.4f}s'.format(result['name'], list_count, result['best_seconds'], result['mean_seconds']))
+
+                results.append(result)
+
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'results': results
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description = 'Benchmarks unioning many Bricklink parts lists together')
+    parser.add_argument('--list-counts', type = int, nargs = '+', default = DEFAULT_LIST_COUNTS, help = 'The numbers of parts lists to union together')
+    parser.add_argument('--lots', type = int, default = 500, help = 'The number of lots in each parts list')
+    parser.add_argument('--repeat', type = int, default = 3, help = 'The number of times to run each benchmark')
+    parser.add_argument('--output', type = Path, help = 'A path to write the results to as JSON')
+    arguments = parser.parse_args()
+
+    benchmark_results = run_benchmark(arguments.list_counts, arguments.lots, arguments.repeat)
+
+    if (arguments.output != None):
+        with open(arguments.output, 'w') as output_file:
+            json.dump(benchmark_results, output_file, indent = 4)
@@ -0,0 +1,192 @@
+import asyncio
+import json
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, NamedTuple
+
+from enums import SaveFormat, StorageMode
+from operations import Operations
+from parallel_loading import load_parts_list
+from parts_list import PartsList
+from parts_list_cache import PartsListCache
+
+OPERATIONS = ['missing-parts', 'merge', 'intersection']
+
+class BatchJob(NamedTuple):
+    name: str
+    operation: str
+    unowned_paths: List[Path]
+    owned_paths: List[Path]
+    any_colors: List[str]
+    save_path: Path
+    save_format: SaveFormat
+
+    @property
+    def paths(self) -> List[Path]:
+        return self.unowned_paths + self.owned_paths
+
+
+class BatchResult(NamedTuple):
+    name: str
+    parts_list: PartsList
+    error: str
+
+
+def _parse_job(index: int, job: dict, base_directory: Path) -> BatchJob:
+    name = str(job.get('name', 'job-{}'.format(index)))
+
+    operation = job.get('operation')
+    if (operation not in OPERATIONS):
+        raise RuntimeError('Job \'{}\' has an invalid operation: {}, expected one of: {}'.format(name, operation, ', '.join(OPERATIONS)))
+
+    ## Relative paths are relative to the manifest, so that manifests can be moved around along with their files
+    def resolve_paths(key: str) -> List[Path]:
+        paths = job.get(key, [])
+        if (not isinstance(paths, list)):
+            raise RuntimeError('Job \'{}\' has an invalid \'{}\', expected a list of paths'.format(name, key))
+
+        return [(base_directory / path).resolve() for path in paths]
+
+    unowned_paths = resolve_paths('unowned')
+    owned_paths = resolve_paths('owned')
+    if (operation == 'missing-parts' and (len(unowned_paths) != 1 or len(owned_paths) == 0)):
+        raise RuntimeError('Job \'{}\' needs exactly one unowned parts list, and at least one owned parts list'.format(name))
+    elif (len(unowned_paths) + len(owned_paths) == 0):
+        raise RuntimeError('Job \'{}\' has no parts lists, thus the \'{}\' would be pointless.'.format(name, operation))
+
+    any_colors = job.get('any_color', [])
+    if (not isinstance(any_colors, list) or not all(isinstance(color, str) for color in any_colors)):
+        raise RuntimeError('Job \'{}\' has an invalid \'any_color\', expected a list of color names'.format(name))
+
+    save_path = job.get('save_path')
+    save_format = job.get('save_format')
+    if ((save_path == None) != (save_format == None)):
+        raise RuntimeError('Job \'{}\' needs both a \'save_path\' and a \'save_format\' to save its output.'.format(name))
+
+    return BatchJob(
+        name,
+        operation,
+        unowned_paths,
+        owned_paths,
+        any_colors,
+        base_directory / save_path if save_path != None else None,
+        SaveFormat(save_format.lower()) if save_format != None else None
+    )
+
+
+def load_manifest(path: Path) -> List[BatchJob]:
+    '''
+    Loads a batch manifest from a .json or .yaml file. The manifest holds a list of 'jobs', each with an 'operation'
+    (one of missing-parts, merge, or intersection), 'unowned' and 'owned' lists of paths, and optionally an 'any_color'
+    list of color names, and a 'save_path' and 'save_format' to export its output with.
+    '''
+
+    path = Path(path)
+    with open(path, 'r', encoding = 'utf-8') as manifest_file:
+        if (path.suffix.lower() in ['.yaml', '.yml']):
+            try:
+                import yaml
+            except ImportError:
+                raise RuntimeError('Unable to load {}, reading .yaml manifests requires PyYAML to be installed.'.format(path))
+
+            manifest = yaml.safe_load(manifest_file)
+        else:
+            manifest = json.load(manifest_file)
+
+    if (not isinstance(manifest, dict) or not isinstance(manifest.get('jobs'), list)):
+        raise RuntimeError('Unable to load {}, manifests need a \'jobs\' list.'.format(path))
+
+    return [_parse_job(index, job, path.parent) for index, job in enumerate(manifest['jobs'])]
+
+
+def _run_job(job: BatchJob, parts_lists: Dict[Path, PartsList]) -> PartsList:
+    unowned_parts_lists = [parts_lists[path] for path in job.unowned_paths]
+    owned_parts_lists = [parts_lists[path] for path in job.owned_paths]
+
+    if (job.operation == 'missing-parts'):
+        output_parts_list = Operations.difference(unowned_parts_lists[0], Operations.union(*owned_parts_lists))
+    elif (job.operation == 'merge'):
+        output_parts_list = Operations.union(*unowned_parts_lists, *owned_parts_lists)
+    else:
+        output_parts_list = Operations.intersection(*unowned_parts_lists, *owned_parts_lists)
+
+    ## The output may share Parts with the inputs, which other jobs are still using
+    if (len(job.any_colors) > 0):
+        output_parts_list = output_parts_list.clone()
+        output_parts_list.set_any_color(job.any_colors)
+
+    return output_parts_list
+
+
+class BatchRunner:
+    '''
+    Runs many jobs in a single process, parsing each distinct input file exactly once and sharing the parsed
+    PartsLists between every job that uses them. Files are parsed concurrently in a pool of worker processes (or
+    threads, when workers is 1), and each job starts as soon as its own inputs are ready. Operations and exports run in
+    a thread pool, so that exports can overlap with the rest of the batch. The shared PartsLists are only ever read
+    from, since any-color remapping works on a clone (which leaves its source alone).
+    '''
+
+    def __init__(self, storage: StorageMode = StorageMode.DICT, workers: int = 1, cache: PartsListCache = None):
+        self.storage = storage
+        self.workers = workers
+        self.cache = cache
+
+    ## Methods
+
+    async def _load(self, loop: asyncio.AbstractEventLoop, executor: Executor, path: Path) -> PartsList:
+        parts_list, hit, error = await loop.run_in_executor(executor, load_parts_list, path, self.storage, self.cache)
+        if (parts_list == None):
+            raise RuntimeError('Unable to generate parts list for file at {}: {}'.format(path, error))
+
+        ## Worker processes only have a copy of the cache, so their lookups need recording on this one
+        if (self.cache != None and isinstance(executor, ProcessPoolExecutor)):
+            self.cache.record_lookup(hit)
+
+        return parts_list
+
+
+    async def _run(self, loop: asyncio.AbstractEventLoop, job: BatchJob, loads: Dict[Path, asyncio.Task], executor: Executor) -> BatchResult:
+        try:
+            parts_lists = {path: await loads[path] for path in job.paths}
+            output_parts_list = await loop.run_in_executor(executor, _run_job, job, parts_lists)
+            if (job.save_path != None):
+                await loop.run_in_executor(executor, output_parts_list.export, job.save_path, job.save_format)
+        except Exception as error:
+            ## Whatever goes wrong only fails this job, rather than the whole batch
+            return BatchResult(job.name, None, str(error) or type(error).__name__)
+
+        return BatchResult(job.name, output_parts_list, None)
+
+
+    async def run_async(self, jobs: List[BatchJob]) -> List[BatchResult]:
+        loop = asyncio.get_running_loop()
+
+        load_executor = ProcessPoolExecutor(max_workers = self.workers) if self.workers > 1 else ThreadPoolExecutor(max_workers = 1)
+        ## Operations share the parsed PartsLists, so they stay in this process. Only one job's operation holds the GIL
+        ## at a time, but the rest of the threads are free to export in the meantime.
+        job_executor = ThreadPoolExecutor(max_workers = max(self.workers, 2))
+
+        with load_executor, job_executor:
+            ## Every distinct file is only loaded once, no matter how many jobs use it
+            loads: Dict[Path, asyncio.Task] = {}
+            for job in jobs:
+                for path in job.paths:
+                    if (path not in loads):
+                        loads[path] = asyncio.ensure_future(self._load(loop, load_executor, path))
+
+            results = await asyncio.gather(*[self._run(loop, job, loads, job_executor) for job in jobs])
+
+            ## Collect any load failures that no job ended up waiting on, since every job using them has already failed
+            await asyncio.gather(*loads.values(), return_exceptions = True)
+
+        return list(results)
+
+
+    def run(self, jobs: List[BatchJob]) -> List[BatchResult]:
+        '''
+        Runs all of the given jobs, returning their results in the same order. Jobs that fail (for example, because
+        one of their files couldn't be parsed) have a None parts_list, and the reason in their error.
+        '''
+
+        return asyncio.run(self.run_async(jobs))
@@ -0,0 +1,331 @@
+import mmap
+import struct
+import sys
+from array import array
+from collections.abc import Mapping
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterator, List, Tuple
+
+from columnar_parts import ColumnarParts, StringPool
+from part import Part
+
+## Layout (all little-endian):
+##   magic (4 bytes), version (u16), padding (2 bytes)
+##   header: string list
+##   row count (u32)
+##   for each of ColumnarParts.STRING_FIELDS: string list (the field's dictionary), padding, row count u32 codes
+##   padding, row count i64 quantities
+##   padding, row count f64 weights
+##
+## A string list is a u32 count, followed by that many u32 length-prefixed UTF-8 strings. Padding aligns the following
+## column to an 8 byte boundary, so that columns can be viewed in place straight out of a memory map.
+
+MAGIC = b'BLPL'
+VERSION = 1
+SUFFIX = '.blpl'
+ALIGNMENT = 8
+
+_PREAMBLE = struct.Struct('<4sH2x')
+_U32 = struct.Struct('<I')
+
+## Writing
+
+def _write_padding(file: BinaryIO):
+    remainder = file.tell() % ALIGNMENT
+    if (remainder != 0):
+        file.write(b'\0' * (ALIGNMENT - remainder))
+
+
+def _write_strings(file: BinaryIO, strings: List[str]):
+    file.write(_U32.pack(len(strings)))
+    for string in strings:
+        encoded = string.encode('utf-8')
+        file.write(_U32.pack(len(encoded)))
+        file.write(encoded)
+
+
+def _write_column(file: BinaryIO, column: array):
+    _write_padding(file)
+
+    if (sys.byteorder != 'little'):
+        column = array(column.typecode, column)
+        column.byteswap()
+    column.tofile(file)
+
+
+def write_parts(target: Path, header: List[str], parts: ColumnarParts):
+    ## Make sure the columns only hold live rows
+    if (len(parts.qty) != len(parts)):
+        parts.compact()
+
+    with open(target, 'wb') as file:
+        file.write(_PREAMBLE.pack(MAGIC, VERSION))
+        _write_strings(file, header if header != None else [])
+        file.write(_U32.pack(len(parts.qty)))
+
+        for field in ColumnarParts.STRING_FIELDS:
+            _write_strings(file, parts.get_pool(field).strings)
+            _write_column(file, parts.get_column(field))
+
+        _write_column(file, parts.qty)
+        _write_column(file, parts.weight)
+
+## Reading
+
+class _Reader:
+    '''
+    Walks through a buffer holding the binary format, keeping track of the current offset
+    '''
+
+    def __init__(self, buffer):
+        self.buffer = buffer
+        self.offset = 0
+
+
+    def read_u32(self) -> int:
+        value = _U32.unpack_from(self.buffer, self.offset)[0]
+        self.offset += _U32.size
+
+        return value
+
+
+    def read_strings(self) -> List[str]:
+        strings = []
+        for _ in range(self.read_u32()):
+            length = self.read_u32()
+            strings.append(str(self.buffer[self.offset:self.offset + length], 'utf-8'))
+            self.offset += length
+
+        return strings
+
+
+    def index_strings(self) -> array:
+        '''
+        Skips over a string list, returning the offsets of each string's length prefix so they can be decoded later
+        '''
+
+        offsets = array('Q')
+        for _ in range(self.read_u32()):
+            offsets.append(self.offset)
+            self.offset += _U32.size + _U32.unpack_from(self.buffer, self.offset)[0]
+
+        return offsets
+
+
+    def skip_padding(self):
+        remainder = self.offset % ALIGNMENT
+        if (remainder != 0):
+            self.offset += ALIGNMENT - remainder
+
+
+    def column_span(self, item_size: int, count: int) -> Tuple[int, int]:
+        self.skip_padding()
+        start = self.offset
+        self.offset += item_size * count
+
+        return start, self.offset
+
+
+    def read_column(self, typecode: str, count: int) -> array:
+        column = array(typecode)
+        start, end = self.column_span(column.itemsize, count)
+        column.frombytes(self.buffer[start:end])
+
+        if (sys.byteorder != 'little'):
+            column.byteswap()
+
+        return column
+
+
+    def view_column(self, typecode: str, count: int) -> memoryview:
+        ## Columns are stored little-endian, so they can only be viewed in place on little-endian machines
+        if (sys.byteorder != 'little'):
+            return memoryview(self.read_column(typecode, count))
+
+        start, end = self.column_span(array(typecode).itemsize, count)
+
+        return memoryview(self.buffer)[start:end].cast(typecode)
+
+
+def read_preamble(reader: _Reader):
+    magic, version = _PREAMBLE.unpack_from(reader.buffer, 0)
+    if (magic != MAGIC):
+        raise RuntimeError('Provided file isn\'t a binary parts list.')
+    if (version != VERSION):
+        raise RuntimeError('Unsupported binary parts list version {}.'.format(version))
+
+    reader.offset = _PREAMBLE.size
+
+
+def read_parts(path: Path) -> Tuple[List[str], ColumnarParts]:
+    '''
+    Reads a binary parts list via a memory map, returning its header and the parts in columnar form
+    '''
+
+    with open(path, 'rb') as file, mmap.mmap(file.fileno(), 0, access = mmap.ACCESS_READ) as buffer:
+        reader = _Reader(buffer)
+        read_preamble(reader)
+
+        header = reader.read_strings()
+        row_count = reader.read_u32()
+
+        pools: Dict[str, StringPool] = {}
+        columns: Dict[str, array] = {}
+        for field in ColumnarParts.STRING_FIELDS:
+            pools[field] = StringPool.from_strings(reader.read_strings())
+            columns[field] = reader.read_column('I', row_count)
+
+        qty = reader.read_column('q', row_count)
+        weight = reader.read_column('d', row_count)
+
+    return (header if len(header) > 0 else None), ColumnarParts.from_columns(pools, columns, qty, weight)
+
+
+class _MappedStringPool:
+    '''
+    A read-only StringPool whose strings stay encoded in the memory map until they're asked for
+    '''
+
+    def __init__(self, buffer, offsets: array):
+        self._buffer = buffer
+        self._offsets = offsets
+
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+
+    def decode(self, code: int) -> str:
+        offset = self._offsets[code]
+        length = _U32.unpack_from(self._buffer, offset)[0]
+        offset += _U32.size
+
+        return str(self._buffer[offset:offset + length], 'utf-8')
+
+
+    def to_string_pool(self) -> StringPool:
+        return StringPool.from_strings([self.decode(code) for code in range(len(self))])
+
+
+class MappedParts(Mapping):
+    '''
+    A read-only mapping of part id -> Part, answered directly off of a memory-mapped binary parts list. Columns are
+    viewed in place rather than copied, and Parts are only built when one is actually accessed, so many processes can
+    share a single page-cached file.
+
+    Deep copies (ex: PartsList.clone()) produce a regular, mutable ColumnarParts.
+    '''
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._file = open(path, 'rb')
+        self._buffer = mmap.mmap(self._file.fileno(), 0, access = mmap.ACCESS_READ)
+
+        reader = _Reader(self._buffer)
+        read_preamble(reader)
+
+        self.header = reader.read_strings()
+        self._row_count = reader.read_u32()
+
+        self._pools: Dict[str, _MappedStringPool] = {}
+        self._columns: Dict[str, memoryview] = {}
+        for field in ColumnarParts.STRING_FIELDS:
+            self._pools[field] = _MappedStringPool(self._buffer, reader.index_strings())
+            self._columns[field] = reader.view_column('I', self._row_count)
+
+        self.qty = reader.view_column('q', self._row_count)
+        self.weight = reader.view_column('d', self._row_count)
+
+        ## Part ids are needed for nearly everything, so keep their (comparatively tiny) dictionaries decoded
+        self._bl_item_nos = [self._pools['bl_item_no'].decode(code) for code in range(len(self._pools['bl_item_no']))]
+        self._color_names = [self._pools['color_name'].decode(code) for code in range(len(self._pools['color_name']))]
+        self._index: Dict[str, int] = None
+
+    ## Magic Methods
+
+    def __getitem__(self, part_id: str) -> Part:
+        return self.get_part(self._get_index()[part_id])
+
+
+    def __iter__(self) -> Iterator[str]:
+        for row in range(self._row_count):
+            yield self._build_id(row)
+
+
+    def __len__(self) -> int:
+        return self._row_count
+
+
+    def __contains__(self, part_id: str) -> bool:
+        return part_id in self._get_index()
+
+
+    def __deepcopy__(self, memo: dict) -> ColumnarParts:
+        return self.to_columnar()
+
+
+    def __reduce__(self):
+        ## Other processes can just map the same file themselves
+        return (MappedParts, (self.path,))
+
+    ## Methods
+
+    def _build_id(self, row: int) -> str:
+        return Part.build_id(self._bl_item_nos[self._columns['bl_item_no'][row]], self._color_names[self._columns['color_name'][row]])
+
+
+    def _get_index(self) -> Dict[str, int]:
+        ## Only build the part id index once a lookup actually needs it
+        if (self._index == None):
+            self._index = {self._build_id(row): row for row in range(self._row_count)}
+
+        return self._index
+
+
+    def row_of(self, part_id: str) -> int:
+        return self._get_index()[part_id]
+
+
+    def get_field(self, row: int, field: str) -> str:
+        return self._pools[field].decode(self._columns[field][row])
+
+
+    def get_part(self, row: int) -> Part:
+        csv_line = [self.get_field(row, field) for field in ColumnarParts.STRING_FIELDS]
+        csv_line.append(self.qty[row])
+        csv_line.append(self.weight[row])
+
+        return Part(csv_line)
+
+
+    def iter_quantities(self) -> Iterator[Tuple[str, int, float]]:
+        qty = self.qty
+        weight = self.weight
+        for row in range(self._row_count):
+            yield self._build_id(row), qty[row], weight[row]
+
+
+    def get_total_qty(self) -> int:
+        return sum(self.qty)
+
+
+    def to_columnar(self) -> ColumnarParts:
+        '''
+        Copies everything out of the memory map into a regular, mutable ColumnarParts
+        '''
+
+        pools = {field: pool.to_string_pool() for field, pool in self._pools.items()}
+        columns = {field: array('I', column) for field, column in self._columns.items()}
+
+        return ColumnarParts.from_columns(pools, columns, array('q', self.qty), array('d', self.weight))
+
+
+    def close(self):
+        ## Views into the map have to be released before it can be closed
+        for column in self._columns.values():
+            column.release()
+        self.qty.release()
+        self.weight.release()
+
+        self._buffer.close()
+        self._file.close()
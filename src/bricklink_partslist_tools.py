@@ -1,20 +1,32 @@
 import click
+import cProfile
 from pathlib import Path
-from typing import List
+from typing import Dict, List
 
-from enums import SaveFormat
-from part import Part
+import instrumentation
+from enums import Engine, OutputMode, SaveFormat, StorageMode
 from parts_list import PartsList
+from parts_output import write_parts_list
+from parts_stream import PartsStream
 from operations import Operations
+from expressions import build_plan, format_plan, parse_expression, run_plan
+from incremental import IncrementalMissingParts
+from batch_runner import BatchRunner, load_manifest
+from parallel_loading import load_parts_list, load_parts_lists, load_union, report_failure
+from parts_list_cache import PartsListCache
+from parts_list_server import PartsListRegistry, create_server
+from sqlite_store import SqliteStore
 
 
-def _build_parts_lists(*paths: List[Path]) -> List[PartsList]:
+def _build_parts_lists(*paths: List[Path], storage: StorageMode = StorageMode.DICT, jobs: int = 1, cache: PartsListCache = None) -> List[PartsList]:
+    if (jobs > 1 and len(paths) > 1):
+        return load_parts_lists(*paths, storage = storage, jobs = jobs, cache = cache)
+
     parts_lists: List[PartsList] = []
     for path in paths:
-        try:
-            parts_list = PartsList(path)
-        except AssertionError:
-            print('Unable to generate parts list for file at {}'.format(path))
+        parts_list, _, error = load_parts_list(path, storage, cache)
+        if (parts_list == None):
+            report_failure(path, error)
             continue
     
         parts_lists.append(parts_list)
@@ -22,40 +34,153 @@ def _build_parts_lists(*paths: List[Path]) -> List[PartsList]:
     return parts_lists
 
 
-def _dump_parts_list(parts_list: PartsList):
-    total_parts = 0
-    parts = parts_list.parts
+def _build_parts_streams(*paths: List[Path]) -> List[PartsStream]:
+    parts_streams: List[PartsStream] = []
+    for path in paths:
+        try:
+            parts_stream = PartsStream(path)
+        except RuntimeError:
+            print('Unable to stream parts list for file at {}'.format(path))
+            continue
 
-    print('Dumping parts list:')
+        parts_streams.append(parts_stream)
 
-    part: Part
-    for part_id in sorted(parts.keys()):
-        part = parts[part_id]
-        total_parts += part.qty
-        print('{} \t\t({}) \t{}'.format(part.bl_item_no, part.qty, part.color_name))
-    
-    print('Unique parts: {}, total parts: {}'.format(len(parts.keys()), total_parts))
+    return parts_streams
+
+
+def _parse_inputs(inputs: List[str]) -> Dict[str, Path]:
+    parsed_inputs: Dict[str, Path] = {}
+    for binding in inputs:
+        name, separator, path = binding.partition('=')
+        if (separator == '' or name.strip() == '' or path.strip() == ''):
+            raise RuntimeError('Unable to bind input \'{}\', expected NAME=PATH.'.format(binding))
+
+        parsed_inputs[name.strip()] = Path(path.strip())
+
+    return parsed_inputs
+
+
+def _write_output(output_parts_list: PartsList, output_mode: OutputMode, top_count: int, save_path: Path, save_format: str):
+    ## Handy info dump
+    with instrumentation.stage('output'):
+        write_parts_list(output_parts_list, output_mode, top_count)
+
+    ## Save the output PartsList for future use
+    if (save_format != None):
+        output_parts_list.export(save_path, SaveFormat(save_format.lower()))
+
+
+def _start_instrumentation(timings: bool, timings_json: Path, profile: Path):
+    ## Reports are made once the command finishes, however it finishes
+    context = click.get_current_context()
+
+    if (timings or timings_json):
+        recorder = instrumentation.TimingsRecorder()
+        instrumentation.subscribe(recorder.record)
+
+        def report_timings():
+            instrumentation.unsubscribe(recorder.record)
+            if (timings):
+                print(recorder.format_table())
+            if (timings_json):
+                recorder.write_json(Path(timings_json))
+                print('Saved timings to {}'.format(timings_json))
+
+        context.call_on_close(report_timings)
+
+    if (profile):
+        profiler = cProfile.Profile()
+        profiler.enable()
+
+        def report_profile():
+            profiler.disable()
+            profiler.dump_stats(str(profile))
+            print('Saved profile to {}'.format(profile))
+
+        context.call_on_close(report_profile)
+
+
+def _start_sqlite_store(sqlite_db: Path, jobs: int, cache_dir: Path, incremental_state: Path, batch_manifest: Path, serve: bool):
+    if (sqlite_db == None):
+        raise RuntimeError('Unable to use \'sqlite\' storage without a \'sqlite-db\' defined.')
+
+    ## Lists in the database are tied to a single connection, so they can't be pickled or shared between threads
+    if (jobs > 1 or cache_dir or incremental_state or batch_manifest or serve):
+        raise RuntimeError('Unable to use \'sqlite\' storage with \'jobs\', \'cache-dir\', \'incremental-state\', \'batch-manifest\', or \'serve\'.')
+
+    PartsList.sqlite_store = SqliteStore(Path(sqlite_db))
+    click.get_current_context().call_on_close(PartsList.sqlite_store.close)
 
 
 @click.command()
 @click.option('--missing-parts', is_flag = True, help = 'Compares the owned and unowned parts lists, returning a single list of all unowned parts.')
 @click.option('--merge', is_flag = True, help = 'Merges together all provided parts lists into a single one, regardless of them being owned or unowned.')
 @click.option('--intersection', is_flag = True, help = 'Intersects all provided parts lists into a single one, finding the common parts between them, regardless of them being owned or unowned.')
+@click.option('--expression', '-e', help = 'Evaluates an expression over parts lists, like \'(A ∪ B) − (C ∩ D)\', where each name is bound with --input. Union can also be written as | or +, difference as -, and intersection as &.')
+@click.option('--input', '-i', 'inputs', multiple = True, help = 'Binds a name in the \'expression\' to a parts list, as NAME=PATH. This option can be used multiple times.')
+@click.option('--explain', is_flag = True, help = 'Prints the \'expression\' mode\'s optimized plan before evaluating it.')
+@click.option('--batch-manifest', type = click.Path(exists = True, dir_okay = False), help = 'A .json or .yaml manifest of jobs to run together in a single batch, sharing parsed parts lists between them.')
+@click.option('--serve', is_flag = True, help = 'Runs as a long-lived server that keeps parsed parts lists in memory, and exposes the parts list operations as a JSON API.')
+@click.option('--host', default = '127.0.0.1', help = 'The host for the \'serve\' mode\'s HTTP server to listen on.')
+@click.option('--port', type = click.IntRange(min = 0, max = 65535), default = 8421, help = 'The port for the \'serve\' mode\'s HTTP server to listen on.')
+@click.option('--socket', 'socket_path', type = click.Path(dir_okay = False), help = 'A Unix socket for the \'serve\' mode to listen on, instead of HTTP over TCP.')
+@click.option('--input-dir', type = click.Path(exists = True, file_okay = False), help = 'The directory that the \'serve\' mode\'s requests are allowed to read parts lists from, defaults to the current directory.')
+@click.option('--export-dir', type = click.Path(file_okay = False), help = 'The directory that the \'serve\' mode\'s requests are allowed to export into. Exports are disabled without it.')
 @click.option('--owned-parts-list-path', '-o', type = click.Path(exists = True), multiple = True, help = 'A path to a Bricklink parts list .csv file representing parts that you own')
 @click.option('--unowned-parts-list-path', '-u', type = click.Path(exists = True), multiple = True, help = 'A path to a Bricklink parts list .csv file representing parts that you do not own')
 @click.option('--any-color', '-a', multiple = True, help = 'Denotes that this color\'s Bricklink name, can be treated as an "Any Color" or "Not Applicable", where the cheapest color will be chosen automatically.')
 @click.option('--save-path', '-s', type = click.Path(), help = 'The path to export manipulated parts list data to')
 @click.option('--save-format', '-f', type = click.Choice([save_format.value for save_format in SaveFormat], case_sensitive = False), help = 'The format to export manipulated parts list data in')
+@click.option('--jobs', '-j', type = click.IntRange(min = 1), default = 1, help = 'The number of worker processes to parse parts list files with.')
+@click.option('--cache-dir', type = click.Path(file_okay = False), help = 'A directory to cache parsed parts lists in, so that unchanged files don\'t need to be parsed again on later runs.')
+@click.option('--cache-size', type = click.IntRange(min = 0), default = 512, help = 'The maximum size of the parsed parts list cache in megabytes, least recently used entries are evicted beyond it.')
+@click.option('--cache-stats', is_flag = True, help = 'Prints the parsed parts list cache\'s hit and miss counts after loading.')
+@click.option('--incremental-state', type = click.Path(dir_okay = False), help = 'A file to keep \'missing-parts\' state in between runs, so that only owned parts lists that have changed since the last run need to be read.')
+@click.option('--stream-owned', is_flag = True, help = 'Streams the owned parts lists from disk row by row during \'missing-parts\', rather than loading them into memory first.')
+@click.option('--engine', type = click.Choice([engine.value for engine in Engine], case_sensitive = False), default = Operations.engine.value, help = 'Which implementation of the parts list operations to use. \'loop\' is faster for a handful of lists, while \'batched\' only pulls ahead when unioning around a hundred lists or more.')
+@click.option('--storage', type = click.Choice([storage.value for storage in StorageMode], case_sensitive = False), default = StorageMode.DICT.value, help = 'How parsed parts lists are held in memory. \'columnar\' trades a little access speed for a much smaller footprint on very large lists, and \'sqlite\' keeps them in a local database instead.')
+@click.option('--sqlite-db', type = click.Path(dir_okay = False), help = 'The SQLite database to keep parts lists in with \'sqlite\' storage. Files are only imported again when they change, and operations run as SQL queries inside the database.')
+@click.option('--output-mode', type = click.Choice([output_mode.value for output_mode in OutputMode], case_sensitive = False), default = OutputMode.FULL.value, help = 'How much of the output parts list to print. \'summary\' only prints the unique and total part counts, \'top-qty\' and \'top-weight\' print the parts with the highest quantity or weight, and \'full\' prints every part.')
+@click.option('--top-count', type = click.IntRange(min = 1), default = 20, help = 'How many parts to print in the \'top-qty\' and \'top-weight\' output modes.')
+@click.option('--timings', is_flag = True, help = 'Prints a table of how long each stage (loading, each operation, exporting, etc) took, along with its CPU time, peak memory use, and the rows and parts it processed.')
+@click.option('--timings-json', type = click.Path(dir_okay = False), help = 'A path to save the per-stage timings to as JSON.')
+@click.option('--profile', type = click.Path(dir_okay = False), help = 'A path to save a cProfile profile of the whole run to, for viewing with pstats or similar tools.')
 def main(
     missing_parts: bool,
     merge: bool,
     intersection: bool,
+    expression: str,
+    inputs: List[str],
+    explain: bool,
+    batch_manifest: Path,
+    serve: bool,
+    host: str,
+    port: int,
+    socket_path: Path,
+    input_dir: Path,
+    export_dir: Path,
     owned_parts_list_path: List[Path],
     unowned_parts_list_path: List[Path],
     any_color: List[str],
     save_path: Path,
-    save_format: str
+    save_format: str,
+    jobs: int,
+    cache_dir: Path,
+    cache_size: int,
+    cache_stats: bool,
+    incremental_state: Path,
+    stream_owned: bool,
+    engine: str,
+    storage: str,
+    sqlite_db: Path,
+    output_mode: str,
+    top_count: int,
+    timings: bool,
+    timings_json: Path,
+    profile: Path
 ):
+    _start_instrumentation(timings, timings_json, profile)
+
     ## Enforce plurality correctness for multi-options & ensure we're working with pathlib Paths (click.Path() isn't pathlib.Path for Python 2 compatibility reasons)
     owned_parts_list_paths = [Path(path) for path in owned_parts_list_path]
     del owned_parts_list_path
@@ -64,6 +189,43 @@ def main(
     any_colors = any_color
     del any_color
     save_path = Path(save_path) if save_path else None
+    storage = StorageMode(storage.lower())
+    output_mode = OutputMode(output_mode.lower())
+    Operations.engine = Engine(engine.lower())
+    cache = PartsListCache(Path(cache_dir), cache_size * 1024 * 1024) if cache_dir else None
+    if (storage == StorageMode.SQLITE):
+        _start_sqlite_store(sqlite_db, jobs, cache_dir, incremental_state, batch_manifest, serve)
+
+    ## Run every job in the manifest, rather than a single command
+    if (batch_manifest):
+        batch_jobs = load_manifest(Path(batch_manifest))
+        print('Running {} batch jobs from: {}'.format(len(batch_jobs), batch_manifest))
+
+        for result in BatchRunner(storage, jobs, cache).run(batch_jobs):
+            if (result.error != None):
+                print('Job \'{}\' failed: {}'.format(result.name, result.error))
+            else:
+                print('Job \'{}\' finished with {} unique parts, {} total parts'.format(result.name, len(result.parts_list.parts), result.parts_list.get_total_qty()))
+        return
+
+    ## Serve requests until interrupted, rather than running a single command
+    if (serve):
+        server = create_server(
+            PartsListRegistry(storage, cache),
+            host,
+            port,
+            socket_path,
+            input_directory = Path(input_dir) if input_dir else None,
+            output_directory = Path(export_dir) if export_dir else None
+        )
+        print('Serving parts list operations at: {}'.format(socket_path if socket_path else 'http://{}:{}'.format(*server.server_address[:2])))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+        return
 
     ## Ensure valid saving can happen (if desired)
     if (save_path == None and save_format != None):
@@ -71,9 +233,43 @@ def main(
     elif (save_path != None and save_format == None):
         raise RuntimeError('Unable to save output with a \'save_path\', but without a \'save_format\' defined.')
 
+    ## Only the missing parts search knows how to consume streamed parts lists
+    if (stream_owned and not missing_parts):
+        raise RuntimeError('Unable to use \'stream-owned\' with anything but \'missing-parts\'.')
+
+    ## Evaluate the whole expression in a single planned pass, rather than a single command
+    if (expression):
+        plan = build_plan(parse_expression(expression, _parse_inputs(inputs)))
+        if (explain):
+            print('Expression plan:\n{}'.format(format_plan(plan)))
+
+        ## Any colors are remapped as each parts list is loaded, so the output doesn't need remapping
+        output_parts_list = run_plan(plan, any_colors, storage, cache)
+        _write_output(output_parts_list, output_mode, top_count, save_path, save_format)
+        return
+
     ## Build the PartsList lists
-    owned_parts_lists: List[PartsList] = _build_parts_lists(*owned_parts_list_paths)
-    unowned_parts_lists: List[PartsList] = _build_parts_lists(*unowned_parts_list_paths)
+    with instrumentation.stage('load'):
+        owned_parts_list: PartsList = None
+        if (missing_parts and incremental_state):
+            ## Only the owned lists that have changed since the last run get read, and that's handled incrementally below
+            owned_parts_lists: List[PartsList] = []
+            owned_paths = owned_parts_list_paths
+        elif (stream_owned):
+            owned_parts_lists: List[PartsStream] = _build_parts_streams(*owned_parts_list_paths)
+            owned_paths = [parts_stream.path for parts_stream in owned_parts_lists]
+        elif (missing_parts and jobs > 1 and len(owned_parts_list_paths) > 1):
+            ## The owned lists only ever get unioned together when searching for missing parts, so let the workers do it
+            owned_parts_list, owned_paths = load_union(*owned_parts_list_paths, storage = storage, jobs = jobs, cache = cache)
+            owned_parts_lists: List[PartsList] = []
+        else:
+            owned_parts_lists: List[PartsList] = _build_parts_lists(*owned_parts_list_paths, storage = storage, jobs = jobs, cache = cache)
+            owned_paths = [parts_list.path for parts_list in owned_parts_lists]
+        unowned_parts_lists: List[PartsList] = _build_parts_lists(*unowned_parts_list_paths, storage = storage, jobs = jobs, cache = cache)
+
+    if (cache != None and cache_stats):
+        stats = cache.get_stats()
+        print('Parts list cache hits: {}, misses: {}, entries: {}, size: {} bytes'.format(stats['hits'], stats['misses'], stats['entries'], stats['size_bytes']))
 
     ## Build the output PartsList
     output_parts_list: PartsList = None
@@ -83,13 +279,31 @@ def main(
 
         print('Performing search for missing parts at: {}, from the owned parts lists at: {}.'.format(
             unowned_parts_lists[0],
-            ', '.join([str(parts_list.path) for parts_list in owned_parts_lists])
+            ', '.join([str(path) for path in owned_paths])
         ))
 
-        owned_parts_list = Operations.union(*owned_parts_lists)
         unowned_parts_list = Operations.union(*unowned_parts_lists)
 
-        output_parts_list = Operations.difference(unowned_parts_list, owned_parts_list)
+        if (incremental_state):
+            incremental = IncrementalMissingParts(Path(incremental_state), storage)
+            with instrumentation.stage('incremental_update'):
+                output_parts_list = incremental.update([parts_list.path for parts_list in unowned_parts_lists], owned_paths, unowned_parts_list)
+
+            print('Incremental update {}: {} owned parts lists changed, {} unchanged, {} removed, {} parts recomputed.'.format(
+                'rebuilt from scratch' if incremental.full_rebuild else 'applied',
+                len(incremental.changed_paths),
+                len(incremental.unchanged_paths),
+                len(incremental.removed_paths),
+                incremental.updated_part_count
+            ))
+        elif (stream_owned):
+            ## Subtracting every stream in a single pass is equivalent to subtracting their union, but never holds more
+            ## than the unowned parts in memory
+            output_parts_list = Operations.difference_all(unowned_parts_list, *owned_parts_lists)
+        else:
+            if (owned_parts_list == None):
+                owned_parts_list = Operations.union(*owned_parts_lists)
+            output_parts_list = Operations.difference(unowned_parts_list, owned_parts_list)
     elif merge:
         if (len(unowned_parts_lists) + len(owned_parts_lists) == 0):
             raise RuntimeError('No parts lists provided, thus the \'merge\' would be pointless.')
@@ -121,15 +335,7 @@ def main(
     if (len(any_colors) > 0):
         output_parts_list.set_any_color(any_colors)
 
-    ## Handy info dump
-    _dump_parts_list(output_parts_list)
-
-    ## Save the output PartsList for future use
-    if save_format == SaveFormat.CSV.value:
-        output_parts_list.export_csv(save_path)
-    elif save_format == SaveFormat.SIMPLE_CSV.value:
-        output_parts_list.export_simple_csv(save_path)
-    ## elif as new formats are implemented
+    _write_output(output_parts_list, output_mode, top_count, save_path, save_format)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,283 @@
+from array import array
+from collections.abc import MutableMapping
+from itertools import groupby
+from typing import Dict, Iterator, List, Tuple
+
+from part import Part
+
+class StringPool:
+    '''
+    Dictionary-encodes strings into small integer codes, so that repeated values (colors, categories, part names, etc)
+    are only stored once no matter how many rows reference them.
+    '''
+
+    def __init__(self):
+        self._codes: Dict[str, int] = {}
+        self._strings: List[str] = []
+
+    ## Magic Methods
+
+    def __len__(self) -> int:
+        return len(self._strings)
+
+
+    def __getstate__(self) -> dict:
+        ## The code lookup is entirely derived from the strings, so there's no need to persist it
+        return {'_strings': self._strings}
+
+
+    def __setstate__(self, state: dict):
+        self._strings = state['_strings']
+        self._codes = {string: code for code, string in enumerate(self._strings)}
+
+    ## Properties
+
+    @property
+    def strings(self) -> List[str]:
+        return self._strings
+
+    ## Methods
+
+    @staticmethod
+    def from_strings(strings: List[str]) -> "StringPool":
+        pool = StringPool()
+        pool.__setstate__({'_strings': strings})
+
+        return pool
+
+
+    def encode(self, value: str) -> int:
+        code = self._codes.get(value)
+        if (code == None):
+            code = len(self._strings)
+            self._codes[value] = code
+            self._strings.append(value)
+
+        return code
+
+
+    def decode(self, code: int) -> str:
+        return self._strings[code]
+
+
+class ColumnarParts(MutableMapping):
+    '''
+    A drop-in replacement for the PartsList.parts dict (part id -> Part), that stores each Part field in its own
+    compact column instead of keeping a full Part object around for every lot. String fields are dictionary-encoded
+    via a StringPool, while qty and weight live in typed arrays.
+
+    Parts handed out by this mapping are materialized on access, so they're effectively snapshots. Changes made to
+    them need to be written back via assignment (ex: parts[part_id] = part), which is what all of the Operations and
+    PartsList methods already do.
+    '''
+
+    STRING_FIELDS = ['bl_item_no', 'element_id', 'l_draw_id', 'part_name', 'bl_color_id', 'l_draw_color_id', 'color_name', 'color_category']
+
+    def __init__(self):
+        self._pools: Dict[str, StringPool] = {field: StringPool() for field in self.STRING_FIELDS}
+        self._columns: Dict[str, array] = {field: array('I') for field in self.STRING_FIELDS}
+        self.qty = array('q')
+        self.weight = array('d')
+        self._index: Dict[str, int] = {} # part id -> row
+        self._dead_rows = 0
+
+    ## Magic Methods
+
+    def __getitem__(self, part_id: str) -> Part:
+        return self.get_part(self._index[part_id])
+
+
+    def __setitem__(self, part_id: str, part: Part):
+        row = self._index.get(part_id)
+        if (row == None):
+            self._index[part_id] = self._append_row(part)
+            return
+
+        for field in self.STRING_FIELDS:
+            self._columns[field][row] = self._pools[field].encode(getattr(part, field))
+        self.qty[row] = part.qty
+        self.weight[row] = part.weight
+
+
+    def __delitem__(self, part_id: str):
+        del self._index[part_id]
+
+        ## Rows are tombstoned rather than removed, so that iteration order matches a regular dict. Once enough of them
+        ## pile up, the columns get rebuilt without them.
+        self._dead_rows += 1
+        if (self._dead_rows > len(self._index)):
+            self.compact()
+
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._index)
+
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+
+    def __contains__(self, part_id: str) -> bool:
+        return part_id in self._index
+
+
+    def __getstate__(self) -> dict:
+        ## Don't bother persisting tombstoned rows
+        if (self._dead_rows > 0):
+            self.compact()
+
+        return self.__dict__
+
+    ## Methods
+
+    @staticmethod
+    def from_parts(parts: MutableMapping) -> "ColumnarParts":
+        if (isinstance(parts, ColumnarParts)):
+            return parts
+
+        columnar_parts = ColumnarParts()
+        for part_id, part in parts.items():
+            columnar_parts[part_id] = part
+
+        return columnar_parts
+
+
+    @staticmethod
+    def from_columns(pools: Dict[str, StringPool], columns: Dict[str, array], qty: array, weight: array, part_ids: List[str] = None) -> "ColumnarParts":
+        '''
+        Builds a ColumnarParts around already populated columns, rebuilding the part id index from them unless each
+        row's part id is given
+        '''
+
+        columnar_parts = ColumnarParts()
+        columnar_parts._pools = pools
+        columnar_parts._columns = columns
+        columnar_parts.qty = qty
+        columnar_parts.weight = weight
+
+        if (part_ids == None):
+            bl_item_nos = pools['bl_item_no'].strings
+            color_names = pools['color_name'].strings
+            bl_item_no_column = columns['bl_item_no']
+            color_name_column = columns['color_name']
+            part_ids = [Part.build_id(bl_item_nos[bl_item_no_column[row]], color_names[color_name_column[row]]) for row in range(len(qty))]
+
+        index = columnar_parts._index
+        for row, part_id in enumerate(part_ids):
+            if (part_id in index):
+                columnar_parts._dead_rows += 1
+            index[part_id] = row
+
+        return columnar_parts
+
+
+    @staticmethod
+    def gather(sources: List["ColumnarParts"], source_indices: List[int], rows: List[int], part_ids: List[str], qty: array, weight: array) -> "ColumnarParts":
+        '''
+        Builds a ColumnarParts straight out of other ColumnarParts' columns, without materializing any Parts. Each new
+        row copies the string fields from rows[i] of sources[source_indices[i]], and takes its qty and weight from the
+        given arrays. The source_indices can be None when every row comes from the first (or only) source.
+        '''
+
+        ## Rows tend to come in runs from the same source (a union's come in the order of its sources), so each run is
+        ## copied over in one go
+        runs: List[Tuple[int, int, int]] = [] # (source index, start, end)
+        if (source_indices == None):
+            runs.append((0, 0, len(rows)))
+        else:
+            start = 0
+            for index, run in groupby(source_indices):
+                end = start + sum(1 for _ in run)
+                runs.append((index, start, end))
+                start = end
+
+        pools: Dict[str, StringPool] = {}
+        columns: Dict[str, array] = {}
+        for field in ColumnarParts.STRING_FIELDS:
+            ## The first source's codes are kept as-is, with a copy of its pool so that the pool is never shared
+            pool = StringPool.from_strings(list(sources[0]._pools[field].strings))
+            column = array('I')
+            for index, start, end in runs:
+                codes = list(map(sources[index]._columns[field].__getitem__, rows[start:end]))
+
+                ## Other sources' codes need translating into the new pool, but only for the strings that are used
+                if (index != 0):
+                    strings = sources[index]._pools[field].strings
+                    translation = {code: pool.encode(strings[code]) for code in set(codes)}
+                    codes = map(translation.__getitem__, codes)
+
+                column.extend(codes)
+
+            pools[field] = pool
+            columns[field] = column
+
+        return ColumnarParts.from_columns(pools, columns, qty, weight, part_ids)
+
+
+    def _append_row(self, part: Part) -> int:
+        for field in self.STRING_FIELDS:
+            self._columns[field].append(self._pools[field].encode(getattr(part, field)))
+        self.qty.append(part.qty)
+        self.weight.append(part.weight)
+
+        return len(self.qty) - 1
+
+
+    def get_pool(self, field: str) -> StringPool:
+        return self._pools[field]
+
+
+    def get_column(self, field: str) -> array:
+        return self._columns[field]
+
+
+    def row_of(self, part_id: str) -> int:
+        return self._index[part_id]
+
+
+    def get_field(self, row: int, field: str) -> str:
+        return self._pools[field].decode(self._columns[field][row])
+
+
+    def get_part(self, row: int) -> Part:
+        csv_line = [self.get_field(row, field) for field in self.STRING_FIELDS]
+        csv_line.append(self.qty[row])
+        csv_line.append(self.weight[row])
+
+        return Part(csv_line)
+
+
+    def iter_rows(self) -> Iterator[Tuple[str, int]]:
+        '''
+        Yields (part id, row) for every live row, so that the columns can be read (or gathered) directly
+        '''
+
+        return iter(self._index.items())
+
+
+    def iter_quantities(self) -> Iterator[Tuple[str, int, float]]:
+        '''
+        Yields (part id, qty, weight) for every live row, straight from the columns without materializing any Parts
+        '''
+
+        qty = self.qty
+        weight = self.weight
+        for part_id, row in self._index.items():
+            yield part_id, qty[row], weight[row]
+
+
+    def compact(self):
+        '''
+        Rebuilds the columns so that they only contain live rows, in iteration order
+        '''
+
+        rows = list(self._index.values())
+
+        for field in self.STRING_FIELDS:
+            column = self._columns[field]
+            self._columns[field] = array('I', (column[row] for row in rows))
+        self.qty = array('q', (self.qty[row] for row in rows))
+        self.weight = array('d', (self.weight[row] for row in rows))
+
+        self._index = {part_id: row for row, part_id in enumerate(self._index)}
+        self._dead_rows = 0
@@ -0,0 +1,162 @@
+import gzip
+import io
+import queue
+import threading
+from pathlib import Path
+from typing import BinaryIO, TextIO
+
+from enums import Compression
+
+## zstandard is an optional dependency, so zstd compressed files are only supported when it's installed
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+COMPRESSION_SUFFIXES = {'.gz': Compression.GZIP, '.zst': Compression.ZSTD}
+
+## Large buffers mean far fewer (and cheaper) calls down into the compressor and the file system
+BUFFER_SIZE = 1024 * 1024
+
+
+def detect_compression(path: Path) -> Compression:
+    return COMPRESSION_SUFFIXES.get(Path(path).suffix.lower(), Compression.NONE)
+
+
+def get_content_suffix(path: Path) -> str:
+    '''
+    Gets the suffix of the file's contents, ignoring any compression suffix (ex: '.csv' for both data.csv and
+    data.csv.gz)
+    '''
+
+    path = Path(path)
+    if (detect_compression(path) != Compression.NONE):
+        return Path(path.stem).suffix
+
+    return path.suffix
+
+
+def _require_zstandard():
+    if (zstandard == None):
+        raise RuntimeError('Unable to use zstd compression, as the \'zstandard\' package isn\'t installed.')
+
+
+def open_text_writer(path: Path, compression: Compression = None) -> TextIO:
+    '''
+    Opens the given path for writing text with a large buffer, compressing it if need be. The compression is detected
+    from the path's suffix (.gz or .zst) when one isn't given.
+    '''
+
+    if (compression == None):
+        compression = detect_compression(path)
+
+    if (compression == Compression.GZIP):
+        binary_file = gzip.GzipFile(path, 'wb', compresslevel = 6)
+    elif (compression == Compression.ZSTD):
+        _require_zstandard()
+        binary_file = zstandard.ZstdCompressor().stream_writer(open(path, 'wb'), closefd = True)
+    else:
+        return open(path, 'w', newline = '', buffering = BUFFER_SIZE)
+
+    return io.TextIOWrapper(io.BufferedWriter(binary_file, BUFFER_SIZE), newline = '')
+
+
+class ThreadedDecompressor(io.RawIOBase):
+    '''
+    A readable binary stream that decompresses its source in a background thread, a chunk ahead of whoever's reading
+    it. Both zlib and zstd release the GIL while they work, so decompression overlaps with parsing whatever came out of
+    the previous chunks. At most max_chunks chunks are ever buffered.
+    '''
+
+    CHUNK_SIZE = BUFFER_SIZE
+
+    def __init__(self, source: BinaryIO, max_chunks: int = 8):
+        super().__init__()
+        self._source = source
+        self._chunks = queue.Queue(maxsize = max_chunks)
+        self._current = memoryview(b'')
+        self._finished = False
+        self._stopping = threading.Event()
+
+        self._thread = threading.Thread(target = self._decompress, daemon = True)
+        self._thread.start()
+
+    ## Methods
+
+    def _put(self, item):
+        ## Keep checking back in case the reader has stopped, so the thread never gets stuck on a full queue
+        while (not self._stopping.is_set()):
+            try:
+                self._chunks.put(item, timeout = 0.1)
+                return
+            except queue.Full:
+                continue
+
+
+    def _decompress(self):
+        try:
+            while (not self._stopping.is_set()):
+                chunk = self._source.read(self.CHUNK_SIZE)
+                if (not chunk):
+                    break
+                self._put(chunk)
+        except Exception as exception:
+            ## Hand the error over to the reader, to be raised from read()
+            self._put(exception)
+        finally:
+            self._put(None)
+
+
+    def readable(self) -> bool:
+        return True
+
+
+    def readinto(self, buffer) -> int:
+        while (len(self._current) == 0):
+            if (self._finished):
+                return 0
+
+            item = self._chunks.get()
+            if (item == None):
+                self._finished = True
+            elif (isinstance(item, Exception)):
+                self._finished = True
+                raise item
+            else:
+                self._current = memoryview(item)
+
+        size = min(len(buffer), len(self._current))
+        buffer[:size] = self._current[:size]
+        self._current = self._current[size:]
+
+        return size
+
+
+    def close(self):
+        if (not self.closed):
+            self._stopping.set()
+            self._thread.join()
+            self._source.close()
+
+        super().close()
+
+
+def open_text_reader(path: Path, compression: Compression = None) -> TextIO:
+    '''
+    Opens the given path for reading text, just like open() would. Compressed files are decompressed as they're read,
+    in a background thread, without ever being written out to disk. The compression is detected from the path's suffix
+    (.gz or .zst) when one isn't given.
+    '''
+
+    if (compression == None):
+        compression = detect_compression(path)
+
+    if (compression == Compression.GZIP):
+        source = gzip.GzipFile(path, 'rb')
+    elif (compression == Compression.ZSTD):
+        _require_zstandard()
+        source = zstandard.ZstdDecompressor().stream_reader(open(path, 'rb'), closefd = True)
+    else:
+        return open(path)
+
+    return io.TextIOWrapper(io.BufferedReader(ThreadedDecompressor(source), BUFFER_SIZE))
@@ -0,0 +1,140 @@
+from collections.abc import Mapping, MutableMapping
+from typing import Dict, Iterator, Set, Tuple
+
+from part import Part
+
+class CopyOnWriteParts(MutableMapping):
+    '''
+    A mapping of part id -> Part that layers its own changes on top of a shared, never modified base mapping. This lets
+    PartsList.clone() hand out copies in constant time, with each copy only paying for the entries it actually touches.
+
+    Like ColumnarParts, parts read out of the base are handed out as fresh copies, so changes to them only stick once
+    they're assigned back. Nothing is kept for a read, and the base must not change for as long as this is around.
+    '''
+
+    def __init__(self, base: Mapping):
+        self._base = base
+        self._base_materializes = not isinstance(base, dict)
+        self._overrides: Dict[str, Part] = {} # replacements for keys in the base
+        self._added: Dict[str, Part] = {} # keys that aren't in the base at all
+        self._deleted: Set[str] = set() # keys in the base that have been removed
+
+    ## Magic Methods
+
+    def __getitem__(self, part_id: str) -> Part:
+        part = self._added.get(part_id)
+        if (part is not None):
+            return part
+
+        part = self._overrides.get(part_id)
+        if (part is not None):
+            return part
+
+        if (part_id in self._deleted):
+            raise KeyError(part_id)
+
+        part = self._base[part_id]
+        if (not self._base_materializes):
+            part = part.clone()
+
+        return part
+
+
+    def __setitem__(self, part_id: str, part: Part):
+        if (part_id in self._base):
+            self._overrides[part_id] = part
+            self._deleted.discard(part_id)
+        else:
+            self._added[part_id] = part
+
+
+    def __delitem__(self, part_id: str):
+        if (part_id in self._added):
+            del self._added[part_id]
+        elif (part_id in self._base and part_id not in self._deleted):
+            self._deleted.add(part_id)
+            self._overrides.pop(part_id, None)
+        else:
+            raise KeyError(part_id)
+
+
+    def __iter__(self) -> Iterator[str]:
+        for part_id in self._base:
+            if (part_id not in self._deleted):
+                yield part_id
+
+        yield from self._added
+
+
+    def __len__(self) -> int:
+        return len(self._base) - len(self._deleted) + len(self._added)
+
+
+    def __contains__(self, part_id: str) -> bool:
+        if (part_id in self._added):
+            return True
+
+        return part_id in self._base and part_id not in self._deleted
+
+    ## Properties
+
+    @property
+    def base(self) -> Mapping:
+        return self._base
+
+
+    @property
+    def modified_count(self) -> int:
+        return len(self._overrides) + len(self._added) + len(self._deleted)
+
+    ## Methods
+
+    def peek(self, part_id: str) -> Part:
+        '''
+        Gets the current Part for the given id without copying it out of the base, so it must not be modified
+        '''
+
+        part = self._added.get(part_id)
+        if (part is None):
+            part = self._overrides.get(part_id)
+        if (part is None):
+            if (part_id in self._deleted):
+                raise KeyError(part_id)
+            part = self._base[part_id]
+
+        return part
+
+
+    def copy(self) -> "CopyOnWriteParts":
+        '''
+        Builds another CopyOnWriteParts over the same base, with its own copies of this one's changes
+        '''
+
+        copy = CopyOnWriteParts(self._base)
+        copy._overrides = {part_id: part.clone() for part_id, part in self._overrides.items()}
+        copy._added = {part_id: part.clone() for part_id, part in self._added.items()}
+        copy._deleted = set(self._deleted)
+
+        return copy
+
+
+    def iter_quantities(self) -> Iterator[Tuple[str, int, float]]:
+        if (hasattr(self._base, 'iter_quantities')):
+            base_quantities = self._base.iter_quantities()
+        else:
+            base_quantities = ((part_id, part.qty, part.weight) for part_id, part in self._base.items())
+
+        deleted = self._deleted
+        overrides = self._overrides
+        for part_id, qty, weight in base_quantities:
+            if (part_id in deleted):
+                continue
+
+            part = overrides.get(part_id)
+            if (part is not None):
+                yield part_id, part.qty, part.weight
+            else:
+                yield part_id, qty, weight
+
+        for part_id, part in self._added.items():
+            yield part_id, part.qty, part.weight
@@ -4,3 +4,31 @@ from enum import Enum
 class SaveFormat(Enum):
     CSV = 'csv'
     SIMPLE_CSV = 'simple-csv'
+    BINARY = 'binary'
+
+
+class StorageMode(Enum):
+    DICT = 'dict'
+    COLUMNAR = 'columnar'
+    MAPPED = 'mapped'
+    LAZY = 'lazy'
+    SQLITE = 'sqlite'
+
+
+class Engine(Enum):
+    LOOP = 'loop'
+    BATCHED = 'batched'
+
+
+class Compression(Enum):
+    NONE = 'none'
+    GZIP = 'gzip'
+    ZSTD = 'zstd'
+
+
+class OutputMode(Enum):
+    NONE = 'none'
+    SUMMARY = 'summary'
+    TOP_QTY = 'top-qty'
+    TOP_WEIGHT = 'top-weight'
+    FULL = 'full'
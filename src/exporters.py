@@ -0,0 +1,60 @@
+import csv
+from pathlib import Path
+from typing import Iterable, List, Tuple
+
+import fast_csv
+from compressed_io import open_text_writer
+from enums import Compression
+from part import Part
+
+## Streaming exporters, which write out any iterable of Parts as they're produced. That means the results of the
+## merge-join operations (see merge_join.py) can be written straight to disk, without ever collecting them into a
+## PartsList first.
+
+SIMPLE_CSV_HEADER = ['part', 'color', 'quantity']
+
+
+def _csv_row(part: Part) -> Tuple:
+    ## Same as Part.to_csv(), but the csv writer already knows how to format the numbers
+    return (
+        part.bl_item_no, part.element_id, part.l_draw_id, part.part_name, part.bl_color_id, part.l_draw_color_id,
+        part.color_name, part.color_category, part.qty, part.weight
+    )
+
+
+def _simple_csv_row(part: Part) -> Tuple:
+    return (part.bl_item_no, part.l_draw_color_id, part.qty)
+
+
+def write_csv(target: Path, parts: Iterable[Part], header: List[str] = None, compression: Compression = None):
+    '''
+    Writes a full-fat CSV of the given Parts, in the same layout that Bricklink exports them in.
+
+    Parameters:
+    target (Path): The path to write to
+    parts (Iterable[Part]): The Parts to write, which are consumed as they're written
+    header (List[str]): The header row, defaults to Bricklink's
+    compression (Compression): How to compress the output, detected from the target's suffix (.gz or .zst) by default
+    '''
+
+    with open_text_writer(target, compression) as csv_file:
+        writer = csv.writer(csv_file)
+        writer.writerow(header if header != None else fast_csv.BRICKLINK_HEADER)
+        writer.writerows(map(_csv_row, parts))
+
+
+def write_simple_csv(target: Path, parts: Iterable[Part], compression: Compression = None):
+    '''
+    Writes the bare minimum CSV for describing a collection of parts, with 'part', 'color', and 'quantity' fields that
+    are ready for Rebrickable integration.
+
+    Parameters:
+    target (Path): The path to write to
+    parts (Iterable[Part]): The Parts to write, which are consumed as they're written
+    compression (Compression): How to compress the output, detected from the target's suffix (.gz or .zst) by default
+    '''
+
+    with open_text_writer(target, compression) as csv_file:
+        writer = csv.writer(csv_file)
+        writer.writerow(SIMPLE_CSV_HEADER)
+        writer.writerows(map(_simple_csv_row, parts))
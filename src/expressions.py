@@ -0,0 +1,280 @@
+import re
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Tuple, Union
+
+import instrumentation
+from enums import StorageMode
+from operations import Operations
+from parallel_loading import load_parts_list
+from parts_list import PartsList
+from parts_list_cache import PartsListCache
+
+## Operators can be written with set symbols or plain ASCII. Intersection binds tighter than union and difference, which
+## are evaluated left to right.
+UNION_OPERATORS = ['∪', '|', '+']
+DIFFERENCE_OPERATORS = ['−', '-']
+INTERSECTION_OPERATORS = ['∩', '&']
+
+TOKEN_PATTERN = re.compile(r'\s*(?:(?P<name>[A-Za-z_][A-Za-z0-9_]*)|(?P<path>"[^"]*"|\'[^\']*\')|(?P<symbol>[()∪|+−\-∩&]))')
+
+LOAD = 'load'
+UNION = 'union'
+DIFFERENCE = 'difference'
+INTERSECTION = 'intersection'
+
+
+class Node(NamedTuple):
+    '''
+    A single node in an expression's tree. Loads have a single Path operand, unions and intersections have any number of
+    Node operands, and differences subtract every operand after the first from the first one (ex: A − (B ∪ C)).
+    '''
+
+    operation: str
+    operands: Tuple[Union["Node", Path], ...]
+
+    def __str__(self) -> str:
+        if (self.operation == LOAD):
+            return str(self.operands[0])
+
+        symbol = {UNION: ' ∪ ', DIFFERENCE: ' − ', INTERSECTION: ' ∩ '}[self.operation]
+        return '(' + symbol.join(str(operand) for operand in self.operands) + ')'
+
+
+class PlanStep(NamedTuple):
+    node: Node
+    inputs: Tuple[int, ...] # the indexes of the steps that this one operates on
+    last_use: int # the index of the last step that needs this step's output
+
+## Parsing
+
+class _Parser:
+    def __init__(self, text: str, inputs: Dict[str, Path]):
+        self.inputs = inputs
+        self.tokens: List[Tuple[str, str]] = []
+        self.index = 0
+
+        position = 0
+        text = text.rstrip()
+        while (position < len(text)):
+            match = TOKEN_PATTERN.match(text, position)
+            if (match == None):
+                raise RuntimeError('Unable to parse expression, unexpected character at position {}: {}'.format(position, text[position:]))
+
+            self.tokens.append((match.lastgroup, match.group(match.lastgroup)))
+            position = match.end()
+
+
+    def _peek(self) -> str:
+        return self.tokens[self.index][1] if self.index < len(self.tokens) else None
+
+
+    def _next(self) -> Tuple[str, str]:
+        if (self.index >= len(self.tokens)):
+            raise RuntimeError('Unable to parse expression, it ended unexpectedly.')
+
+        token = self.tokens[self.index]
+        self.index += 1
+        return token
+
+
+    def parse(self) -> Node:
+        node = self._parse_union()
+        if (self.index < len(self.tokens)):
+            raise RuntimeError('Unable to parse expression, unexpected \'{}\'.'.format(self._peek()))
+
+        return node
+
+
+    def _parse_union(self) -> Node:
+        node = self._parse_intersection()
+        while (self._peek() in UNION_OPERATORS or self._peek() in DIFFERENCE_OPERATORS):
+            operation = UNION if self._next()[1] in UNION_OPERATORS else DIFFERENCE
+            node = Node(operation, (node, self._parse_intersection()))
+
+        return node
+
+
+    def _parse_intersection(self) -> Node:
+        node = self._parse_operand()
+        while (self._peek() in INTERSECTION_OPERATORS):
+            self._next()
+            node = Node(INTERSECTION, (node, self._parse_operand()))
+
+        return node
+
+
+    def _parse_operand(self) -> Node:
+        kind, value = self._next()
+        if (value == '('):
+            node = self._parse_union()
+            if (self._peek() != ')'):
+                raise RuntimeError('Unable to parse expression, missing a closing parenthesis.')
+            self._next()
+            return node
+        elif (kind == 'name'):
+            if (value not in self.inputs):
+                raise RuntimeError('Unable to parse expression, \'{}\' isn\'t bound to a parts list.'.format(value))
+            return Node(LOAD, (Path(self.inputs[value]).resolve(),))
+        elif (kind == 'path'):
+            return Node(LOAD, (Path(value[1:-1]).resolve(),))
+
+        raise RuntimeError('Unable to parse expression, unexpected \'{}\'.'.format(value))
+
+
+def parse_expression(text: str, inputs: Dict[str, Path] = None) -> Node:
+    '''
+    Parses an expression like '(A ∪ B) − (C ∩ D)' into a tree of Nodes. Operands are either names bound to paths in
+    inputs, or quoted paths. Union can also be written as | or +, difference as -, and intersection as &.
+    '''
+
+    return _Parser(text, inputs or {}).parse()
+
+## Planning
+
+def _flatten(operation: str, operands: List[Node]) -> List[Node]:
+    flattened: List[Node] = []
+    for operand in operands:
+        if (operand.operation == operation):
+            flattened.extend(operand.operands)
+        else:
+            flattened.append(operand)
+
+    return flattened
+
+
+def optimize(node: Node) -> Node:
+    '''
+    Rewrites an expression's tree so that it can be evaluated in fewer passes, without changing its result:
+
+    - Nested unions and intersections are fused into a single n-ary operation, which each only take one pass over
+      all of their inputs (ex: (A ∪ B) ∪ C becomes ∪(A, B, C))
+    - Repeated intersection operands are dropped, since intersecting a list with itself changes nothing
+    - Chained differences are fused, and so are differences with a union (ex: (A − B) − C and A − (B ∪ C) both
+      become A − B − C), so their subtrahends are all applied at once without ever building their union
+    '''
+
+    if (node.operation == LOAD):
+        return node
+
+    operands = [optimize(operand) for operand in node.operands]
+
+    if (node.operation == UNION):
+        return Node(UNION, tuple(_flatten(UNION, operands)))
+    elif (node.operation == INTERSECTION):
+        unique_operands: Dict[tuple, Node] = {}
+        for operand in _flatten(INTERSECTION, operands):
+            unique_operands.setdefault(_canonical_key(operand), operand)
+
+        operands = list(unique_operands.values())
+        return operands[0] if len(operands) == 1 else Node(INTERSECTION, tuple(operands))
+
+    minuend, subtrahends = operands[0], operands[1:]
+    if (minuend.operation == DIFFERENCE):
+        minuend, subtrahends = minuend.operands[0], list(minuend.operands[1:]) + subtrahends
+
+    return Node(DIFFERENCE, (minuend, *_flatten(UNION, subtrahends)))
+
+
+def _canonical_key(node: Node) -> tuple:
+    ## Unions and intersections give the same result no matter what order their operands are in
+    if (node.operation == LOAD):
+        return (LOAD, str(node.operands[0]))
+
+    operand_keys = [_canonical_key(operand) for operand in node.operands]
+    if (node.operation == DIFFERENCE):
+        return (DIFFERENCE, operand_keys[0], tuple(sorted(operand_keys[1:])))
+
+    return (node.operation, tuple(sorted(operand_keys)))
+
+
+def build_plan(node: Node) -> List[PlanStep]:
+    '''
+    Optimizes the expression, and lays it out as a list of steps to evaluate in order. Each file is only loaded once,
+    and common subexpressions are only evaluated once, no matter how many times they show up.
+    '''
+
+    nodes: List[Node] = []
+    inputs: List[Tuple[int, ...]] = []
+    step_indexes: Dict[tuple, int] = {}
+
+    def add_step(node: Node) -> int:
+        key = _canonical_key(node)
+        if (key in step_indexes):
+            return step_indexes[key]
+
+        operand_indexes = () if node.operation == LOAD else tuple(add_step(operand) for operand in node.operands)
+        nodes.append(node)
+        inputs.append(operand_indexes)
+        step_indexes[key] = len(nodes) - 1
+
+        return step_indexes[key]
+
+    add_step(optimize(node))
+
+    ## Track when each step's output is last needed, so that intermediate PartsLists can be dropped as soon as possible
+    last_uses = list(range(len(nodes)))
+    for index, operand_indexes in enumerate(inputs):
+        for operand_index in operand_indexes:
+            last_uses[operand_index] = index
+
+    return [PlanStep(node, operand_indexes, last_use) for node, operand_indexes, last_use in zip(nodes, inputs, last_uses)]
+
+
+def format_plan(plan: List[PlanStep]) -> str:
+    lines = []
+    for index, step in enumerate(plan):
+        if (step.node.operation == LOAD):
+            lines.append('{}: load {}'.format(index, step.node.operands[0]))
+        else:
+            lines.append('{}: {} {}'.format(index, step.node.operation, ', '.join(str(operand_index) for operand_index in step.inputs)))
+
+    return '\n'.join(lines)
+
+## Evaluation
+
+def run_plan(plan: List[PlanStep], any_colors: List[str] = None, storage: StorageMode = StorageMode.DICT, cache: PartsListCache = None) -> PartsList:
+    '''
+    Evaluates a plan from build_plan(), returning the final step's PartsList.
+
+    Any colors are remapped as each file is loaded, rather than on the output, so parts in any of those colors are
+    interchangeable everywhere in the expression. For example, owning a blue brick covers a missing red one when both
+    Red and Blue are any colors.
+    '''
+
+    results: Dict[int, PartsList] = {}
+    for index, step in enumerate(plan):
+        node = step.node
+        if (node.operation == LOAD):
+            with instrumentation.stage('load'):
+                parts_list, _, error = load_parts_list(node.operands[0], storage, cache)
+            if (parts_list == None):
+                raise RuntimeError('Unable to generate parts list for file at {}: {}'.format(node.operands[0], error))
+
+            ## Freshly loaded lists aren't shared with anything, so they can be remapped in place
+            if (any_colors):
+                parts_list.set_any_color(any_colors)
+
+            results[index] = parts_list
+        else:
+            operands = [results[operand_index] for operand_index in step.inputs]
+            if (node.operation == UNION):
+                results[index] = Operations.union(*operands)
+            elif (node.operation == INTERSECTION):
+                results[index] = Operations.intersection(*operands)
+            else:
+                results[index] = Operations.difference_all(*operands)
+
+        ## Let go of anything that isn't needed by any later steps
+        for operand_index in step.inputs:
+            if (plan[operand_index].last_use == index):
+                results.pop(operand_index, None)
+
+    return results[len(plan) - 1]
+
+
+def evaluate(text: str, inputs: Dict[str, Path] = None, any_colors: List[str] = None, storage: StorageMode = StorageMode.DICT, cache: PartsListCache = None) -> PartsList:
+    '''
+    Parses, plans, and evaluates an expression in one go. See parse_expression() and run_plan() for details.
+    '''
+
+    return run_plan(build_plan(parse_expression(text, inputs)), any_colors, storage, cache)
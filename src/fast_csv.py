@@ -0,0 +1,196 @@
+from array import array
+from collections import defaultdict
+from itertools import chain, count
+from operator import methodcaller
+from pathlib import Path
+from typing import Iterator, List, TextIO, Tuple
+
+from columnar_parts import ColumnarParts, StringPool
+from compressed_io import open_text_reader
+from part import Part
+
+## Bricklink exports always start with this exact header, anything else goes through the general csv reader
+BRICKLINK_HEADER = ['BLItemNo', 'ElementId', 'LdrawId', 'PartName', 'BLColorId', 'LDrawColorId', 'ColorName', 'ColorCategory', 'Qty', 'Weight']
+FIELD_COUNT = len(BRICKLINK_HEADER)
+PART_NAME_INDEX = BRICKLINK_HEADER.index('PartName')
+
+## How many characters of the file get read and split into columns at a time
+CHUNK_SIZE = 1 << 18
+
+## Stands in for commas inside of quoted part names while the rest of the file is split up
+QUOTED_COMMA = '\x00'
+
+
+class _Anomaly(Exception):
+    pass
+
+
+def _unquote_name(name: str) -> str:
+    ## Names with quotes in them need to be entirely wrapped in quotes, with any quotes inside of them escaped ("")
+    if (len(name) < 2 or name[0] != '"' or name[-1] != '"' or '"' in name[1:-1].replace('""', '')):
+        raise _Anomaly()
+
+    return name[1:-1].replace('""', '"').replace(QUOTED_COMMA, ',')
+
+
+def split_lines(text: str) -> Tuple[List[str], List[str]]:
+    '''
+    Splits the text of a Bricklink export into its header and the lines for each of its parts, leaving off the summary
+    lines at the bottom.
+
+    Returns:
+    Tuple[List[str], List[str]]: The header and the lines, or (None, None) if the header isn't Bricklink's
+    '''
+
+    ## Stop at the first row with a falsy bricklink id (ex: the summary lines at the bottom), like the csv reader does
+    summary_start = text.find('\n,')
+    if (summary_start != -1):
+        text = text[:summary_start + 1]
+
+    ## Newlines have already been translated by open()
+    header, _, body = text.partition('\n')
+    if (header.split(',') != BRICKLINK_HEADER):
+        return None, None
+    if (body.endswith('\n')):
+        body = body[:-1]
+
+    return list(BRICKLINK_HEADER), body.split('\n') if body != '' else []
+
+
+def _tokenize(body: str) -> List[list]:
+    '''
+    Splits a chunk of whole lines from a Bricklink export into its columns. Rather than splitting it up line by line,
+    the whole chunk is split on commas at once, and each column is then sliced out of the result.
+    '''
+
+    if (body.endswith('\n')):
+        body = body[:-1]
+    lines = body.split('\n')
+
+    ## Only the PartName can be quoted, since it's the only free-form text field. Every other segment between a pair of
+    ## quotes is inside of one, so hide its commas until the names are unquoted.
+    if ('"' in body):
+        segments = body.split('"')
+        quoted_segments = segments[1::2]
+        if (len(segments) % 2 == 0 or '\n' in ''.join(quoted_segments) or QUOTED_COMMA in body):
+            raise _Anomaly()
+
+        segments[1::2] = [segment.replace(',', QUOTED_COMMA) for segment in quoted_segments]
+        body = '"'.join(segments)
+        lines = body.split('\n')
+
+    ## Every row needs to have every field, otherwise the columns would be misaligned (this also catches blank lines)
+    if (set(map(methodcaller('count', ','), lines)) != {FIELD_COUNT - 1}):
+        raise _Anomaly()
+    del lines
+
+    fields = body.replace('\n', ',').split(',')
+    columns = [fields[index::FIELD_COUNT] for index in range(FIELD_COUNT)]
+    del fields
+
+    for index, column in enumerate(columns):
+        if ('"' in ''.join(column)):
+            if (index != PART_NAME_INDEX):
+                raise _Anomaly()
+
+            columns[index] = [_unquote_name(name) if '"' in name else name for name in column]
+
+    return columns
+
+
+def _iter_chunks(text_file: TextIO) -> Iterator[str]:
+    ## Hands out roughly CHUNK_SIZE characters at a time, always ending on a line break so that no row gets split up
+    leftover = ''
+    while (True):
+        text = text_file.read(CHUNK_SIZE)
+        if (text == ''):
+            break
+
+        text = leftover + text
+        end = text.rfind('\n') + 1
+        leftover = text[end:]
+        if (end > 0):
+            yield text[:end]
+
+    if (leftover != ''):
+        yield leftover
+
+
+class _ColumnBuilder:
+    '''
+    Encodes tokenized chunks into the columns of a ColumnarParts as they come in, so the file's text never needs to be
+    held in memory all at once
+    '''
+
+    def __init__(self):
+        ## Every string is given the next code in its column the first time that it's seen
+        self.codes = [defaultdict(count().__next__) for _ in ColumnarParts.STRING_FIELDS]
+        self.columns = [array('I') for _ in ColumnarParts.STRING_FIELDS]
+        self.qty = array('q')
+        self.weight = array('d')
+        self.part_ids: List[str] = []
+
+    ## Methods
+
+    def extend(self, columns: List[list]):
+        ## Every part needs a bricklink id, and valid numbers (which are converted before anything else is appended)
+        if ('' in columns[0]):
+            raise _Anomaly()
+        qty = array('q', map(int, columns[8]))
+        weight = array('d', map(float, columns[9]))
+
+        for codes, encoded_column, column in zip(self.codes, self.columns, columns):
+            encoded_column.extend(map(codes.__getitem__, column))
+        self.qty.extend(qty)
+        self.weight.extend(weight)
+        self.part_ids.extend(map(Part.build_id, columns[0], columns[6]))
+
+
+    def build(self) -> ColumnarParts:
+        ## Each pool rebuilds its own lookup, so drop the builder's as it goes rather than holding onto both of them
+        pools = {}
+        for index, field in enumerate(ColumnarParts.STRING_FIELDS):
+            pools[field] = StringPool.from_strings(list(self.codes[index]))
+            self.codes[index] = None
+        columns = dict(zip(ColumnarParts.STRING_FIELDS, self.columns))
+
+        return ColumnarParts.from_columns(pools, columns, self.qty, self.weight, self.part_ids)
+
+
+def read_columnar_parts(path: Path) -> Tuple[List[str], ColumnarParts]:
+    '''
+    Reads a Bricklink parts list export straight into a ColumnarParts without going through the general csv reader, or
+    materializing any Parts along the way. The file is read and split into columns a chunk at a time, and each chunk
+    is encoded into the columns before the next one is read, so memory use stays close to the final ColumnarParts.
+
+    Returns:
+    Tuple[List[str], ColumnarParts]: The header and the parts. Or None if the file has anything unexpected in it (a
+        different header, quoting outside of the part name, multi-line fields, invalid numbers, etc), in which case
+        the general csv reader should be used instead.
+    '''
+
+    builder = _ColumnBuilder()
+    with open_text_reader(path) as csv_file:
+        chunks = _iter_chunks(csv_file)
+
+        ## Newlines have already been translated by open()
+        header, _, body = next(chunks, '').partition('\n')
+        if (header.split(',') != BRICKLINK_HEADER):
+            return None
+
+        try:
+            for body in chain([body], chunks):
+                ## Stop at the first row with a falsy bricklink id (ex: the summary lines at the bottom), like the csv
+                ## reader does. Chunks always start on a new row, so their first row gets checked too.
+                summary_start = ('\n' + body).find('\n,')
+                if (summary_start != -1):
+                    body = body[:summary_start]
+
+                if (body != ''):
+                    builder.extend(_tokenize(body))
+                if (summary_start != -1):
+                    break
+        except (_Anomaly, ValueError):
+            return None
+
+    return list(BRICKLINK_HEADER), builder.build()
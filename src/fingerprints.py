@@ -0,0 +1,21 @@
+import hashlib
+from pathlib import Path
+
+def build_fingerprint(path: Path, use_content_hash: bool = False) -> str:
+    '''
+    Builds a string that changes whenever the file at the given path does, based on its resolved path along with
+    either its size and modification time, or its contents
+    '''
+
+    resolved_path = Path(path).resolve()
+    fingerprint = hashlib.sha1(str(resolved_path).encode('utf-8'))
+
+    if (use_content_hash):
+        with open(resolved_path, 'rb') as file:
+            for chunk in iter(lambda: file.read(1024 * 1024), b''):
+                fingerprint.update(chunk)
+    else:
+        stat = resolved_path.stat()
+        fingerprint.update('{}:{}'.format(stat.st_size, stat.st_mtime_ns).encode('utf-8'))
+
+    return fingerprint.hexdigest()
@@ -0,0 +1,242 @@
+import hashlib
+import os
+import pickle
+import tempfile
+from pathlib import Path
+from typing import Dict, List, Set, Tuple
+
+from enums import StorageMode
+from fingerprints import build_fingerprint
+from operations import Operations
+from parts_list import PartsList
+from parts_stream import PartsStream
+
+class _StaleStateError(Exception):
+    '''
+    Raised when an owned file's stored rows don't match the state, so the state needs rebuilding from scratch
+    '''
+
+
+class IncrementalMissingParts:
+    '''
+    Keeps the result of a missing-parts search (unowned - union(owned)) up to date between runs, without re-reading
+    every owned parts list each time.
+
+    The state file holds a fingerprint for each owned file, along with their union and the previous result. The
+    (qty, weight) of every part in each owned file is kept in a file of its own, in a directory next to the state file.
+    On each update, only the owned files whose fingerprints have changed are read, and only the difference between
+    their old and new rows gets applied to the stored union. So only the changed files' old rows are ever loaded and
+    rewritten. Likewise, only the parts touched by those changes have their result recomputed, unless the unowned lists
+    themselves have changed.
+
+    Since weights are adjusted rather than summed from scratch, they may drift by floating point rounding error
+    compared to a full rebuild. Quantities are always exact.
+    '''
+
+    STATE_VERSION = 2
+
+    def __init__(self, state_path: Path, storage: StorageMode = StorageMode.DICT, use_content_hash: bool = False):
+        self.state_path = Path(state_path)
+        self.rows_directory = self.state_path.with_name(self.state_path.name + '.rows')
+        self.storage = storage
+        self.use_content_hash = use_content_hash
+
+        ## Stats about the most recent update
+        self.full_rebuild = False
+        self.changed_paths: List[Path] = []
+        self.unchanged_paths: List[Path] = []
+        self.removed_paths: List[str] = []
+        self.updated_part_count = 0
+
+    ## Methods
+
+    @staticmethod
+    def _load_pickle(path: Path):
+        try:
+            with open(path, 'rb') as pickle_file:
+                return pickle.load(pickle_file)
+        except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+            return None
+
+
+    @staticmethod
+    def _save_pickle(path: Path, value):
+        ## Write to a temporary file first, so an interrupted run never leaves a corrupt file behind
+        descriptor, temp_path = tempfile.mkstemp(dir = path.parent, suffix = '.tmp')
+        with os.fdopen(descriptor, 'wb') as temp_file:
+            pickle.dump(value, temp_file, protocol = pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, path)
+
+
+    def _load_state(self) -> dict:
+        state = self._load_pickle(self.state_path)
+
+        return state if isinstance(state, dict) and state.get('version') == self.STATE_VERSION else None
+
+
+    def _get_rows_path(self, key: str) -> Path:
+        return self.rows_directory / (hashlib.sha1(key.encode('utf-8')).hexdigest() + '.pickle')
+
+
+    def _load_rows(self, key: str, fingerprint: str) -> Dict[str, Tuple[int, float]]:
+        ## The rows are saved before the state is, so make sure that they're the ones the state's union was built from
+        rows = self._load_pickle(self._get_rows_path(key))
+        if (not isinstance(rows, tuple) or rows[0] != fingerprint):
+            raise _StaleStateError(key)
+
+        return rows[1]
+
+
+    def _save_rows(self, key: str, fingerprint: str, quantities: Dict[str, Tuple[int, float]]):
+        self._save_pickle(self._get_rows_path(key), (fingerprint, quantities))
+
+
+    @staticmethod
+    def _read_quantities(path: Path) -> Dict[str, Tuple[int, float]]:
+        ## Later rows for the same part replace earlier ones, just like PartsList does
+        return {part_id: (qty, weight) for part_id, qty, weight in PartsStream(path).iter_quantities()}
+
+
+    @staticmethod
+    def _apply_delta(union: Dict[str, list], old: Dict[str, Tuple[int, float]], new: Dict[str, Tuple[int, float]]) -> Set[str]:
+        '''
+        Swaps a file's old quantities out of the union for its new ones, returning the ids of the parts that changed
+        '''
+
+        changed_part_ids = set()
+
+        for part_id, (qty, weight) in old.items():
+            if (new.get(part_id) == (qty, weight)):
+                continue
+
+            entry = union[part_id]
+            entry[0] -= qty
+            entry[1] -= weight
+            entry[2] -= 1
+            if (entry[2] == 0):
+                del union[part_id]
+            changed_part_ids.add(part_id)
+
+        for part_id, (qty, weight) in new.items():
+            if (old.get(part_id) == (qty, weight)):
+                continue
+
+            entry = union.get(part_id)
+            if (entry == None):
+                union[part_id] = [qty, weight, 1]
+            else:
+                entry[0] += qty
+                entry[1] += weight
+                entry[2] += 1
+            changed_part_ids.add(part_id)
+
+        return changed_part_ids
+
+
+    @staticmethod
+    def _compute_result(unowned_parts_list: PartsList, union: Dict[str, list], part_ids, result: Dict[str, Tuple[int, float]]):
+        ## Mirrors Operations.difference for each of the given parts
+        for part_id in part_ids:
+            result.pop(part_id, None)
+            if (part_id not in unowned_parts_list.parts):
+                continue
+
+            part = unowned_parts_list.parts[part_id]
+            owned = union.get(part_id)
+            if (owned == None):
+                result[part_id] = (part.qty, part.weight)
+                continue
+
+            qty = part.qty - owned[0]
+            if (qty > 0):
+                result[part_id] = (qty, part.weight - owned[1])
+
+
+    def update(self, unowned_paths: List[Path], owned_paths: List[Path], unowned_parts_list: PartsList = None) -> PartsList:
+        '''
+        Brings the missing parts result up to date with the given parts lists, and returns it. The unowned lists are
+        needed in full to build the output, so pass their union in as unowned_parts_list if it's already been loaded.
+        '''
+
+        if (unowned_parts_list == None):
+            unowned_parts_list = Operations.union(*[PartsList(path, self.storage) for path in unowned_paths])
+
+        state = self._load_state()
+        if (state != None):
+            try:
+                return self._update(state, unowned_paths, owned_paths, unowned_parts_list)
+            except _StaleStateError:
+                pass
+
+        return self._update(None, unowned_paths, owned_paths, unowned_parts_list)
+
+
+    def _update(self, state: dict, unowned_paths: List[Path], owned_paths: List[Path], unowned_parts_list: PartsList) -> PartsList:
+        self.full_rebuild = state == None
+        if (self.full_rebuild):
+            state = {'version': self.STATE_VERSION, 'unowned': None, 'owned': {}, 'union': {}, 'result': None}
+
+            ## Start the rows over too, rather than leaving behind files that nothing refers to anymore
+            for rows_path in self.rows_directory.glob('*.pickle'):
+                rows_path.unlink()
+
+        self.rows_directory.mkdir(parents = True, exist_ok = True)
+
+        unowned_fingerprints = [build_fingerprint(path, self.use_content_hash) for path in unowned_paths]
+
+        ## Apply the changes from any added, modified, or removed owned files to the union
+        union: Dict[str, list] = state['union']
+        owned: Dict[str, str] = state['owned']
+        changed_part_ids: Set[str] = set()
+        current_paths = set()
+        self.changed_paths = []
+        self.unchanged_paths = []
+
+        for path in owned_paths:
+            key = str(Path(path).resolve())
+            current_paths.add(key)
+            fingerprint = build_fingerprint(path, self.use_content_hash)
+
+            previous_fingerprint = owned.get(key)
+            if (previous_fingerprint == fingerprint):
+                self.unchanged_paths.append(path)
+                continue
+
+            previous_quantities = self._load_rows(key, previous_fingerprint) if previous_fingerprint != None else {}
+            quantities = self._read_quantities(path)
+            changed_part_ids |= self._apply_delta(union, previous_quantities, quantities)
+            self._save_rows(key, fingerprint, quantities)
+            owned[key] = fingerprint
+            self.changed_paths.append(path)
+
+        self.removed_paths = [key for key in owned if key not in current_paths]
+        for key in self.removed_paths:
+            changed_part_ids |= self._apply_delta(union, self._load_rows(key, owned.pop(key)), {})
+            self._get_rows_path(key).unlink()
+
+        ## Recompute the result, either entirely or just for the parts that changed
+        result = state['result']
+        if (result == None or state['unowned'] != unowned_fingerprints):
+            result = {}
+            self.updated_part_count = len(unowned_parts_list.parts)
+            self._compute_result(unowned_parts_list, union, list(unowned_parts_list.parts.keys()), result)
+        else:
+            self.updated_part_count = len(changed_part_ids)
+            self._compute_result(unowned_parts_list, union, changed_part_ids, result)
+
+        state['unowned'] = unowned_fingerprints
+        state['result'] = result
+        self._save_pickle(self.state_path, state)
+
+        ## Build the output, keeping the unowned list's ordering
+        missing_parts_list = unowned_parts_list.clone_empty()
+        for part_id in unowned_parts_list.parts:
+            quantities = result.get(part_id)
+            if (quantities == None):
+                continue
+
+            part = unowned_parts_list.detach_part(part_id)
+            part.qty, part.weight = quantities
+            missing_parts_list.parts[part_id] = part
+
+        return missing_parts_list
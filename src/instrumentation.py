@@ -0,0 +1,209 @@
+import contextlib
+import functools
+import json
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Iterator, List
+
+## resource is only available on Unix-like systems, so peak memory usage just goes unreported elsewhere
+try:
+    import resource
+except ImportError:
+    resource = None
+
+## Lightweight instrumentation for PartsList and the Operations. Every instrumented stage (importing, each of the
+## Operations, set_any_color, exporting, etc) is timed and handed to any subscribed callbacks once it finishes. When
+## nothing is subscribed, stages aren't even timed.
+
+_subscribers: List[Callable[["Stage"], None]] = []
+_local = threading.local()
+
+
+class Stage:
+    '''
+    A single timed stage, along with whatever it processed. Stages can be nested (ex: the imports inside of a load),
+    in which case depth is how many stages deep this one is.
+    '''
+
+    def __init__(self, name: str, depth: int = 0):
+        self.name = name
+        self.depth = depth
+        self.wall_seconds = 0.0
+        self.cpu_seconds = 0.0
+        self.peak_rss_bytes: int = None
+        self.rows = 0 # rows parsed from files
+        self.parts: int = None # parts in the resulting PartsList
+
+    ## Methods
+
+    def to_dict(self) -> dict:
+        return {
+            'name': self.name,
+            'depth': self.depth,
+            'wall_seconds': self.wall_seconds,
+            'cpu_seconds': self.cpu_seconds,
+            'peak_rss_bytes': self.peak_rss_bytes,
+            'rows': self.rows,
+            'parts': self.parts
+        }
+
+
+def subscribe(callback: Callable[[Stage], None]):
+    '''
+    Calls the given callback with every Stage as it finishes
+    '''
+
+    _subscribers.append(callback)
+
+
+def unsubscribe(callback: Callable[[Stage], None]):
+    _subscribers.remove(callback)
+
+
+def _get_peak_rss_bytes() -> int:
+    if (resource == None):
+        return None
+
+    ## Linux reports this in kilobytes, and macOS in bytes
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak_rss if sys.platform == 'darwin' else peak_rss * 1024
+
+
+def _get_stack() -> List[Stage]:
+    stack = getattr(_local, 'stack', None)
+    if (stack == None):
+        stack = _local.stack = []
+
+    return stack
+
+
+@contextlib.contextmanager
+def stage(name: str) -> Iterator[Stage]:
+    '''
+    Times everything inside of the with block as a Stage with the given name, which is yielded so that its counts can
+    be filled in. Yields None when nothing is subscribed.
+    '''
+
+    if (len(_subscribers) == 0):
+        yield None
+        return
+
+    stack = _get_stack()
+    current_stage = Stage(name, len(stack))
+    stack.append(current_stage)
+
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    try:
+        yield current_stage
+    finally:
+        current_stage.wall_seconds = time.perf_counter() - wall_start
+        current_stage.cpu_seconds = time.process_time() - cpu_start
+        current_stage.peak_rss_bytes = _get_peak_rss_bytes()
+        stack.pop()
+
+        ## Rows parsed by nested stages count towards their parents too
+        if (len(stack) > 0):
+            stack[-1].rows += current_stage.rows
+
+        for callback in list(_subscribers):
+            callback(current_stage)
+
+
+def add_rows(count: int):
+    '''
+    Counts rows parsed towards the innermost running stage, if there is one
+    '''
+
+    stack = getattr(_local, 'stack', None)
+    if (stack):
+        stack[-1].rows += count
+
+
+def timed(name: str):
+    '''
+    Decorates a function so that each call to it is timed as a Stage. The parts count comes from the returned PartsList
+    if there is one, otherwise from the PartsList that the method was called on.
+    '''
+
+    def _decorator(function: Callable) -> Callable:
+        @functools.wraps(function)
+        def _wrapper(*args, **kwargs):
+            if (len(_subscribers) == 0):
+                return function(*args, **kwargs)
+
+            with stage(name) as current_stage:
+                result = function(*args, **kwargs)
+
+                parts_list = result if hasattr(result, 'parts') else (args[0] if len(args) > 0 and hasattr(args[0], 'parts') else None)
+                if (parts_list is not None):
+                    current_stage.parts = len(parts_list.parts)
+
+            return result
+
+        return _wrapper
+
+    return _decorator
+
+
+class TimingsRecorder:
+    '''
+    Collects every Stage that finishes while it's subscribed, and reports on them as a table or as JSON
+    '''
+
+    def __init__(self):
+        self.stages: List[Stage] = []
+
+    ## Magic Methods
+
+    def __enter__(self) -> "TimingsRecorder":
+        subscribe(self.record)
+        return self
+
+
+    def __exit__(self, *args):
+        unsubscribe(self.record)
+
+    ## Methods
+
+    def record(self, finished_stage: Stage):
+        self.stages.append(finished_stage)
+
+
+    def format_table(self) -> str:
+        ## Stages finish from the inside out, so order them by when they started to show the nesting properly
+        lines = ['{:<32} {:>10} {:>10} {:>10} {:>10} {:>12}'.format('Stage', 'Wall (s)', 'CPU (s)', 'Rows', 'Parts', 'Peak RSS (MB)')]
+        for finished_stage in self._in_start_order():
+            lines.append('{:<32} {:>10.4f} {:>10.4f} {:>10} {:>10} {:>12}'.format(
+                ('  ' * finished_stage.depth + finished_stage.name)[:32],
+                finished_stage.wall_seconds,
+                finished_stage.cpu_seconds,
+                finished_stage.rows,
+                finished_stage.parts if finished_stage.parts != None else '-',
+                '{:.1f}'.format(finished_stage.peak_rss_bytes / (1024 * 1024)) if finished_stage.peak_rss_bytes != None else '-'
+            ))
+
+        return '\n'.join(lines)
+
+
+    def _in_start_order(self) -> List[Stage]:
+        ## A stage finishes after everything nested inside of it, so move each one ahead of its deeper predecessors
+        ordered: List[Stage] = []
+        for finished_stage in self.stages:
+            index = len(ordered)
+            while (index > 0 and ordered[index - 1].depth > finished_stage.depth):
+                index -= 1
+            ordered.insert(index, finished_stage)
+
+        return ordered
+
+
+    def to_json(self) -> str:
+        return json.dumps([finished_stage.to_dict() for finished_stage in self._in_start_order()], indent = 4)
+
+
+    def write_json(self, target: Path):
+        with open(target, 'w') as json_file:
+            json_file.write(self.to_json())
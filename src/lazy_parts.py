@@ -0,0 +1,132 @@
+import csv
+import re
+from array import array
+from collections.abc import MutableMapping
+from operator import methodcaller
+from typing import Dict, Iterator, List, Tuple, Union
+
+import fast_csv
+from part import Part
+
+## Pulls out the only fields that the Operations care about: BLItemNo (the first field), and ColorName, Qty, and Weight
+## (the fourth, second, and last from the end). Nothing but the PartName can contain commas, so whatever's in between
+## doesn't matter.
+KEY_FIELDS_PATTERN = re.compile(r'^([^,"\n]+),[^\n]*,([^,"\n]*),[^,"\n]*,([^,"\n]*),([^,"\n]*)$', re.MULTILINE)
+
+
+class LazyParts(MutableMapping):
+    '''
+    A drop-in replacement for the PartsList.parts dict (part id -> Part), that only parses the fields needed to index
+    and combine parts (BLItemNo, ColorName, Qty, and Weight) up front. Every row's raw text is kept as is, and the rest
+    of its fields are only decoded if its Part is actually accessed, for example when exporting.
+
+    Like ColumnarParts, Parts handed out by this mapping are effectively snapshots. Changes made to them need to be
+    written back via assignment (ex: parts[part_id] = part), at which point that Part replaces the row's raw text.
+    '''
+
+    def __init__(self):
+        self._lines: List[str] = []
+        self.qty = array('q')
+        self.weight = array('d')
+        self._index: Dict[str, Union[int, Part]] = {} # part id -> raw row, or its replacement Part
+
+    ## Magic Methods
+
+    def __getitem__(self, part_id: str) -> Part:
+        entry = self._index[part_id]
+        if (isinstance(entry, Part)):
+            return entry.clone()
+
+        return self.decode_row(entry)
+
+
+    def __setitem__(self, part_id: str, part: Part):
+        self._index[part_id] = part
+
+
+    def __delitem__(self, part_id: str):
+        del self._index[part_id]
+
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._index)
+
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+
+    def __contains__(self, part_id: str) -> bool:
+        return part_id in self._index
+
+    ## Properties
+
+    @property
+    def replaced_count(self) -> int:
+        ## The number of parts that have been replaced, and so no longer refer to their raw text
+        return sum(1 for entry in self._index.values() if isinstance(entry, Part))
+
+    ## Methods
+
+    @staticmethod
+    def from_text(text: str) -> Tuple[List[str], "LazyParts"]:
+        '''
+        Indexes the text of a Bricklink parts list export, only decoding each row's key fields.
+
+        Returns:
+        Tuple[List[str], LazyParts]: The header and the indexed parts, or None if the text has anything unexpected in
+            it, in which case it should be imported normally instead.
+        '''
+
+        header, lines = fast_csv.split_lines(text)
+        if (header == None):
+            return None
+
+        ## Every row needs to have all of its fields (which also rules out blank lines, and fields with line breaks in
+        ## them). Quoted names can have extra commas in them, but nothing else can.
+        comma_count = fast_csv.FIELD_COUNT - 1
+        unquoted_lines = [line for line in lines if '"' not in line] if any('"' in line for line in lines) else lines
+        if (len(lines) > 0 and (min(map(methodcaller('count', ','), lines)) < comma_count or set(map(methodcaller('count', ','), unquoted_lines)) - {comma_count})):
+            return None
+
+        key_fields = KEY_FIELDS_PATTERN.findall('\n'.join(lines))
+        if (len(key_fields) != len(lines)):
+            return None
+
+        lazy_parts = LazyParts()
+        lazy_parts._lines = lines
+        try:
+            bl_item_nos, color_names, qty, weight = zip(*key_fields) if len(key_fields) > 0 else ((), (), (), ())
+            lazy_parts.qty = array('q', map(int, qty))
+            lazy_parts.weight = array('d', map(float, weight))
+        except ValueError:
+            return None
+
+        ## Later rows for the same part replace earlier ones, while keeping the earlier one's position like a dict would
+        lazy_parts._index = dict(zip(map(Part.build_id, bl_item_nos, color_names), range(len(lines))))
+
+        return header, lazy_parts
+
+
+    def decode_row(self, row: int) -> Part:
+        ## from_text() rejects fields with line breaks in them, so each row can be parsed on its own
+        return Part(next(csv.reader([self._lines[row]])))
+
+
+    def get_qty(self, part_id: str) -> int:
+        entry = self._index[part_id]
+        return entry.qty if isinstance(entry, Part) else self.qty[entry]
+
+
+    def iter_quantities(self) -> Iterator[Tuple[str, int, float]]:
+        '''
+        Yields (part id, qty, weight) for every part, without decoding any rows
+        '''
+
+        qty = self.qty
+        weight = self.weight
+        for part_id, entry in self._index.items():
+            if (isinstance(entry, Part)):
+                yield part_id, entry.qty, entry.weight
+            else:
+                yield part_id, qty[entry], weight[entry]
@@ -0,0 +1,80 @@
+import heapq
+from itertools import groupby
+from typing import Iterator, List
+
+from part import Part
+from parts_stream import PartRecord, PartsStream
+
+## Streaming merge-join implementations of the Operations, for PartsStreams that are sorted by part. Each one walks its
+## inputs in lockstep and yields the resulting Parts in sorted order, so only a single record per input is ever held in
+## memory at once.
+
+def _sort_key(record: PartRecord):
+    return record.sort_key
+
+
+def _build_part(record: PartRecord, qty: int, weight: float) -> Part:
+    part = Part(record.row)
+    part.qty = qty
+    part.weight = weight
+
+    return part
+
+
+def can_merge_join(*parts_lists) -> bool:
+    return len(parts_lists) > 0 and all(isinstance(parts_list, PartsStream) and parts_list.is_sorted for parts_list in parts_lists)
+
+
+def union(*parts_streams: List[PartsStream]) -> Iterator[Part]:
+    merged = heapq.merge(*[parts_stream.iter_sorted_records() for parts_stream in parts_streams], key = _sort_key)
+
+    for _, records in groupby(merged, key = _sort_key):
+        ## heapq.merge is stable, so the first record comes from the earliest stream that has the part
+        first_record = next(records)
+        qty = first_record.qty
+        weight = first_record.weight
+        for record in records:
+            qty += record.qty
+            weight += record.weight
+
+        yield _build_part(first_record, qty, weight)
+
+
+def difference(parts_stream_a: PartsStream, parts_stream_b: PartsStream) -> Iterator[Part]:
+    subtrahends = parts_stream_b.iter_sorted_records()
+    subtrahend: PartRecord = next(subtrahends, None)
+
+    for record in parts_stream_a.iter_sorted_records():
+        while (subtrahend != None and subtrahend.sort_key < record.sort_key):
+            subtrahend = next(subtrahends, None)
+
+        if (subtrahend == None or subtrahend.sort_key != record.sort_key):
+            yield _build_part(record, record.qty, record.weight)
+            continue
+
+        ## Don't worry about tracking parts with quantity 0
+        qty = record.qty - subtrahend.qty
+        if (qty > 0):
+            yield _build_part(record, qty, record.weight - subtrahend.weight)
+
+
+def intersection(*parts_streams: List[PartsStream]) -> Iterator[Part]:
+    iterators = [parts_stream.iter_sorted_records() for parts_stream in parts_streams]
+    heads: List[PartRecord] = [next(iterator, None) for iterator in iterators]
+
+    while (all(head != None for head in heads)):
+        ## Catch every stream up to the furthest along one, and only emit a part once they've all landed on it
+        target_key = max(head.sort_key for head in heads)
+        for index, iterator in enumerate(iterators):
+            while (heads[index] != None and heads[index].sort_key < target_key):
+                heads[index] = next(iterator, None)
+
+        if (any(head == None for head in heads)):
+            return
+
+        if (all(head.sort_key == target_key for head in heads)):
+            ## Keep the smallest quantity, preferring the earliest stream on ties
+            smallest = min(heads, key = lambda head: head.qty)
+            yield _build_part(smallest, smallest.qty, smallest.weight)
+
+            heads = [next(iterator, None) for iterator in iterators]
@@ -1,12 +1,44 @@
-from typing import List
-
+from array import array
+from typing import Dict, Iterator, List, Set, Union
+
+import instrumentation
+import merge_join
+import sqlite_store
+from columnar_parts import ColumnarParts
+from enums import Engine, StorageMode
 from part import Part
 from parts_list import PartsList
+from parts_stream import PartsStream
+from parts_summary import PartsSummary
 
 class Operations:
+    ## The engine used when one isn't explicitly passed into an operation. The loop engine is the original part-by-part
+    ## implementation, and is measurably faster for operations on a handful of lists. The batched engine only pulls
+    ## ahead when unioning on the order of a hundred lists or more (see benchmarks/union_benchmark.py).
+    engine: Engine = Engine.LOOP
+
+    @staticmethod
+    def _resolve_engine(engine: Engine) -> Engine:
+        return engine if engine != None else Operations.engine
+
+
+    @staticmethod
+    def _is_columnar(*parts_lists: List[Union[PartsList, PartsStream]]) -> bool:
+        return all(isinstance(parts_list, PartsList) and isinstance(parts_list.parts, ColumnarParts) for parts_list in parts_lists)
+
+
+    @staticmethod
+    def _collect_merge_join(parts: Iterator[Part], parts_stream: PartsStream) -> PartsList:
+        ## The stream's header is only known once it's started being read, so collect the parts first
+        parts_list = PartsList.from_parts(parts)
+        parts_list._header = parts_stream._header
+
+        return parts_list
+
 
     @staticmethod
-    def difference(parts_list_a: PartsList, parts_list_b: PartsList) -> PartsList:
+    @instrumentation.timed('difference')
+    def difference(parts_list_a: PartsList, parts_list_b: Union[PartsList, PartsStream], engine: Engine = None) -> PartsList:
         '''
         Performs the difference operation, subtracting the Parts in parts_list_b from parts_list_a, and returning the
         result.
@@ -19,19 +51,26 @@ class Operations:
         in a new PartsList containing two red 2x4 bricks.
 
         Parameters:
-        parts_list_a (PartsList): The PartsList to subtract from (ex: A in A - B)
-        parts_list_b (PartsList): The PartsList to subtract with (ex: B in A - B)
+        parts_list_a (PartsList): The PartsList to subtract from (ex: A in A - B). This can only be a PartsStream
+            if parts_list_b is one too, and both of them are sorted
+        parts_list_b (PartsList): The PartsList to subtract with (ex: B in A - B). This can also be a PartsStream, in
+            which case it's read incrementally and memory use is bounded by the size of parts_list_a
+        engine (Engine): The Engine to perform the operation with, defaults to Operations.engine
 
         Returns:
         PartsList: A newly created PartsList instance with all of the Parts from parts_list_a that don't exist inside
             parts_list_b
         '''
 
+        ## Sorted streams can be merge-joined without loading either of them
+        if (merge_join.can_merge_join(parts_list_a, parts_list_b)):
+            return Operations._collect_merge_join(merge_join.difference(parts_list_a, parts_list_b), parts_list_a)
+
         ## Ensure the parameters are valid, and provide a sensible RuntimeError if not
         invalid_params = []
         if (parts_list_a == None or not isinstance(parts_list_a, PartsList)):
             invalid_params.append('parts_list_a')
-        if (parts_list_b == None or not isinstance(parts_list_b, PartsList)):
+        if (parts_list_b == None or not isinstance(parts_list_b, (PartsList, PartsStream))):
             invalid_params.append('parts_list_b')
 
         if (len(invalid_params) > 0):
@@ -39,7 +78,28 @@ class Operations:
             text.format('s' if len(invalid_params) != 1 else '', '\', \''.join(invalid_params))
             raise RuntimeError(text)
 
-        ## Perform the difference operation
+        ## Lists kept in the same database are subtracted there, by whichever engine
+        if (sqlite_store.can_run_in_sql(parts_list_a, parts_list_b)):
+            return Operations._difference_sql(parts_list_a, parts_list_b)
+
+        ## Perform the difference operation (streams are only supported by the batched engine, and columnar lists are
+        ## always built column by column, by whichever engine)
+        if (Operations._resolve_engine(engine) == Engine.LOOP and isinstance(parts_list_b, PartsList) and not Operations._is_columnar(parts_list_a)):
+            return Operations._difference_loop(parts_list_a, parts_list_b)
+
+        return Operations._difference_batched(parts_list_a, parts_list_b)
+
+
+    @staticmethod
+    def _difference_sql(parts_list_a: PartsList, *parts_lists_b: List[PartsList]) -> PartsList:
+        difference = parts_list_a.clone_empty()
+        difference.parts.store.difference(difference.parts, parts_list_a.parts, [parts_list_b.parts for parts_list_b in parts_lists_b])
+
+        return difference
+
+
+    @staticmethod
+    def _difference_loop(parts_list_a: PartsList, parts_list_b: PartsList) -> PartsList:
         difference = parts_list_a.clone()
 
         part: Part
@@ -56,7 +116,101 @@ class Operations:
 
 
     @staticmethod
-    def union(*parts_lists: List[PartsList]) -> PartsList:
+    @instrumentation.timed('difference_all')
+    def difference_all(parts_list_a: PartsList, *parts_lists_b: List[Union[PartsList, PartsStream]], engine: Engine = None) -> PartsList:
+        '''
+        Subtracts every one of parts_lists_b from parts_list_a, which is equivalent to subtracting their union.
+
+        parts_list_a - (parts_lists_b[i] ∪ parts_lists_b[i + 1] ∪ ... ∪ parts_lists_b[n])
+
+        The batched engine does this in a single pass over each list, without ever building their union.
+
+        Parameters:
+        parts_list_a (PartsList): The PartsList to subtract from
+        parts_lists_b (PartsList): Zero or more PartsLists (or PartsStreams) to subtract with
+        engine (Engine): The Engine to perform the operation with, defaults to Operations.engine
+
+        Returns:
+        PartsList: A newly created PartsList instance with all of the Parts from parts_list_a that don't exist inside
+            any of parts_lists_b (or parts_list_a itself, if there's nothing to subtract)
+        '''
+
+        if (len(parts_lists_b) == 0):
+            return parts_list_a
+        elif (sqlite_store.can_run_in_sql(parts_list_a, *parts_lists_b)):
+            return Operations._difference_sql(parts_list_a, *parts_lists_b)
+        elif (len(parts_lists_b) == 1):
+            return Operations.difference(parts_list_a, parts_lists_b[0], engine)
+
+        ## Streams are only supported by the batched engine, and shouldn't be unioned into memory just for the loop. Nor
+        ## should the subtrahends of a columnar list, since it's always built column by column.
+        has_streams = any(isinstance(parts_list_b, PartsStream) for parts_list_b in parts_lists_b)
+        if (Operations._resolve_engine(engine) == Engine.LOOP and not has_streams and not Operations._is_columnar(parts_list_a)):
+            return Operations.difference(parts_list_a, Operations.union(*parts_lists_b, engine = engine), engine)
+
+        return Operations._difference_batched(parts_list_a, *parts_lists_b)
+
+
+    @staticmethod
+    def _difference_batched(parts_list_a: PartsList, *parts_lists_b: List[Union[PartsList, PartsStream]]) -> PartsList:
+        ## Join the subtrahends' quantities onto parts_list_a's by key, and only build Parts for whatever survives. Keys
+        ## that parts_list_a doesn't have are irrelevant, so they're never kept around.
+        minuend_parts = parts_list_a.parts
+        subtrahends = {}
+        for parts_list_b in parts_lists_b:
+            list_subtrahends = {}
+            for part_id, qty, weight in parts_list_b.iter_quantities():
+                if (part_id in minuend_parts):
+                    list_subtrahends[part_id] = (qty, weight)
+
+            ## Subtracting several lists is the same as subtracting their union, so their quantities are summed up
+            if (len(subtrahends) == 0):
+                subtrahends = list_subtrahends
+                continue
+
+            for part_id, (qty, weight) in list_subtrahends.items():
+                subtrahend = subtrahends.get(part_id)
+                subtrahends[part_id] = (subtrahend[0] + qty, subtrahend[1] + weight) if subtrahend != None else (qty, weight)
+
+        part_ids: List[str] = []
+        quantities: List[int] = []
+        weights: List[float] = []
+        for part_id, qty, weight in parts_list_a.iter_quantities():
+            subtrahend = subtrahends.get(part_id)
+            if (subtrahend != None):
+                qty -= subtrahend[0]
+                weight -= subtrahend[1]
+
+                ## Don't worry about tracking parts with quantity 0
+                if (qty <= 0):
+                    continue
+
+            part_ids.append(part_id)
+            quantities.append(qty)
+            weights.append(weight)
+
+        difference = parts_list_a.clone_empty()
+
+        ## Columnar lists just copy the surviving rows' columns, rather than going through a Part for each of them
+        if (Operations._is_columnar(parts_list_a)):
+            rows = list(map(minuend_parts.row_of, part_ids))
+            difference.parts = ColumnarParts.gather([minuend_parts], None, rows, part_ids, array('q', quantities), array('d', weights))
+        else:
+            for part_id, qty, weight in zip(part_ids, quantities, weights):
+                part = parts_list_a.detach_part(part_id)
+                part.qty = qty
+                part.weight = weight
+                difference.parts[part_id] = part
+
+        ## Every part's totals are already known, so the summary comes for free
+        difference._summary = PartsSummary(len(part_ids), sum(quantities), sum(weights))
+
+        return difference
+
+
+    @staticmethod
+    @instrumentation.timed('union')
+    def union(*parts_lists: List[Union[PartsList, PartsStream]], engine: Engine = None) -> PartsList:
         '''
         Performs the union operation upon all of the provided PartsLists.
 
@@ -68,7 +222,10 @@ class Operations:
         traditional method isn't super useful within this context (and not obvious what the result should be).
 
         Parameters:
-        parts_lists (PartsList): One more more PartList instances to be unioned together
+        parts_lists (PartsList): One more more PartList instances to be unioned together. PartsStreams are also
+            accepted, and are read incrementally so only one row from each is held in memory at a time. If every input
+            is a sorted PartsStream, they're merge-joined instead and the result is sorted by part
+        engine (Engine): The Engine to perform the operation with, defaults to Operations.engine
 
         Returns:
         PartsList: A newly created PartsList instance with all of the input PartsLists' parts added to it
@@ -76,10 +233,39 @@ class Operations:
 
         if len(parts_lists) == 0:
             raise RuntimeError('Unable to union zero parts lists together!')
-        elif len(parts_lists) == 1:
+        elif len(parts_lists) == 1 and isinstance(parts_lists[0], PartsList):
             return parts_lists[0]
 
-        union = PartsList()
+        if (merge_join.can_merge_join(*parts_lists)):
+            return Operations._collect_merge_join(merge_join.union(*parts_lists), parts_lists[0])
+
+        ## Lists kept in the same database are unioned there, by whichever engine
+        if (sqlite_store.can_run_in_sql(*parts_lists)):
+            return Operations._union_sql(*parts_lists)
+
+        ## Columnar lists are unioned column by column, by whichever engine
+        if (Operations._is_columnar(*parts_lists)):
+            return Operations._union_columnar(*parts_lists)
+
+        ## Streams are only supported by the batched engine
+        has_streams = any(isinstance(parts_list, PartsStream) for parts_list in parts_lists)
+        if (Operations._resolve_engine(engine) == Engine.LOOP and not has_streams):
+            return Operations._union_loop(*parts_lists)
+
+        return Operations._union_batched(*parts_lists)
+
+
+    @staticmethod
+    def _union_sql(*parts_lists: List[PartsList]) -> PartsList:
+        union = parts_lists[0].clone_empty()
+        union.parts.store.union(union.parts, [parts_list.parts for parts_list in parts_lists])
+
+        return union
+
+
+    @staticmethod
+    def _union_loop(*parts_lists: List[PartsList]) -> PartsList:
+        union = PartsList(storage = parts_lists[0].storage)
 
         parts_list: PartsList
         for parts_list in parts_lists:
@@ -96,7 +282,114 @@ class Operations:
 
 
     @staticmethod
-    def intersection(*parts_lists: List[PartsList]) -> PartsList:
+    def _union_batched(*parts_lists: List[Union[PartsList, PartsStream]]) -> PartsList:
+        ## Sum up the quantities and weights for each key across every list in a single pass, and then only build one Part
+        ## per key at the very end. Nothing is allocated per occurrence, no matter how many lists a key shows up in.
+        quantities: Dict[str, int] = {}
+        weights: Dict[str, float] = {}
+        sources: Dict[str, Union[PartsList, Part]] = {} # part id -> first PartsList containing it (or Part, for streams)
+        merged: Set[str] = set() # part ids that showed up more than once
+
+        for parts_list in parts_lists:
+            ## Streams don't keep their parts around, so hang on to a Part built from the first row seen for each key
+            if (isinstance(parts_list, PartsStream)):
+                for part_id, qty, weight, row in parts_list.iter_records():
+                    if (part_id in quantities):
+                        quantities[part_id] += qty
+                        weights[part_id] += weight
+                        merged.add(part_id)
+                    else:
+                        quantities[part_id] = qty
+                        weights[part_id] = weight
+                        sources[part_id] = Part(row)
+
+                continue
+
+            ## Plain dicts are common enough to be worth reading directly, rather than through iter_quantities()
+            if (type(parts_list.parts) is dict):
+                part: Part
+                for part_id, part in parts_list.parts.items():
+                    if (part_id in quantities):
+                        quantities[part_id] += part.qty
+                        weights[part_id] += part.weight
+                        merged.add(part_id)
+                    else:
+                        quantities[part_id] = part.qty
+                        weights[part_id] = part.weight
+                        sources[part_id] = parts_list
+
+                continue
+
+            for part_id, qty, weight in parts_list.iter_quantities():
+                if (part_id in quantities):
+                    quantities[part_id] += qty
+                    weights[part_id] += weight
+                    merged.add(part_id)
+                else:
+                    quantities[part_id] = qty
+                    weights[part_id] = weight
+                    sources[part_id] = parts_list
+
+        storage = next((parts_list.storage for parts_list in parts_lists if isinstance(parts_list, PartsList)), StorageMode.DICT)
+        union = PartsList(storage = storage)
+        union_parts = union.parts
+        for part_id, source in sources.items():
+            if (isinstance(source, Part)):
+                part = source
+            elif (part_id not in merged):
+                ## Parts that only showed up once are shared as-is, just like the loop engine does
+                union_parts[part_id] = source.parts[part_id]
+                continue
+            else:
+                part = source.detach_part(part_id)
+
+            part.qty = quantities[part_id]
+            part.weight = weights[part_id]
+            union_parts[part_id] = part
+
+        ## Every key's totals have already been summed up, so the summary comes for free
+        union._summary = PartsSummary(len(quantities), sum(quantities.values()), sum(weights.values()))
+
+        return union
+
+
+    @staticmethod
+    def _union_columnar(*parts_lists: List[PartsList]) -> PartsList:
+        ## Sum up each key's quantity and weight into the position of its first row, and then copy those rows' columns
+        ## over in one go. Like the other engines, each part's other fields come from the first list that it's in.
+        sources: List[ColumnarParts] = [parts_list.parts for parts_list in parts_lists]
+        positions: Dict[str, int] = {} # part id -> position in the union
+        source_indices: List[int] = []
+        rows: List[int] = []
+        quantities: List[int] = []
+        weights: List[float] = []
+
+        for index, parts in enumerate(sources):
+            qty = parts.qty
+            weight = parts.weight
+            for part_id, row in parts.iter_rows():
+                position = positions.get(part_id)
+                if (position != None):
+                    quantities[position] += qty[row]
+                    weights[position] += weight[row]
+                    continue
+
+                positions[part_id] = len(rows)
+                source_indices.append(index)
+                rows.append(row)
+                quantities.append(qty[row])
+                weights.append(weight[row])
+
+        union = PartsList(storage = parts_lists[0].storage)
+        union.parts = ColumnarParts.gather(sources, source_indices, rows, list(positions), array('q', quantities), array('d', weights))
+        union._summary = PartsSummary(len(rows), sum(quantities), sum(weights))
+
+        return union
+
+
+    @staticmethod
+    @instrumentation.timed('intersection')
+    def intersection(*parts_lists: List[PartsList], engine: Engine = None) -> PartsList:
         '''
         Performs the intersection operation, finding the common parts between all of the provided PartsLists.
 
@@ -109,8 +402,13 @@ class Operations:
         say that there's another PartsList containing four red 1x3 bricks, and one blue 1x1 brick. After the
         intersection operation has completed, the result would be a new PartsList containing a single blue 1x1 brick.
 
+        The inputs are intersected smallest first, and parts are dropped as soon as any input lacks them, so the work
+        done is bounded by the smallest PartsList (ex: checking a small wishlist against a huge store inventory).
+
         Parameters:
-        parts_lists (PartsList): One more more PartList instances to be intersected together
+        parts_lists (PartsList): One more more PartList instances to be intersected together. Sorted PartsStreams are
+            also accepted, as long as every input is one
+        engine (Engine): The Engine to perform the operation with, defaults to Operations.engine
 
         Returns:
         PartsList: A newly created PartsList instance containing the intersection of all the provided PartsLists
@@ -118,17 +416,114 @@ class Operations:
 
         if len(parts_lists) == 0:
             raise RuntimeError('Unable to intersect zero parts lists together!')
-        elif len(parts_lists) == 1:
+
+        ## Merge-joins only ever produce parts that are common to every stream, but nothing else can intersect streams
+        if (merge_join.can_merge_join(*parts_lists)):
+            return Operations._collect_merge_join(merge_join.intersection(*parts_lists), parts_lists[0])
+        elif (any(isinstance(parts_list, PartsStream) for parts_list in parts_lists)):
+            raise RuntimeError('Unable to intersect PartsStreams, unless every input is a sorted PartsStream.')
+
+        if len(parts_lists) == 1:
             return parts_lists[0]
 
-        intersection: PartsList = parts_lists[0].clone()
+        ## Lists kept in the same database are intersected there, by whichever engine
+        if (sqlite_store.can_run_in_sql(*parts_lists)):
+            return Operations._intersection_sql(*parts_lists)
+
+        ## Columnar lists are always built column by column, by whichever engine
+        if (Operations._resolve_engine(engine) == Engine.LOOP and not Operations._is_columnar(*parts_lists)):
+            return Operations._intersection_loop(*parts_lists)
+
+        return Operations._intersection_batched(*parts_lists)
+
+
+    @staticmethod
+    def _intersection_sql(*parts_lists: List[PartsList]) -> PartsList:
+        intersection = parts_lists[0].clone_empty()
+        intersection.parts.store.intersection(intersection.parts, [parts_list.parts for parts_list in parts_lists])
+
+        return intersection
+
+
+    @staticmethod
+    def _order_by_size(parts_lists: List[PartsList]) -> List[PartsList]:
+        ## Smallest first, since an intersection can never have more parts than its smallest input
+        return sorted(parts_lists, key = lambda parts_list: len(parts_list.parts))
+
+
+    @staticmethod
+    def _intersection_loop(*parts_lists: List[PartsList]) -> PartsList:
+        ordered_parts_lists = Operations._order_by_size(parts_lists)
+        intersection: PartsList = parts_lists[0].clone_empty()
+        for part_id, part in ordered_parts_lists[0].parts.items():
+            intersection.parts[part_id] = part
 
         parts_list: PartsList
-        for parts_list in parts_lists[1:]:
-            part: Part
-            for part_id, part in parts_list.parts.items():
-                if part_id in intersection.parts:
-                    if intersection.parts[part_id].qty > part.qty:
-                        intersection.parts[part_id] = part
+        for parts_list in ordered_parts_lists[1:]:
+            if (len(intersection.parts) == 0):
+                break
+
+            for part_id in list(intersection.parts.keys()):
+                part = parts_list.parts.get(part_id)
+                if part is None:
+                    del intersection.parts[part_id]
+                elif intersection.parts[part_id].qty > part.qty:
+                    intersection.parts[part_id] = part
+
+        return intersection
+
+
+    @staticmethod
+    def _intersection_batched(*parts_lists: List[PartsList]) -> PartsList:
+        ## Only the smallest list's keys can possibly be in the result, so start from those and probe the larger lists
+        ## for each of them. Keys are dropped as soon as a list doesn't have them, so the work done is bounded by the
+        ## smallest list, no matter how big the others are.
+        ordered_parts_lists = Operations._order_by_size(parts_lists)
+        minimums: Dict[str, list] = {part_id: [qty, ordered_parts_lists[0]] for part_id, qty, _ in ordered_parts_lists[0].iter_quantities()}
+
+        parts_list: PartsList
+        for parts_list in ordered_parts_lists[1:]:
+            if (len(minimums) == 0):
+                break
+
+            parts = parts_list.parts
+            survivors: Dict[str, list] = {}
+            for part_id, minimum in minimums.items():
+                if (part_id not in parts):
+                    continue
+
+                qty = parts_list.get_qty(part_id)
+                if (minimum[0] > qty):
+                    minimum[0] = qty
+                    minimum[1] = parts_list
+                survivors[part_id] = minimum
+
+            minimums = survivors
+
+        intersection = parts_lists[0].clone_empty()
+
+        ## Columnar lists just copy each part's row from the list it's smallest in, rather than going through a Part
+        if (Operations._is_columnar(*parts_lists)):
+            sources: List[ColumnarParts] = [parts_list.parts for parts_list in parts_lists]
+            source_positions = {id(parts_list): index for index, parts_list in enumerate(parts_lists)}
+            source_indices = [source_positions[id(source)] for _, source in minimums.values()]
+            rows = [sources[index].row_of(part_id) for part_id, index in zip(minimums, source_indices)]
+            quantities = array('q', (sources[index].qty[row] for index, row in zip(source_indices, rows)))
+            weights = array('d', (sources[index].weight[row] for index, row in zip(source_indices, rows)))
+
+            intersection.parts = ColumnarParts.gather(sources, source_indices, rows, list(minimums), quantities, weights)
+            intersection._summary = PartsSummary(len(rows), sum(quantities), sum(weights))
+
+            return intersection
+
+        total_qty = 0
+        total_weight = 0.0
+        for part_id, (_, source) in minimums.items():
+            part = source.detach_part(part_id)
+            intersection.parts[part_id] = part
+            total_qty += part.qty
+            total_weight += part.weight
+
+        intersection._summary = PartsSummary(len(intersection.parts), total_qty, total_weight)
 
         return intersection
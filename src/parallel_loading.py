@@ -0,0 +1,137 @@
+from concurrent.futures import Executor, ProcessPoolExecutor
+from pathlib import Path
+from typing import List, Tuple
+
+from enums import StorageMode
+from operations import Operations
+from parts_list import PartsList
+from parts_list_cache import PartsListCache
+
+## Worker Functions (these need to live at the module level so that they can be pickled over to the worker processes)
+
+def load_parts_list(path: Path, storage: StorageMode, cache: PartsListCache = None) -> Tuple[PartsList, bool, str]:
+    '''
+    Loads a single PartsList, returning it (or None if it failed to load), whether or not it was a cache hit, and the
+    reason that it failed to load (or None if it loaded). The worker only has a copy of the cache, so the hit gets
+    reported back for the parent's copy to record.
+
+    Any error raised while loading (a missing or unsupported file, a malformed row, etc) counts as a failure, so that
+    one bad file doesn't take down every other file being loaded alongside it. Nothing gets printed here, that's left
+    up to the caller.
+    '''
+
+    try:
+        if (cache == None):
+            return PartsList(path, storage), False, None
+
+        hits = cache.hits
+        parts_list = cache.load(path, storage)
+        return parts_list, cache.hits > hits, None
+    except Exception as error:
+        return None, False, str(error)
+
+
+def _load_chunk_union(paths: List[Path], storage: StorageMode, cache: PartsListCache = None) -> Tuple[PartsList, List[Tuple[Path, str]], List[bool]]:
+    parts_lists: List[PartsList] = []
+    failures: List[Tuple[Path, str]] = []
+    cache_lookups: List[bool] = []
+    for path in paths:
+        parts_list, hit, error = load_parts_list(path, storage, cache)
+        if (parts_list == None):
+            failures.append((path, error))
+            continue
+
+        parts_lists.append(parts_list)
+        cache_lookups.append(hit)
+
+    union = Operations.union(*parts_lists) if len(parts_lists) > 0 else None
+    return union, failures, cache_lookups
+
+
+def _union_pair(parts_list_a: PartsList, parts_list_b: PartsList) -> PartsList:
+    return Operations.union(parts_list_a, parts_list_b)
+
+## Loading
+
+def report_failure(path: Path, error: str):
+    print('Unable to generate parts list for file at {}: {}'.format(path, error))
+
+
+def _chunk_paths(paths: List[Path], chunk_count: int) -> List[List[Path]]:
+    ## Contiguous chunks keep the parts in the same order that a serial load would've put them in
+    chunk_size, remainder = divmod(len(paths), chunk_count)
+    chunks = []
+    start = 0
+    for index in range(chunk_count):
+        end = start + chunk_size + (1 if index < remainder else 0)
+        if (end > start):
+            chunks.append(paths[start:end])
+        start = end
+
+    return chunks
+
+
+def load_parts_lists(*paths: List[Path], storage: StorageMode = StorageMode.DICT, jobs: int = 1, cache: PartsListCache = None) -> List[PartsList]:
+    '''
+    Loads each of the given paths into its own PartsList, parsing up to 'jobs' files at once in worker processes.
+    Files that fail to load are reported and skipped, and the returned PartsLists keep the same order as the paths.
+    '''
+
+    parts_lists: List[PartsList] = []
+    with ProcessPoolExecutor(max_workers = jobs) as executor:
+        for path, (parts_list, hit, error) in zip(paths, executor.map(load_parts_list, paths, [storage] * len(paths), [cache] * len(paths))):
+            if (parts_list == None):
+                report_failure(path, error)
+                continue
+
+            if (cache != None):
+                cache.record_lookup(hit)
+            parts_lists.append(parts_list)
+
+    return parts_lists
+
+
+def _tree_reduce(executor: Executor, parts_lists: List[PartsList]) -> PartsList:
+    ## Union neighbouring pairs together level by level, so the work at each level can happen concurrently
+    while (len(parts_lists) > 1):
+        futures = [executor.submit(_union_pair, parts_lists[index], parts_lists[index + 1]) for index in range(0, len(parts_lists) - 1, 2)]
+        leftover = [parts_lists[-1]] if len(parts_lists) % 2 == 1 else []
+
+        parts_lists = [future.result() for future in futures] + leftover
+
+    return parts_lists[0]
+
+
+def load_union(*paths: List[Path], storage: StorageMode = StorageMode.DICT, jobs: int = 1, cache: PartsListCache = None) -> Tuple[PartsList, List[Path]]:
+    '''
+    Loads and unions all of the given paths together. Each worker process parses and unions a contiguous chunk of the
+    paths, and the partial unions are then combined with a tree reduction. Files that fail to load are reported and
+    skipped.
+
+    Returns:
+    Tuple[PartsList, List[Path]]: The unioned PartsList, and the paths that were successfully loaded into it
+    '''
+
+    paths = list(paths)
+    failures: List[Tuple[Path, str]] = []
+    with ProcessPoolExecutor(max_workers = jobs) as executor:
+        partials: List[PartsList] = []
+        for union, chunk_failures, cache_lookups in executor.map(_load_chunk_union, _chunk_paths(paths, jobs), [storage] * jobs, [cache] * jobs):
+            failures.extend(chunk_failures)
+            if (cache != None):
+                for hit in cache_lookups:
+                    cache.record_lookup(hit)
+            if (union != None):
+                partials.append(union)
+
+        for path, error in failures:
+            report_failure(path, error)
+
+        ## Defer to Operations.union for the error when there's nothing to union
+        if (len(partials) == 0):
+            return Operations.union(), []
+
+        union = _tree_reduce(executor, partials)
+
+    failed_paths = [path for path, _ in failures]
+    return union, [path for path in paths if path not in failed_paths]
@@ -1,20 +1,26 @@
-from typing import List
+import sys
+from typing import List, Tuple
 
 class Part:
     CSV_FIELDS = ['bl_item_no', 'element_id', 'l_draw_id', 'part_name', 'bl_color_id', 'l_draw_color_id', 'color_name', 'color_category', 'qty', 'weight']
 
+    ## Slots keep every Part free of a per-instance __dict__, which adds up quickly across large lists
+    __slots__ = ['_bl_item_no', 'element_id', 'l_draw_id', 'part_name', 'bl_color_id', 'l_draw_color_id', '_color_name', 'color_category', 'qty', 'weight', '_id']
+
     def __init__(self, csv_line: List[str]):
         ## csv_line looks like: BLItemNo,ElementId,LdrawId,PartName,BLColorId,LDrawColorId,ColorName,ColorCategory,Qty,Weight
         self._bl_item_no = csv_line[0]
         self.element_id = csv_line[1]
         self.l_draw_id = csv_line[2]
         self.part_name = csv_line[3]
-        self.bl_color_id = csv_line[4]
-        self.l_draw_color_id = csv_line[5]
-        self._color_name = csv_line[6]
-        self.color_category = csv_line[7]
+        ## There's only a few hundred colors, so share a single copy of each color related string between all Parts
+        self.bl_color_id = sys.intern(csv_line[4])
+        self.l_draw_color_id = sys.intern(csv_line[5])
+        self._color_name = sys.intern(csv_line[6])
+        self.color_category = sys.intern(csv_line[7])
         self.qty = int(csv_line[8])
         self.weight = float(csv_line[9])
+        self._id: str = None
 
     ## Magic Methods
 
@@ -47,7 +53,11 @@ class Part:
         Build something unique enough to index the part on, collisions are fine since parts are interchangable
         '''
 
-        return str(self.bl_item_no) + ':' + str(self.color_name)
+        ## The id is hit for every lookup, so only build it again once the fields it depends on have changed
+        if (self._id == None):
+            self._id = Part.build_id(self._bl_item_no, self._color_name)
+
+        return self._id
 
 
     @property
@@ -58,6 +68,7 @@ class Part:
     @bl_item_no.setter
     def bl_item_no(self, value: str):
         self._bl_item_no = value
+        self._id = None
 
 
     @property
@@ -68,9 +79,27 @@ class Part:
     @color_name.setter
     def color_name(self, value: str):
         self._color_name = value
+        self._id = None
 
     ## Methods
 
+    @staticmethod
+    def build_id(bl_item_no: str, color_name: str) -> str:
+        return str(bl_item_no) + ':' + str(color_name)
+
+
+    @staticmethod
+    def split_id(part_id: str) -> Tuple[str, str]:
+        ## Bricklink item numbers never contain a colon, so everything after the first one is the color name
+        bl_item_no, _, color_name = part_id.partition(':')
+        return bl_item_no, color_name
+
+
+    @staticmethod
+    def get_color_name_from_id(part_id: str) -> str:
+        return Part.split_id(part_id)[1]
+
+
     def enable_any_color(self):
         self.bl_color_id = '0'
         self.l_draw_color_id = '9999'
@@ -83,7 +112,7 @@ class Part:
     
 
     def is_color_match(self, color_string: str) -> bool:
-        return color_string.lower() == self.color_name.lower()
+        return color_string.casefold() == self.color_name.casefold()
 
 
     def to_csv(self) -> List[str]:
@@ -95,4 +124,18 @@ class Part:
 
 
     def clone(self) -> "Part":
-        return Part(self.to_csv())
+        ## Copy the fields over directly, rather than round-tripping through to_csv() and parsing everything again
+        part = Part.__new__(Part)
+        part._bl_item_no = self._bl_item_no
+        part.element_id = self.element_id
+        part.l_draw_id = self.l_draw_id
+        part.part_name = self.part_name
+        part.bl_color_id = self.bl_color_id
+        part.l_draw_color_id = self.l_draw_color_id
+        part._color_name = self._color_name
+        part.color_category = self.color_category
+        part.qty = self.qty
+        part.weight = self.weight
+        part._id = self._id
+
+        return part
@@ -1,16 +1,38 @@
+import copy
 import csv
-import json
-from copy import deepcopy
 from pathlib import Path
-from typing import List
+from typing import Dict, Iterable, Iterator, List, Tuple
 
+import binary_format
+import compressed_io
+import exporters
+import fast_csv
+import instrumentation
+from columnar_parts import ColumnarParts
+from copy_on_write_parts import CopyOnWriteParts
+from enums import Compression, SaveFormat, StorageMode
+from lazy_parts import LazyParts
 from part import Part
+from parts_summary import PartsSummary
+from sqlite_store import SqliteParts, SqliteStore
 
 class PartsList:
-    def __init__(self, path: Path = None):
+    IMPORT_SUFFIXES = ['.csv', binary_format.SUFFIX]
+
+    ## Whether Bricklink's own .csv exports get read into columnar storage with the specialized fast path, rather than
+    ## the general csv reader
+    use_fast_csv = True
+
+    ## The SqliteStore that PartsLists with the SQLITE storage mode are kept in
+    sqlite_store: SqliteStore = None
+
+    def __init__(self, path: Path = None, storage: StorageMode = StorageMode.DICT):
         self.path = path
-        self.parts = {} # bricklink id -> Part instance
+        self.storage = storage
+        self.parts = self._create_parts_storage() # bricklink id -> Part instance
         self._header: List[str] = None
+        self._color_index: Dict[str, List[str]] = None # case-folded color name -> part ids
+        self._summary: PartsSummary = None
 
         if (self.path != None):
             self._import_list(self.path)
@@ -35,7 +57,38 @@ class PartsList:
 
     ## Methods
 
-    def _import_list(self, path: Path, csv_delimiter = ','):
+    @staticmethod
+    def from_parts(parts: Iterable[Part], header: List[str] = None, storage: StorageMode = StorageMode.DICT) -> "PartsList":
+        parts_list = PartsList(storage = storage)
+        parts_list._header = header
+
+        part: Part
+        for part in parts:
+            parts_list.parts[part.id] = part
+
+        return parts_list
+
+
+    def _create_parts_storage(self):
+        '''
+        Builds an empty mapping of part id -> Part, backed by whichever storage mode this PartsList was created with
+        '''
+
+        ## Only existing binary files can be memory-mapped, anything else gets built up in columnar storage instead
+        if (self.storage == StorageMode.COLUMNAR or self.storage == StorageMode.MAPPED):
+            return ColumnarParts()
+        elif (self.storage == StorageMode.LAZY):
+            return LazyParts()
+        elif (self.storage == StorageMode.SQLITE):
+            if (PartsList.sqlite_store == None):
+                raise RuntimeError('Unable to use sqlite storage without setting PartsList.sqlite_store first.')
+            return SqliteParts(PartsList.sqlite_store)
+
+        return {}
+
+
+    @staticmethod
+    def _validate_path(path: Path, suffixes: List[str] = IMPORT_SUFFIXES):
         ## Safe assumptions prior to loading the .csv
         if (not isinstance(path, Path)):
             raise RuntimeError('Unable to import non Path object.')
@@ -43,74 +96,309 @@ class PartsList:
             raise RuntimeError('Provided path doesn\'t exit.')
         if (path.is_dir()):
             raise RuntimeError('Provided path represents a directory, and cannot be imported.')
-        if (path.suffix != '.csv'):
-            raise RuntimeError('Provided path doesn\'t resolve to a .csv file.')
+        ## Compressed files are judged by what's inside of them (ex: parts.csv.gz is a .csv file)
+        if (compressed_io.get_content_suffix(path) not in suffixes):
+            raise RuntimeError('Provided path doesn\'t resolve to a {} file.'.format(' or '.join(suffixes)))
+
+
+    @instrumentation.timed('import')
+    def _import_list(self, path: Path, csv_delimiter = ','):
+        self._validate_path(path)
 
         ## Clean slate
         self.path = path
-        self.parts = {}
+        self.parts = self._create_parts_storage()
+        self._color_index = None
+        self._summary = None
+
+        if (path.suffix != binary_format.SUFFIX and compressed_io.get_content_suffix(path) == binary_format.SUFFIX):
+            raise RuntimeError('Unable to import compressed binary parts lists, as they need to be memory-mapped.')
+
+        ## Stored lists are only imported again once their files have changed, and are never loaded into memory
+        if (isinstance(self.parts, SqliteParts)):
+            self.parts = self.parts.store.import_file(path)
+            self._header = self.parts.header
+            return
+
+        if (path.suffix == binary_format.SUFFIX):
+            self._import_binary(path)
+            return
+
+        ## Bricklink's own exports have a fixed layout, so they can be split straight into columns rather than going row
+        ## by row. That only pays off when the rows don't need to become Parts anyway, and anything unexpected falls back
+        ## to the general csv reader.
+        if (self.use_fast_csv and isinstance(self.parts, ColumnarParts) and csv_delimiter == ','):
+            fast_import = fast_csv.read_columnar_parts(path)
+            if (fast_import != None):
+                self._header, self.parts = fast_import
+                instrumentation.add_rows(len(self.parts.qty))
+                return
+
+        ## Only index the fields that the Operations need, and leave the rest of each row undecoded until it's accessed
+        if (isinstance(self.parts, LazyParts) and csv_delimiter == ','):
+            with compressed_io.open_text_reader(path) as csv_file:
+                lazy_import = LazyParts.from_text(csv_file.read())
+            if (lazy_import != None):
+                self._header, self.parts = lazy_import
+                instrumentation.add_rows(len(self.parts.qty))
+                return
 
         ## Perform the import
-        with open(path) as csv_file:
+        with compressed_io.open_text_reader(path) as csv_file:
             reader = csv.reader(csv_file)
             self._header = reader.__next__()
 
             for row in reader:
                 ## Ignore any rows with a falsy bricklink id (ex: the summary lines at the bottom), and anything that comes after
                 if (row[0] == None or row[0] == ''):
-                    return
+                    break
 
                 part = Part(row)
 
                 ## Index the part based on its Bricklink ID and its color, so we don't have accidental collisions
                 self.parts[part.id] = part
 
+            ## The reader counts lines rather than rows, which only differ when fields have line breaks in them
+            instrumentation.add_rows(reader.line_num - 1)
 
-    def set_any_color(self, colors: List[str]):
+
+    def _import_binary(self, path: Path):
+        if (self.storage == StorageMode.MAPPED):
+            self.parts = binary_format.MappedParts(path)
+            self._header = self.parts.header if len(self.parts.header) > 0 else None
+            instrumentation.add_rows(len(self.parts))
+            return
+
+        self._header, columnar_parts = binary_format.read_parts(path)
+        instrumentation.add_rows(len(columnar_parts))
+
+        if (self.storage == StorageMode.COLUMNAR):
+            self.parts = columnar_parts
+        else:
+            for part_id in columnar_parts:
+                self.parts[part_id] = columnar_parts[part_id]
+
+
+    def iter_quantities(self) -> Iterator[Tuple[str, int, float]]:
+        '''
+        Yields (part id, qty, weight) for every part in the list, which is all that the Operations need to combine lists
+        '''
+
+        if (isinstance(self.parts, (ColumnarParts, binary_format.MappedParts, CopyOnWriteParts, LazyParts, SqliteParts))):
+            return self.parts.iter_quantities()
+
+        return self._iter_dict_quantities()
+
+
+    def _iter_dict_quantities(self) -> Iterator[Tuple[str, int, float]]:
         part: Part
-        for part in self.parts.values():
-            ## There's definitely a way to cache colors upon init, but premature optimization is bad. Also this doesn't
-            ## have to be a super performant script, so I'm not very worried at the moment.
-            for color in colors:
-                if (part.is_color_match(color)):
-                    del self.parts[part.id]
+        for part_id, part in self.parts.items():
+            yield part_id, part.qty, part.weight
+
+
+    def get_total_qty(self) -> int:
+        if (self._summary != None):
+            return self._summary.total_qty
+
+        if (isinstance(self.parts, binary_format.MappedParts)):
+            return self.parts.get_total_qty()
+
+        return sum(qty for _, qty, _ in self.iter_quantities())
+
+
+    def get_qty(self, part_id: str) -> int:
+        '''
+        Gets a single part's quantity, reading it straight out of the storage rather than materializing the Part
+        wherever possible
+        '''
+
+        if (isinstance(self.parts, (ColumnarParts, binary_format.MappedParts))):
+            return self.parts.qty[self.parts.row_of(part_id)]
+        elif (isinstance(self.parts, (LazyParts, SqliteParts))):
+            return self.parts.get_qty(part_id)
+        elif (isinstance(self.parts, CopyOnWriteParts)):
+            return self.parts.peek(part_id).qty
+
+        return self.parts[part_id].qty
+
+
+    def detach_part(self, part_id: str) -> Part:
+        '''
+        Gets a copy of the given part that can be freely modified without affecting this PartsList
+        '''
+
+        ## Columnar, mapped, lazy, and sqlite storage already materialize a brand new Part on every access
+        if (isinstance(self.parts, (ColumnarParts, binary_format.MappedParts, LazyParts, SqliteParts))):
+            return self.parts[part_id]
 
-                    part.enable_any_color()
+        ## Avoid needlessly pulling the part into the copy-on-write overrides, since it's getting cloned anyways
+        if (isinstance(self.parts, CopyOnWriteParts)):
+            return self.parts.peek(part_id).clone()
 
-                    self.parts[part.id] = part
+        return self.parts[part_id].clone()
+
+
+    def get_color_index(self) -> Dict[str, List[str]]:
+        '''
+        Gets the mapping of case-folded color names to the ids of the parts in that color. It's built from the part ids
+        the first time it's needed, and then kept up to date by set_any_color. Call invalidate_color_index() after
+        adding or removing parts directly.
+        '''
+
+        if (self._color_index == None):
+            self._color_index = {}
+            folded_colors: Dict[str, str] = {}
+            for part_id in self.parts:
+                color_name = Part.get_color_name_from_id(part_id)
+
+                ## There's only a handful of distinct colors, so only fold each of them once
+                folded_color = folded_colors.get(color_name)
+                if (folded_color == None):
+                    folded_color = folded_colors[color_name] = color_name.casefold()
+
+                self._color_index.setdefault(folded_color, []).append(part_id)
+
+        return self._color_index
+
+
+    def invalidate_color_index(self):
+        self._color_index = None
+
+
+    def get_summary(self) -> PartsSummary:
+        '''
+        Gets the number of unique parts, and their total quantity and weight. The Operations fill this in as they build
+        their results, otherwise it's computed from the parts' quantities the first time it's needed. Call
+        invalidate_summary() after changing parts directly.
+        '''
+
+        if (self._summary == None and isinstance(self.parts, SqliteParts)):
+            self._summary = self.parts.get_summary()
+        elif (self._summary == None):
+            self._summary = PartsSummary.from_quantities(self.iter_quantities())
+
+        return self._summary
+
+
+    def invalidate_summary(self):
+        self._summary = None
+
+
+    @instrumentation.timed('set_any_color')
+    def set_any_color(self, colors: List[str]):
+        ## Memory-mapped parts are read-only, so pull them into memory before changing anything
+        if (isinstance(self.parts, binary_format.MappedParts)):
+            self.parts = self.parts.to_columnar()
+        ## Likewise for stored parts lists, although they're copied within the database
+        elif (isinstance(self.parts, SqliteParts) and self.parts.read_only):
+            self.parts = self.parts.copy()
+
+        color_index = self.get_color_index()
+
+        for color in dict.fromkeys(color.casefold() for color in colors):
+            ## Only the lots in the requested colors need to be touched
+            for part_id in color_index.pop(color, []):
+                if (part_id not in self.parts):
+                    continue
+
+                part: Part = self.parts[part_id]
+                del self.parts[part_id]
+
+                part.enable_any_color()
+
+                ## Different colors of the same part collapse onto the same 'any color' id, so merge them together
+                existing_part: Part = self.parts.get(part.id)
+                if (existing_part is not None):
+                    part.qty += existing_part.qty
+                    part.weight += existing_part.weight
+                else:
+                    color_index.setdefault(part.color_name.casefold(), []).append(part.id)
+
+                self.parts[part.id] = part
+
+        ## Merging colors together never changes the totals, just the number of unique parts
+        if (self._summary != None):
+            self._summary = self._summary._replace(unique_parts = len(self.parts))
 
 
     def clone(self) -> "PartsList":
-        return deepcopy(self)
+        '''
+        Copies the parts list, leaving this one untouched. Read-only storages (and earlier clones) are shared with the
+        clone as a copy-on-write base in constant time, so that it only pays for the entries it goes on to modify.
+        Anything else is copied up front, since this PartsList is still free to change it.
+        '''
+
+        parts_list = self.clone_empty()
+
+        if (isinstance(self.parts, CopyOnWriteParts)):
+            parts_list.parts = self.parts.copy()
+        elif (isinstance(self.parts, binary_format.MappedParts) or (isinstance(self.parts, SqliteParts) and self.parts.read_only)):
+            parts_list.parts = CopyOnWriteParts(self.parts)
+        elif (isinstance(self.parts, SqliteParts)):
+            parts_list.parts = self.parts.copy()
+        elif (isinstance(self.parts, dict)):
+            parts_list.parts = {part_id: part.clone() for part_id, part in self.parts.items()}
+        else:
+            parts_list.parts = copy.deepcopy(self.parts)
+
+        return parts_list
+
+
+    def clone_empty(self) -> "PartsList":
+        '''
+        Builds a PartsList with the same path, header, and storage mode as this one, but without any parts in it
+        '''
+
+        parts_list = PartsList(storage = self.storage)
+        parts_list.path = self.path
+        parts_list._header = list(self._header) if self._header != None else None
+
+        return parts_list
 
     ## Export Methods
 
-    def export_csv(self, target: Path):
+    @instrumentation.timed('export_csv')
+    def export_csv(self, target: Path, compression: Compression = None):
         '''
-        Exports a full-fat CSV with the same fields it was generated with, just using the updated values
+        Exports a full-fat CSV with the same fields it was generated with, just using the updated values. The output is
+        compressed based on the target's suffix (.gz or .zst), unless a compression is given.
         '''
 
         print('Exporting CSV to {}'.format(target))
-        with open(target, 'w+', newline='') as csv_file:
-            writer = csv.writer(csv_file)
-            writer.writerow(self._header)
-
-            part: Part
-            for part in self.parts.values():
-                writer.writerow(part.to_csv())
+        exporters.write_csv(target, self.parts.values(), self._header, compression)
 
 
-    def export_simple_csv(self, target: Path):
+    @instrumentation.timed('export_simple_csv')
+    def export_simple_csv(self, target: Path, compression: Compression = None):
         '''
         Builds an exports the bare minimum CSV for describing a collection of parts.
         There are 'part', 'color', and 'quantity' fields, and the whole thing is ready for Rebrickable integration
         '''
 
         print('Exporting simple CSV to {}'.format(target))
-        with open(target, 'w+', newline='') as csv_file:
-            writer = csv.writer(csv_file)
-            writer.writerow(['part', 'color', 'quantity'])
+        exporters.write_simple_csv(target, self.parts.values(), compression)
+
+
+    @instrumentation.timed('export_binary')
+    def export_binary(self, target: Path):
+        '''
+        Exports the parts list in the compact binary format, which can be loaded back far faster than a CSV
+        '''
+
+        print('Exporting binary parts list to {}'.format(target))
+        binary_format.write_parts(target, self._header, ColumnarParts.from_parts(self.parts))
+
+
+    def export(self, target: Path, save_format: SaveFormat):
+        '''
+        Exports the parts list in the given SaveFormat, via the matching export method
+        '''
 
-            part: Part
-            for part in self.parts.values():
-                writer.writerow(part.to_simple_csv())
+        save_format = SaveFormat(save_format)
+        if (save_format == SaveFormat.CSV):
+            self.export_csv(target)
+        elif (save_format == SaveFormat.SIMPLE_CSV):
+            self.export_simple_csv(target)
+        elif (save_format == SaveFormat.BINARY):
+            self.export_binary(target)
+        ## elif as new formats are implemented
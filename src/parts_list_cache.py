@@ -0,0 +1,163 @@
+import os
+import pickle
+import tempfile
+from pathlib import Path
+from typing import Dict, List
+
+from columnar_parts import ColumnarParts
+from enums import StorageMode
+from fingerprints import build_fingerprint
+from parts_list import PartsList
+
+class PartsListCache:
+    '''
+    An on-disk cache of parsed PartsLists, so that unchanged .csv files don't need to be parsed again on every run.
+
+    Entries are keyed on the file's resolved path, size, and modification time (or optionally a hash of its contents),
+    and are stored in a compact columnar form. Whenever the cache grows beyond max_size_bytes, the least recently used
+    entries are evicted. Recency is tracked via each entry's modification time, so it carries over between runs.
+    '''
+
+    CACHE_VERSION = 1
+    ENTRY_SUFFIX = '.plcache'
+
+    ## Entries are columnar, so they can only be handed back in storages that can be built from that. Lazy storage
+    ## needs each row's raw text, and sqlite storage lives in its own database, so they're always parsed from the file.
+    CACHED_STORAGES = [StorageMode.DICT, StorageMode.COLUMNAR, StorageMode.MAPPED]
+
+    def __init__(self, directory: Path, max_size_bytes: int = 512 * 1024 * 1024, use_content_hash: bool = False):
+        self.directory = Path(directory)
+        self.max_size_bytes = max_size_bytes
+        self.use_content_hash = use_content_hash
+        self.hits = 0
+        self.misses = 0
+
+        self.directory.mkdir(parents = True, exist_ok = True)
+
+    ## Methods
+
+    def _build_key(self, path: Path) -> str:
+        return build_fingerprint(path, self.use_content_hash)
+
+
+    def _entry_path(self, key: str) -> Path:
+        return self.directory / (key + self.ENTRY_SUFFIX)
+
+
+    def _entries(self) -> List[Path]:
+        return [entry for entry in self.directory.iterdir() if entry.suffix == self.ENTRY_SUFFIX]
+
+
+    def record_lookup(self, hit: bool):
+        if (hit):
+            self.hits += 1
+        else:
+            self.misses += 1
+
+
+    def get(self, path: Path, storage: StorageMode = StorageMode.DICT) -> PartsList:
+        '''
+        Gets the cached PartsList for the given path, or None if it isn't cached (or the file has changed since, or the
+        storage can't be cached)
+        '''
+
+        if (storage not in self.CACHED_STORAGES):
+            return None
+
+        entry_path = self._entry_path(self._build_key(path))
+        try:
+            with open(entry_path, 'rb') as entry_file:
+                version, header, columnar_parts = pickle.load(entry_file)
+
+            ## Bump the entry's recency for LRU eviction
+            os.utime(entry_path)
+        except FileNotFoundError:
+            return None
+        except Exception:
+            ## Entries that can't be unpickled (ex: written by an older version of the code) are just misses
+            return None
+
+        if (version != self.CACHE_VERSION):
+            return None
+
+        parts_list = PartsList(storage = storage)
+        parts_list.path = path
+        parts_list._header = header
+        if (storage == StorageMode.COLUMNAR or storage == StorageMode.MAPPED):
+            parts_list.parts = columnar_parts
+        else:
+            parts_list.parts = {part_id: columnar_parts[part_id] for part_id in columnar_parts}
+
+        return parts_list
+
+
+    def put(self, path: Path, parts_list: PartsList):
+        entry_path = self._entry_path(self._build_key(path))
+        payload = (self.CACHE_VERSION, parts_list._header, ColumnarParts.from_parts(parts_list.parts))
+
+        ## Write to a temporary file first, so concurrent readers never see a partially written entry
+        descriptor, temp_path = tempfile.mkstemp(dir = self.directory, suffix = '.tmp')
+        with os.fdopen(descriptor, 'wb') as temp_file:
+            pickle.dump(payload, temp_file, protocol = pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, entry_path)
+
+        self.evict()
+
+
+    def load(self, path: Path, storage: StorageMode = StorageMode.DICT) -> PartsList:
+        '''
+        Gets the PartsList for the given path from the cache, or parses and caches it if it isn't already
+        '''
+
+        if (storage not in self.CACHED_STORAGES):
+            return PartsList(path, storage)
+
+        parts_list = self.get(path, storage)
+        self.record_lookup(parts_list != None)
+
+        if (parts_list == None):
+            parts_list = PartsList(path, storage)
+            self.put(path, parts_list)
+
+        return parts_list
+
+
+    def evict(self):
+        '''
+        Removes the least recently used entries until the cache fits within max_size_bytes
+        '''
+
+        entries = []
+        for entry in self._entries():
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime_ns, stat.st_size, entry))
+
+        total_size = sum(size for _, size, _ in entries)
+        for _, size, entry in sorted(entries, key = lambda entry: entry[0]):
+            if (total_size <= self.max_size_bytes):
+                break
+
+            try:
+                entry.unlink()
+            except FileNotFoundError:
+                pass
+            total_size -= size
+
+
+    def clear(self):
+        for entry in self._entries():
+            entry.unlink()
+
+
+    def get_stats(self) -> Dict[str, int]:
+        entries = self._entries()
+
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'entries': len(entries),
+            'size_bytes': sum(entry.stat().st_size for entry in entries)
+        }
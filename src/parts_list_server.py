@@ -0,0 +1,314 @@
+import json
+import socketserver
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from enums import SaveFormat, StorageMode
+from operations import Operations
+from part import Part
+from parts_list import PartsList
+from fingerprints import build_fingerprint
+from parts_list_cache import PartsListCache
+
+class PartsListRegistry:
+    '''
+    Keeps parsed PartsLists resident in memory between requests, keyed on their resolved paths. Each lookup checks the
+    file's fingerprint, so files that have changed on disk since they were loaded get transparently reloaded.
+    '''
+
+    def __init__(self, storage: StorageMode = StorageMode.DICT, cache: PartsListCache = None):
+        self.storage = storage
+        self.cache = cache
+        self.loads = 0
+        self.reloads = 0
+
+        self._parts_lists: Dict[Path, Tuple[str, PartsList]] = {}
+        self._lock = threading.Lock()
+
+    ## Methods
+
+    def get(self, path: Path) -> PartsList:
+        resolved_path = Path(path).resolve()
+        fingerprint = build_fingerprint(resolved_path)
+
+        with self._lock:
+            entry = self._parts_lists.get(resolved_path)
+            if (entry != None and entry[0] == fingerprint):
+                return entry[1]
+
+            parts_list = self.cache.load(path, self.storage) if self.cache != None else PartsList(path, self.storage)
+
+            if (entry == None):
+                self.loads += 1
+            else:
+                self.reloads += 1
+            self._parts_lists[resolved_path] = (fingerprint, parts_list)
+
+            return parts_list
+
+
+    def evict(self, path: Path) -> bool:
+        with self._lock:
+            return self._parts_lists.pop(Path(path).resolve(), None) != None
+
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                'parts_lists': [str(path) for path in self._parts_lists.keys()],
+                'loads': self.loads,
+                'reloads': self.reloads
+            }
+
+
+class PartsListRequestHandler(BaseHTTPRequestHandler):
+    '''
+    Serves the parts list operations as a small JSON API. Every operation is a POST to its own path, with a JSON body
+    naming the parts lists to operate on:
+
+        POST /missing-parts {"unowned": [path], "owned": [path, ...]}
+        POST /merge         {"paths": [path, ...]}
+        POST /intersection  {"paths": [path, ...]}
+
+    The paths are relative to (and have to stay inside of) the server's input directory. Each of them also accepts an
+    optional "any_color" list of color names, and an optional "save_path" and "save_format" to export the result with.
+    Exports are only allowed when the server has an output directory, and their save_path is relative to (and has to
+    stay inside of) it. The resulting parts are sent back in the response.
+    GET /status reports which parts lists are resident, and POST /evict {"paths": [path, ...]} drops them from memory.
+    '''
+
+    OPERATIONS = ['missing-parts', 'merge', 'intersection']
+
+    ## Requests may come in over a Unix socket, where there's no client address to log
+    def address_string(self) -> str:
+        return str(self.client_address[0]) if self.client_address else 'local'
+
+
+    def log_message(self, format: str, *args):
+        if (self.server.verbose):
+            super().log_message(format, *args)
+
+    ## Methods
+
+    def _send_json(self, status: int, payload: dict):
+        body = json.dumps(payload).encode('utf-8')
+
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+    def _read_json(self) -> dict:
+        length = int(self.headers.get('Content-Length', 0))
+        if (length == 0):
+            return {}
+
+        payload = json.loads(self.rfile.read(length))
+        if (not isinstance(payload, dict)):
+            raise ValueError('Request body must be a JSON object')
+
+        return payload
+
+
+    @staticmethod
+    def _serialize_parts_list(parts_list: PartsList) -> dict:
+        parts = parts_list.parts
+
+        part: Part
+        serialized_parts = []
+        for part_id in sorted(parts.keys()):
+            part = parts[part_id]
+            serialized_parts.append({
+                'id': part_id,
+                'bl_item_no': part.bl_item_no,
+                'color_name': part.color_name,
+                'qty': part.qty,
+                'weight': part.weight
+            })
+
+        return {
+            'parts': serialized_parts,
+            'unique_parts': len(serialized_parts),
+            'total_parts': sum(part['qty'] for part in serialized_parts)
+        }
+
+
+    def _get_paths(self, payload: dict, key: str) -> List[Path]:
+        paths = payload.get(key, [])
+        if (not isinstance(paths, list)):
+            raise ValueError('\'{}\' must be a list of paths'.format(key))
+
+        return [self._get_input_path(path) for path in paths]
+
+
+    def _get_input_path(self, path: str) -> Path:
+        ## Likewise clients can't read anything the server can, so parts lists are confined to its input directory
+        input_directory: Path = self.server.input_directory
+        if (not isinstance(path, str)):
+            raise ValueError('Parts list paths must be strings')
+
+        resolved_path = (input_directory / path).resolve()
+        if (input_directory not in resolved_path.parents):
+            raise ValueError('\'{}\' must be inside of the server\'s input directory'.format(path))
+
+        return resolved_path
+
+
+    def _get_colors(self, payload: dict) -> List[str]:
+        colors = payload.get('any_color', [])
+        if (not isinstance(colors, list) or not all(isinstance(color, str) for color in colors)):
+            raise ValueError('\'any_color\' must be a list of color names')
+
+        return colors
+
+
+    def _get_save_path(self, save_path: str) -> Path:
+        ## Clients can't be trusted to write anywhere the server can, so exports are confined to its output directory
+        output_directory: Path = self.server.output_directory
+        if (output_directory == None):
+            raise ValueError('Exporting is disabled, as the server wasn\'t given an output directory')
+        if (not isinstance(save_path, str)):
+            raise ValueError('\'save_path\' must be a path')
+
+        path = (output_directory / save_path).resolve()
+        if (output_directory not in path.parents):
+            raise ValueError('\'save_path\' must be inside of the server\'s output directory')
+
+        return path
+
+
+    def _run_operation(self, operation: str, payload: dict) -> PartsList:
+        registry: PartsListRegistry = self.server.registry
+
+        if (operation == 'missing-parts'):
+            unowned_paths = self._get_paths(payload, 'unowned')
+            if (len(unowned_paths) != 1):
+                raise ValueError('\'missing-parts\' requires exactly one unowned parts list')
+
+            unowned_parts_list = registry.get(unowned_paths[0])
+            owned_parts_lists = [registry.get(path) for path in self._get_paths(payload, 'owned')]
+
+            return Operations.difference(unowned_parts_list, Operations.union(*owned_parts_lists))
+
+        parts_lists = [registry.get(path) for path in self._get_paths(payload, 'paths')]
+        if (len(parts_lists) == 0):
+            raise ValueError('No parts lists provided, thus the \'{}\' would be pointless.'.format(operation))
+
+        if (operation == 'merge'):
+            return Operations.union(*parts_lists)
+        else:
+            return Operations.intersection(*parts_lists)
+
+
+    def do_GET(self):
+        if (self.path == '/status'):
+            self._send_json(200, self.server.registry.get_stats())
+        else:
+            self._send_json(404, {'error': 'Unknown path: {}'.format(self.path)})
+
+
+    def do_POST(self):
+        operation = self.path.strip('/')
+        if (operation != 'evict' and operation not in self.OPERATIONS):
+            self._send_json(404, {'error': 'Unknown operation: {}'.format(operation)})
+            return
+
+        try:
+            payload = self._read_json()
+
+            if (operation == 'evict'):
+                evicted = [str(path) for path in self._get_paths(payload, 'paths') if self.server.registry.evict(path)]
+                self._send_json(200, {'evicted': evicted})
+                return
+
+            ## The resident PartsLists are shared between requests, so operations run one at a time. Operations may
+            ## also share Parts with their inputs, so the output gets cloned before it's modified.
+            any_colors = self._get_colors(payload)
+            save_path = payload.get('save_path')
+            save_format = payload.get('save_format')
+            if (save_path != None or save_format != None):
+                if (save_path == None or save_format == None):
+                    raise ValueError('Exporting requires both a \'save_path\' and a \'save_format\'')
+
+                save_path = self._get_save_path(save_path)
+                save_format = SaveFormat(str(save_format).lower())
+
+            with self.server.operation_lock:
+                output_parts_list = self._run_operation(operation, payload)
+
+                if (len(any_colors) > 0):
+                    output_parts_list = output_parts_list.clone()
+                    output_parts_list.set_any_color(any_colors)
+
+                if (save_path != None):
+                    output_parts_list.export(save_path, save_format)
+
+                response = self._serialize_parts_list(output_parts_list)
+        except (AssertionError, ValueError, RuntimeError) as error:
+            self._send_json(400, {'error': str(error)})
+            return
+        except OSError as error:
+            ## The error's own message includes the server side path, so only the reason gets sent back
+            self._send_json(400, {'error': error.strerror or type(error).__name__})
+            return
+        except Exception as error:
+            ## Still answer the client, rather than dropping its connection, but keep the details in the server's log
+            self.log_error('Unable to handle %s: %r', operation, error)
+            self._send_json(500, {'error': 'Internal server error'})
+            return
+
+        self._send_json(200, response)
+
+
+class _ServerMixin:
+    def _setup_registry(self, registry: PartsListRegistry, verbose: bool, input_directory: Path, output_directory: Path):
+        self.registry = registry
+        self.verbose = verbose
+        self.input_directory = Path(input_directory).resolve() if input_directory != None else Path.cwd().resolve()
+        self.output_directory = Path(output_directory).resolve() if output_directory != None else None
+        self.operation_lock = threading.Lock()
+
+
+class PartsListHTTPServer(_ServerMixin, ThreadingHTTPServer):
+    def __init__(self, address: Tuple[str, int], registry: PartsListRegistry, verbose: bool = False, input_directory: Path = None, output_directory: Path = None):
+        super().__init__(address, PartsListRequestHandler)
+        self._setup_registry(registry, verbose, input_directory, output_directory)
+
+
+class PartsListUnixServer(_ServerMixin, socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path: Path, registry: PartsListRegistry, verbose: bool = False, input_directory: Path = None, output_directory: Path = None):
+        super().__init__(str(socket_path), PartsListRequestHandler)
+        self._setup_registry(registry, verbose, input_directory, output_directory)
+
+
+def create_server(
+    registry: PartsListRegistry,
+    host: str = '127.0.0.1',
+    port: int = 8421,
+    socket_path: Path = None,
+    verbose: bool = False,
+    input_directory: Path = None,
+    output_directory: Path = None
+) -> socketserver.BaseServer:
+    '''
+    Creates a server for the registry's parts lists, listening on a Unix socket if socket_path is given, otherwise
+    over HTTP on the given host and port. Requests can only read parts lists from inside of input_directory (the
+    current directory by default), and can only export into output_directory, and can't export at all without one.
+    Call serve_forever() on the result to start handling requests.
+    '''
+
+    if (socket_path != None):
+        socket_path = Path(socket_path)
+        ## Clean up a stale socket left behind by a previous server
+        if (socket_path.is_socket()):
+            socket_path.unlink()
+
+        return PartsListUnixServer(socket_path, registry, verbose, input_directory, output_directory)
+
+    return PartsListHTTPServer((host, port), registry, verbose, input_directory, output_directory)
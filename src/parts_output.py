@@ -0,0 +1,77 @@
+import heapq
+import sys
+from typing import Iterable, List, TextIO, Tuple
+
+from enums import OutputMode
+from part import Part
+from parts_list import PartsList
+
+## How many lines are formatted before each write, when dumping the full parts list
+WRITE_BATCH_SIZE = 8192
+
+
+def _format_line(part_id: str, qty: int) -> str:
+    ## Everything that's printed can be pulled out of the part id, so Parts never need to be built
+    bl_item_no, color_name = Part.split_id(part_id)
+    return '{} \t\t({}) \t{}\n'.format(bl_item_no, qty, color_name)
+
+
+def _write_lines(stream: TextIO, quantities: Iterable[Tuple[str, int, float]]):
+    lines: List[str] = []
+    for part_id, qty, _ in quantities:
+        lines.append(_format_line(part_id, qty))
+        if (len(lines) >= WRITE_BATCH_SIZE):
+            stream.write(''.join(lines))
+            lines.clear()
+
+    stream.write(''.join(lines))
+
+
+def write_summary(parts_list: PartsList, stream: TextIO = None):
+    summary = parts_list.get_summary()
+    (stream or sys.stdout).write('Unique parts: {}, total parts: {}\n'.format(summary.unique_parts, summary.total_qty))
+
+
+def write_top(parts_list: PartsList, count: int, by_weight: bool = False, stream: TextIO = None):
+    '''
+    Writes out the count parts with the highest quantity (or weight), without sorting the whole parts list
+    '''
+
+    stream = stream or sys.stdout
+    key_index = 2 if by_weight else 1
+
+    stream.write('Top {} parts by {}:\n'.format(count, 'weight' if by_weight else 'quantity'))
+    _write_lines(stream, heapq.nlargest(count, parts_list.iter_quantities(), key = lambda quantities: quantities[key_index]))
+    write_summary(parts_list, stream)
+
+
+def write_full(parts_list: PartsList, stream: TextIO = None):
+    '''
+    Writes out every part in the parts list sorted by id, in batches rather than line by line
+    '''
+
+    stream = stream or sys.stdout
+
+    stream.write('Dumping parts list:\n')
+    _write_lines(stream, sorted(parts_list.iter_quantities()))
+    write_summary(parts_list, stream)
+
+
+def write_parts_list(parts_list: PartsList, mode: OutputMode = OutputMode.FULL, top_count: int = 20, stream: TextIO = None):
+    '''
+    Writes out the parts list in the given OutputMode.
+
+    Parameters:
+    parts_list (PartsList): The PartsList to write out
+    mode (OutputMode): NONE writes nothing, SUMMARY writes only the unique and total part counts, TOP_QTY and
+        TOP_WEIGHT write the top_count parts with the highest quantity or weight, and FULL writes every part
+    top_count (int): How many parts to write out in the TOP_QTY and TOP_WEIGHT modes
+    stream (TextIO): Where to write to, defaults to stdout
+    '''
+
+    if (mode == OutputMode.SUMMARY):
+        write_summary(parts_list, stream)
+    elif (mode == OutputMode.TOP_QTY or mode == OutputMode.TOP_WEIGHT):
+        write_top(parts_list, top_count, mode == OutputMode.TOP_WEIGHT, stream)
+    elif (mode == OutputMode.FULL):
+        write_full(parts_list, stream)
@@ -0,0 +1,119 @@
+import csv
+from pathlib import Path
+from typing import Iterator, List, NamedTuple, Tuple
+
+from compressed_io import open_text_reader
+from part import Part
+from parts_list import PartsList
+
+class PartRecord(NamedTuple):
+    part_id: str
+    qty: int
+    weight: float
+    row: List[str]
+
+    @property
+    def sort_key(self) -> Tuple[str, str]:
+        ## Bricklink exports are sorted by item number, so order by that first and then by color within each item
+        return (self.row[0], self.row[6])
+
+
+class PartsStream:
+    '''
+    A read-only, lazily evaluated view of a Bricklink parts list .csv file. Rather than building a Part for every row
+    up front like PartsList does, rows are read one at a time as they're iterated over, so arbitrarily large files can
+    be fed into the Operations with memory bounded by whatever the operation itself needs to keep.
+
+    Every iteration re-reads the file from disk, so a PartsStream can be consumed more than once.
+
+    If the file is known to be sorted by part (see PartRecord.sort_key), pass is_sorted = True so that the Operations
+    can merge-join it with other sorted streams. Otherwise it's detected with a single pass over the file, the first
+    time that it's needed.
+    '''
+
+    def __init__(self, path: Path, csv_delimiter = ',', is_sorted: bool = None):
+        PartsList._validate_path(path, ['.csv'])
+
+        self.path = path
+        self.csv_delimiter = csv_delimiter
+        self._header: List[str] = None
+        self._is_sorted = is_sorted
+
+    ## Properties
+
+    @property
+    def is_sorted(self) -> bool:
+        if (self._is_sorted == None):
+            self._is_sorted = self.detect_sorted()
+
+        return self._is_sorted
+
+    ## Methods
+
+    def detect_sorted(self) -> bool:
+        previous_key = None
+        for record in self.iter_records():
+            key = record.sort_key
+            if (previous_key != None and key < previous_key):
+                return False
+            previous_key = key
+
+        return True
+
+    def iter_rows(self) -> Iterator[List[str]]:
+        with open_text_reader(self.path) as csv_file:
+            reader = csv.reader(csv_file, delimiter = self.csv_delimiter)
+            self._header = reader.__next__()
+
+            for row in reader:
+                ## Ignore any rows with a falsy bricklink id (ex: the summary lines at the bottom), and anything that comes after
+                if (row[0] == None or row[0] == ''):
+                    return
+
+                yield row
+
+
+    def iter_records(self) -> Iterator[PartRecord]:
+        for row in self.iter_rows():
+            yield PartRecord(Part.build_id(row[0], row[6]), int(row[8]), float(row[9]), row)
+
+
+    def iter_sorted_records(self) -> Iterator[PartRecord]:
+        '''
+        Yields the records in sorted order, collapsing repeated parts down to the last one like PartsList does. Raises
+        a RuntimeError if the file turns out to not be sorted after all.
+        '''
+
+        previous: PartRecord = None
+        for record in self.iter_records():
+            if (previous != None):
+                if (record.sort_key < previous.sort_key):
+                    raise RuntimeError('Parts list at {} isn\'t sorted by part, so it can\'t be merge-joined.'.format(self.path))
+                if (record.sort_key != previous.sort_key):
+                    yield previous
+            previous = record
+
+        if (previous != None):
+            yield previous
+
+
+    def iter_quantities(self) -> Iterator[tuple]:
+        '''
+        Yields (part id, qty, weight) for every row, matching PartsList.iter_quantities
+        '''
+
+        for record in self.iter_records():
+            yield record.part_id, record.qty, record.weight
+
+
+    def iter_parts(self) -> Iterator[Part]:
+        for row in self.iter_rows():
+            yield Part(row)
+
+
+    def to_parts_list(self) -> PartsList:
+        '''
+        Materializes the whole stream into a regular PartsList
+        '''
+
+        return PartsList(self.path)
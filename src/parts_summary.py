@@ -0,0 +1,22 @@
+from typing import Iterable, NamedTuple, Tuple
+
+class PartsSummary(NamedTuple):
+    unique_parts: int
+    total_qty: int
+    total_weight: float
+
+    @staticmethod
+    def from_quantities(quantities: Iterable[Tuple[str, int, float]]) -> "PartsSummary":
+        '''
+        Summarizes the (part id, qty, weight) tuples from PartsList.iter_quantities() in a single unsorted pass
+        '''
+
+        unique_parts = 0
+        total_qty = 0
+        total_weight = 0.0
+        for _, qty, weight in quantities:
+            unique_parts += 1
+            total_qty += qty
+            total_weight += weight
+
+        return PartsSummary(unique_parts, total_qty, total_weight)
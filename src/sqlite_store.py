@@ -0,0 +1,453 @@
+import csv
+import json
+import sqlite3
+from collections.abc import MutableMapping, ValuesView
+from itertools import takewhile
+from pathlib import Path
+from typing import Iterable, Iterator, List, Tuple
+
+import binary_format
+import compressed_io
+from fingerprints import build_fingerprint
+from part import Part
+from parts_summary import PartsSummary
+
+## Every field of a Part gets its own column, in the same order as Part.CSV_FIELDS (and Bricklink's exports)
+FIELDS = ', '.join(Part.CSV_FIELDS)
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS parts_lists (
+    id INTEGER PRIMARY KEY,
+    name TEXT UNIQUE,
+    fingerprint TEXT,
+    header TEXT
+);
+CREATE TABLE IF NOT EXISTS parts (
+    list_id INTEGER NOT NULL,
+    bl_item_no TEXT NOT NULL,
+    element_id TEXT,
+    l_draw_id TEXT,
+    part_name TEXT,
+    bl_color_id TEXT,
+    l_draw_color_id TEXT,
+    color_name TEXT NOT NULL,
+    color_category TEXT,
+    qty INTEGER NOT NULL,
+    weight REAL NOT NULL,
+    UNIQUE (list_id, bl_item_no, color_name)
+);
+CREATE INDEX IF NOT EXISTS parts_by_part ON parts (bl_item_no, color_name);
+'''
+
+## Later rows for the same part replace earlier ones, while keeping the earlier one's position like a dict would
+UPSERT = '''
+INSERT INTO parts (list_id, {fields}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (list_id, bl_item_no, color_name) DO UPDATE SET
+    element_id = excluded.element_id,
+    l_draw_id = excluded.l_draw_id,
+    part_name = excluded.part_name,
+    bl_color_id = excluded.bl_color_id,
+    l_draw_color_id = excluded.l_draw_color_id,
+    color_category = excluded.color_category,
+    qty = excluded.qty,
+    weight = excluded.weight
+'''.format(fields = FIELDS)
+
+
+def _build_values(list_id: int, row: List[str]) -> tuple:
+    return (list_id, row[0], row[1], row[2], row[3], row[4], row[5], row[6], row[7], int(row[8]), float(row[9]))
+
+
+def _placeholders(count: int) -> str:
+    return ', '.join(['?'] * count)
+
+
+class SqliteStore:
+    '''
+    Keeps parts lists in a local SQLite database, so that they only need to be parsed once, and so that they can be
+    operated on without ever loading them into memory. Imported files are stored under a name (their resolved path by
+    default), and are only imported again once they've changed on disk.
+
+    Parts lists that are built up along the way (ex: the results of the Operations) are stored as anonymous lists,
+    which only last as long as the store is open. Save them under a name with save_as() to keep them around.
+    '''
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.connection = sqlite3.connect(str(self.path))
+        self.connection.executescript(SCHEMA)
+
+        ## Clean up after any previous process that didn't close its store
+        self._remove_anonymous_lists()
+        self.connection.commit()
+
+    ## Magic Methods
+
+    def __enter__(self) -> "SqliteStore":
+        return self
+
+
+    def __exit__(self, *args):
+        self.close()
+
+    ## Methods
+
+    def execute(self, sql: str, parameters: Iterable = ()) -> sqlite3.Cursor:
+        return self.connection.execute(sql, tuple(parameters))
+
+
+    def _remove_anonymous_lists(self):
+        self.execute('DELETE FROM parts WHERE list_id IN (SELECT id FROM parts_lists WHERE name IS NULL)')
+        self.execute('DELETE FROM parts_lists WHERE name IS NULL')
+
+
+    def close(self):
+        self._remove_anonymous_lists()
+        self.connection.commit()
+        self.connection.close()
+
+
+    def create_list(self, name: str = None, header: List[str] = None, fingerprint: str = None) -> int:
+        cursor = self.execute(
+            'INSERT INTO parts_lists (name, fingerprint, header) VALUES (?, ?, ?)',
+            (name, fingerprint, json.dumps(header) if header != None else None)
+        )
+
+        return cursor.lastrowid
+
+
+    def get_list_id(self, name: str) -> int:
+        row = self.execute('SELECT id FROM parts_lists WHERE name = ?', (name,)).fetchone()
+        return row[0] if row != None else None
+
+
+    def get_header(self, list_id: int) -> List[str]:
+        row = self.execute('SELECT header FROM parts_lists WHERE id = ?', (list_id,)).fetchone()
+        return json.loads(row[0]) if row != None and row[0] != None else None
+
+
+    def get_names(self) -> List[str]:
+        return [row[0] for row in self.execute('SELECT name FROM parts_lists WHERE name IS NOT NULL ORDER BY name')]
+
+
+    def remove(self, name: str) -> bool:
+        list_id = self.get_list_id(name)
+        if (list_id == None):
+            return False
+
+        self.execute('DELETE FROM parts WHERE list_id = ?', (list_id,))
+        self.execute('DELETE FROM parts_lists WHERE id = ?', (list_id,))
+        self.connection.commit()
+
+        return True
+
+
+    def import_rows(self, name: str, rows: Iterable[List[str]], header: List[str] = None, fingerprint: str = None) -> "SqliteParts":
+        '''
+        Stores the given rows (in Bricklink's .csv layout) as a parts list under the given name, replacing whatever was
+        already stored under it. The rows are inserted in bulk, and never all held in memory at once.
+        '''
+
+        self.remove(name)
+        list_id = self.create_list(name, header, fingerprint)
+        self.connection.executemany(UPSERT, (_build_values(list_id, row) for row in rows))
+        self.connection.commit()
+
+        return SqliteParts(self, list_id, read_only = True)
+
+
+    def import_file(self, path: Path, name: str = None) -> "SqliteParts":
+        '''
+        Imports a Bricklink parts list .csv (or .blpl) file, unless it's already been imported and hasn't changed
+        since. Returns the stored parts, which are read-only.
+        '''
+
+        path = Path(path)
+        name = name if name != None else str(path.resolve())
+        fingerprint = build_fingerprint(path)
+
+        row = self.execute('SELECT id, fingerprint FROM parts_lists WHERE name = ?', (name,)).fetchone()
+        if (row != None and row[1] == fingerprint):
+            return SqliteParts(self, row[0], read_only = True)
+
+        if (path.suffix == binary_format.SUFFIX):
+            header, columnar_parts = binary_format.read_parts(path)
+            return self.import_rows(name, (part.to_csv() for part in columnar_parts.values()), header, fingerprint)
+
+        with compressed_io.open_text_reader(path) as csv_file:
+            reader = csv.reader(csv_file)
+            header = next(reader)
+
+            ## Ignore any rows with a falsy bricklink id (ex: the summary lines at the bottom), and anything that comes after
+            return self.import_rows(name, takewhile(lambda row: row[0] != '', reader), header, fingerprint)
+
+
+    def save_as(self, parts: "SqliteParts", name: str, header: List[str] = None) -> "SqliteParts":
+        '''
+        Copies the given parts into a named list, which is kept around after the store is closed
+        '''
+
+        self.remove(name)
+        list_id = self.create_list(name, header)
+        if (parts.list_id != None):
+            self.execute(
+                'INSERT INTO parts (list_id, {fields}) SELECT ?, {fields} FROM parts WHERE list_id = ? ORDER BY rowid'.format(fields = FIELDS),
+                (list_id, parts.list_id)
+            )
+        self.connection.commit()
+
+        return SqliteParts(self, list_id, read_only = True)
+
+    ## Operations
+
+    def union(self, target: "SqliteParts", sources: List["SqliteParts"]):
+        '''
+        Sums up the quantities and weights of every source's parts into the target. Each part's other fields come from
+        the first source that has it, and parts are ordered by when they first show up, just like Operations.union.
+        '''
+
+        values = ', '.join(['(?, ?)'] * len(sources))
+        self.execute('''
+            WITH inputs (list_id, position) AS (VALUES {values})
+            INSERT INTO parts (list_id, {fields})
+            SELECT ?, {fields} FROM (
+                SELECT p.bl_item_no, p.element_id, p.l_draw_id, p.part_name, p.bl_color_id, p.l_draw_color_id,
+                    p.color_name, p.color_category, SUM(p.qty) AS qty, SUM(p.weight) AS weight,
+                    MIN(i.position) AS first_position, p.rowid AS first_row
+                FROM parts p JOIN inputs i ON p.list_id = i.list_id
+                GROUP BY p.bl_item_no, p.color_name
+            )
+            ORDER BY first_position, first_row
+        '''.format(values = values, fields = FIELDS), [value for position, source in enumerate(sources) for value in (source.list_id, position)] + [target.get_list_id()])
+
+
+    def difference(self, target: "SqliteParts", minuend: "SqliteParts", subtrahends: List["SqliteParts"]):
+        '''
+        Subtracts the subtrahends' quantities and weights from the minuend's parts, and stores any parts that are left
+        over in the target. Each of the minuend's parts is looked up in the subtrahends by its index, so large
+        subtrahends (ex: a whole inventory) are never scanned.
+        '''
+
+        ## Subtracting the same list twice subtracts its quantities twice, like the other engines
+        counts = {}
+        for subtrahend in subtrahends:
+            counts[subtrahend.list_id] = counts.get(subtrahend.list_id, 0) + 1
+
+        values = ', '.join(['(?, ?)'] * len(counts))
+        self.execute('''
+            WITH subtrahends (list_id, times) AS (VALUES {values})
+            INSERT INTO parts (list_id, {fields})
+            SELECT ?, a.bl_item_no, a.element_id, a.l_draw_id, a.part_name, a.bl_color_id, a.l_draw_color_id,
+                a.color_name, a.color_category, a.qty - COALESCE(SUM(b.qty * s.times), 0), a.weight - COALESCE(SUM(b.weight * s.times), 0)
+            FROM parts a
+            LEFT JOIN parts b ON b.bl_item_no = a.bl_item_no AND b.color_name = a.color_name AND b.list_id IN ({placeholders})
+            LEFT JOIN subtrahends s ON s.list_id = b.list_id
+            WHERE a.list_id = ?
+            GROUP BY a.rowid
+            HAVING a.qty - COALESCE(SUM(b.qty * s.times), 0) > 0
+            ORDER BY a.rowid
+        '''.format(values = values, fields = FIELDS, placeholders = _placeholders(len(counts))),
+            [value for item in counts.items() for value in item] + [target.get_list_id()] + list(counts.keys()) + [minuend.list_id]
+        )
+
+
+    def intersection(self, target: "SqliteParts", sources: List["SqliteParts"]):
+        '''
+        Stores the parts that every source has in the target, each with the smallest quantity (and that source's
+        weight) of any of them. Only the smallest source's parts are read, and the rest are probed by their index.
+        '''
+
+        list_ids = list(dict.fromkeys(source.list_id for source in sources))
+        smallest = min(sources, key = len)
+
+        self.execute('''
+            INSERT INTO parts (list_id, {fields})
+            SELECT ?, {fields} FROM (
+                SELECT p.bl_item_no, p.element_id, p.l_draw_id, p.part_name, p.bl_color_id, p.l_draw_color_id,
+                    p.color_name, p.color_category, MIN(p.qty) AS qty, p.weight, s.rowid AS first_row
+                FROM parts s
+                JOIN parts p ON p.bl_item_no = s.bl_item_no AND p.color_name = s.color_name AND p.list_id IN ({placeholders})
+                WHERE s.list_id = ?
+                GROUP BY s.rowid
+                HAVING COUNT(DISTINCT p.list_id) = ?
+            )
+            ORDER BY first_row
+        '''.format(fields = FIELDS, placeholders = _placeholders(len(list_ids))), [target.get_list_id()] + list_ids + [smallest.list_id, len(list_ids)])
+
+
+def can_run_in_sql(*parts_lists) -> bool:
+    '''
+    Whether or not the Operations can run on the given PartsLists as SQL queries, which is only the case when all of
+    them are kept in the same SqliteStore
+    '''
+
+    parts = [getattr(parts_list, 'parts', None) for parts_list in parts_lists]
+    if (len(parts) == 0 or not all(isinstance(part, SqliteParts) and part.list_id != None for part in parts)):
+        return False
+
+    return len(set(id(part.store) for part in parts)) == 1
+
+
+class _SqliteValuesView(ValuesView):
+    ## Read every Part in a single query, rather than looking each one up by its id
+    def __iter__(self) -> Iterator[Part]:
+        return self._mapping.iter_parts()
+
+
+class SqliteParts(MutableMapping):
+    '''
+    A drop-in replacement for the PartsList.parts dict (part id -> Part), for a single parts list in a SqliteStore.
+    Nothing is held in memory, every access goes to the database.
+
+    Like ColumnarParts, Parts handed out by this mapping are effectively snapshots. Changes made to them need to be
+    written back via assignment (ex: parts[part_id] = part). Imported lists are read-only, copy() them first.
+    '''
+
+    def __init__(self, store: SqliteStore, list_id: int = None, read_only: bool = False):
+        self.store = store
+        self.list_id = list_id # anonymous lists are only created once something is written to them
+        self.read_only = read_only
+
+    ## Magic Methods
+
+    def __getitem__(self, part_id: str) -> Part:
+        row = None
+        if (self.list_id != None):
+            row = self.store.execute(
+                'SELECT {} FROM parts WHERE list_id = ? AND bl_item_no = ? AND color_name = ?'.format(FIELDS),
+                (self.list_id, *Part.split_id(part_id))
+            ).fetchone()
+
+        if (row == None):
+            raise KeyError(part_id)
+
+        return Part(row)
+
+
+    def __setitem__(self, part_id: str, part: Part):
+        self._check_writable()
+        self.store.execute(UPSERT, _build_values(self.get_list_id(), part.to_csv()))
+
+
+    def __delitem__(self, part_id: str):
+        self._check_writable()
+        cursor = None
+        if (self.list_id != None):
+            cursor = self.store.execute('DELETE FROM parts WHERE list_id = ? AND bl_item_no = ? AND color_name = ?', (self.list_id, *Part.split_id(part_id)))
+
+        if (cursor == None or cursor.rowcount == 0):
+            raise KeyError(part_id)
+
+
+    def __iter__(self) -> Iterator[str]:
+        if (self.list_id == None):
+            return
+
+        ## Fetch the ids up front, so that the parts can be changed while they're being iterated over
+        rows = self.store.execute('SELECT bl_item_no, color_name FROM parts WHERE list_id = ? ORDER BY rowid', (self.list_id,)).fetchall()
+        for bl_item_no, color_name in rows:
+            yield Part.build_id(bl_item_no, color_name)
+
+
+    def __len__(self) -> int:
+        if (self.list_id == None):
+            return 0
+
+        return self.store.execute('SELECT COUNT(*) FROM parts WHERE list_id = ?', (self.list_id,)).fetchone()[0]
+
+
+    def __contains__(self, part_id: str) -> bool:
+        if (self.list_id == None):
+            return False
+
+        return self.store.execute(
+            'SELECT 1 FROM parts WHERE list_id = ? AND bl_item_no = ? AND color_name = ?',
+            (self.list_id, *Part.split_id(part_id))
+        ).fetchone() != None
+
+    ## Properties
+
+    @property
+    def header(self) -> List[str]:
+        return self.store.get_header(self.list_id) if self.list_id != None else None
+
+    ## Methods
+
+    def _check_writable(self):
+        if (self.read_only):
+            raise RuntimeError('Unable to modify a stored parts list, copy() it first.')
+
+
+    def get_list_id(self) -> int:
+        if (self.list_id == None):
+            self.list_id = self.store.create_list()
+
+        return self.list_id
+
+
+    def values(self) -> ValuesView:
+        return _SqliteValuesView(self)
+
+
+    def iter_parts(self) -> Iterator[Part]:
+        if (self.list_id == None):
+            return
+
+        for row in self.store.execute('SELECT {} FROM parts WHERE list_id = ? ORDER BY rowid'.format(FIELDS), (self.list_id,)):
+            yield Part(row)
+
+
+    def iter_quantities(self) -> Iterator[Tuple[str, int, float]]:
+        '''
+        Yields (part id, qty, weight) for every part, without building any Parts
+        '''
+
+        if (self.list_id == None):
+            return
+
+        ## Streamed straight from the database, so lists don't need to fit in memory
+        rows = self.store.execute('SELECT bl_item_no, color_name, qty, weight FROM parts WHERE list_id = ? ORDER BY rowid', (self.list_id,))
+        for bl_item_no, color_name, qty, weight in rows:
+            yield Part.build_id(bl_item_no, color_name), qty, weight
+
+
+    def get_qty(self, part_id: str) -> int:
+        row = None
+        if (self.list_id != None):
+            row = self.store.execute(
+                'SELECT qty FROM parts WHERE list_id = ? AND bl_item_no = ? AND color_name = ?',
+                (self.list_id, *Part.split_id(part_id))
+            ).fetchone()
+
+        if (row == None):
+            raise KeyError(part_id)
+
+        return row[0]
+
+
+    def get_summary(self) -> PartsSummary:
+        ## Aggregated by the database, without reading any of the parts
+        if (self.list_id == None):
+            return PartsSummary(0, 0, 0.0)
+
+        unique_parts, total_qty, total_weight = self.store.execute(
+            'SELECT COUNT(*), COALESCE(SUM(qty), 0), COALESCE(SUM(weight), 0.0) FROM parts WHERE list_id = ?',
+            (self.list_id,)
+        ).fetchone()
+
+        return PartsSummary(unique_parts, total_qty, total_weight)
+
+
+    def copy(self) -> "SqliteParts":
+        '''
+        Copies the parts into a new, writable anonymous list. The copy is made inside of the database.
+        '''
+
+        copy = SqliteParts(self.store)
+        if (self.list_id != None):
+            self.store.execute(
+                'INSERT INTO parts (list_id, {fields}) SELECT ?, {fields} FROM parts WHERE list_id = ? ORDER BY rowid'.format(fields = FIELDS),
+                (copy.get_list_id(), self.list_id)
+            )
+
+        return copy
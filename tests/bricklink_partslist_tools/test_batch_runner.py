@@ -0,0 +1,118 @@
+import json
+import pytest
+import sys
+from pathlib import Path
+
+## Lazily access classes inside the src directory (and suppress pylint errors when it can't resolve the import)
+sys.path.append(str(Path('src').absolute()))
+# pylint: disable=import-error
+from batch_runner import BatchRunner, load_manifest
+from parts_list import PartsList
+from operations import Operations
+from parts_list_cache import PartsListCache
+# pylint: enable=import-error
+
+
+class TestBatchRunner:
+    ## Methods
+
+    def write_manifest(self, path: Path, jobs: list) -> Path:
+        path.write_text(json.dumps({'jobs': jobs}))
+        return path
+
+    ## Tests
+
+    def test_load_manifest(self, tmp_path):
+        manifest_path = self.write_manifest(tmp_path / 'manifest.json', [
+            {'name': 'missing', 'operation': 'missing-parts', 'unowned': ['a.csv'], 'owned': ['b.csv', 'c.csv'], 'save_path': 'out.csv', 'save_format': 'CSV'},
+            {'operation': 'merge', 'unowned': ['a.csv'], 'any_color': ['Red']}
+        ])
+
+        jobs = load_manifest(manifest_path)
+
+        assert jobs[0].name == 'missing'
+        assert jobs[0].unowned_paths == [(tmp_path / 'a.csv').resolve()]
+        assert jobs[0].save_path == tmp_path / 'out.csv'
+        assert jobs[0].save_format.value == 'csv'
+        assert jobs[1].name == 'job-1'
+        assert jobs[1].any_colors == ['Red']
+
+
+    def test_load_yaml_manifest(self, tmp_path):
+        yaml = pytest.importorskip('yaml')
+        manifest_path = tmp_path / 'manifest.yaml'
+        manifest_path.write_text(yaml.safe_dump({'jobs': [{'operation': 'intersection', 'owned': ['a.csv', 'b.csv']}]}))
+
+        jobs = load_manifest(manifest_path)
+
+        assert jobs[0].operation == 'intersection'
+        assert len(jobs[0].paths) == 2
+
+
+    def test_load_invalid_manifest(self, tmp_path):
+        with pytest.raises(RuntimeError):
+            load_manifest(self.write_manifest(tmp_path / 'manifest.json', [{'operation': 'explode', 'owned': ['a.csv']}]))
+
+        with pytest.raises(RuntimeError):
+            load_manifest(self.write_manifest(tmp_path / 'manifest.json', [{'operation': 'missing-parts', 'unowned': ['a.csv']}]))
+
+        with pytest.raises(RuntimeError):
+            load_manifest(self.write_manifest(tmp_path / 'manifest.json', [{'operation': 'merge', 'owned': ['a.csv'], 'save_path': 'out.csv'}]))
+
+        ## A bare string would otherwise be treated as a list of single character colors
+        with pytest.raises(RuntimeError):
+            load_manifest(self.write_manifest(tmp_path / 'manifest.json', [{'operation': 'merge', 'owned': ['a.csv'], 'any_color': 'Red'}]))
+
+        with pytest.raises(RuntimeError):
+            load_manifest(self.write_manifest(tmp_path / 'manifest.json', [{'operation': 'merge', 'owned': ['a.csv'], 'any_color': ['Red', 5]}]))
+
+
+    @pytest.mark.parametrize('workers', [1, 2])
+    def test_run(self, tmp_path, workers, complex_csv_path_factory, one_red_2x4_and_2x2_brick_csv_path_factory, one_red_2x2_brick_csv_path_factory):
+        complex_path = str(complex_csv_path_factory().absolute())
+        bricks_path = str(one_red_2x4_and_2x2_brick_csv_path_factory().absolute())
+        brick_path = str(one_red_2x2_brick_csv_path_factory().absolute())
+        jobs = load_manifest(self.write_manifest(tmp_path / 'manifest.json', [
+            {'name': 'missing', 'operation': 'missing-parts', 'unowned': [complex_path], 'owned': [bricks_path, brick_path], 'save_path': 'missing.csv', 'save_format': 'csv'},
+            {'name': 'merge', 'operation': 'merge', 'unowned': [complex_path, bricks_path], 'any_color': ['Red']},
+            {'name': 'intersection', 'operation': 'intersection', 'owned': [bricks_path, brick_path]},
+            {'name': 'broken', 'operation': 'merge', 'owned': [str(tmp_path / 'nonexistent.csv')]}
+        ]))
+
+        cache = PartsListCache(tmp_path / 'cache')
+        results = BatchRunner(workers = workers, cache = cache).run(jobs)
+
+        expected_missing = Operations.difference(PartsList(Path(complex_path)), Operations.union(PartsList(Path(bricks_path)), PartsList(Path(brick_path))))
+        assert [result.name for result in results] == ['missing', 'merge', 'intersection', 'broken']
+        assert results[0].parts_list == expected_missing
+        assert PartsList(tmp_path / 'missing.csv').parts.keys() == expected_missing.parts.keys()
+        assert results[1].parts_list.get_total_qty() == Operations.union(PartsList(Path(complex_path)), PartsList(Path(bricks_path))).get_total_qty()
+        assert results[2].error == None
+        assert results[3].parts_list == None
+        assert 'nonexistent.csv' in results[3].error
+
+        ## Each distinct file was only loaded once, and any-color didn't leak into the shared PartsLists
+        assert cache.misses == 3
+        assert all(part.color_name == 'Red' for part in results[2].parts_list.parts.values())
+
+
+    @pytest.mark.parametrize('workers', [1, 2])
+    def test_run_corrupt_file(self, tmp_path, workers, complex_csv_path_factory, corrupt_csv_path_factory):
+        complex_path = str(complex_csv_path_factory().absolute())
+        jobs = load_manifest(self.write_manifest(tmp_path / 'manifest.json', [
+            {'name': 'corrupt', 'operation': 'merge', 'owned': [complex_path, str(corrupt_csv_path_factory().absolute())]},
+            {'name': 'merge', 'operation': 'merge', 'owned': [complex_path], 'any_color': ['Red']},
+            {'name': 'intersection', 'operation': 'intersection', 'owned': [complex_path], 'any_color': ['Black']}
+        ]))
+
+        results = BatchRunner(workers = workers).run(jobs)
+
+        ## The corrupt file only fails its own job
+        assert results[0].parts_list == None
+        assert 'corrupt_qty.csv' in results[0].error
+        assert results[1].error == None and results[2].error == None
+
+        expected = PartsList(Path(complex_path))
+        expected.set_any_color(['Red'])
+        assert results[1].parts_list == expected
+        assert '3003:Red' not in results[1].parts_list.parts and '3003:Red' in results[2].parts_list.parts
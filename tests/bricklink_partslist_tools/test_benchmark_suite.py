@@ -0,0 +1,58 @@
+import json
+import pytest
+import sys
+from pathlib import Path
+
+## Lazily access modules inside the src and benchmarks directories (and suppress pylint errors when it can't resolve the import)
+sys.path.append(str(Path('src').absolute()))
+sys.path.append(str(Path('benchmarks').absolute()))
+# pylint: disable=import-error
+from enums import Engine
+from operations import Operations
+from parts_list import PartsList
+from benchmark_suite import BENCHMARKS, run_suite, time_benchmark
+from generate_parts_list import generate_parts_list
+# pylint: enable=import-error
+
+
+class TestBenchmarkSuite:
+    ## Tests
+
+    def test_generate_parts_list(self, tmp_path):
+        path: Path = tmp_path / 'generated.csv'
+
+        generate_parts_list(path, 500, seed = 3)
+        parts_list: PartsList = PartsList(path)
+
+        assert len(parts_list.parts) == 500
+
+
+    def test_generate_parts_list_deterministic(self, tmp_path):
+        path_a: Path = tmp_path / 'a.csv'
+        path_b: Path = tmp_path / 'b.csv'
+
+        generate_parts_list(path_a, 100, seed = 3)
+        generate_parts_list(path_b, 100, seed = 3)
+
+        assert path_a.read_text() == path_b.read_text()
+
+
+    def test_run_suite(self):
+        results = run_suite([50], repeat = 1, log = lambda message: None)
+
+        assert len(results['results']) == len(BENCHMARKS)
+        assert all(result['size'] == 50 for result in results['results'])
+        assert not any('error' in result for result in results['results'])
+        assert json.loads(json.dumps(results)) == results
+
+
+    @pytest.mark.parametrize('operation', ['union', 'difference', 'intersection'])
+    def test_default_engine_is_fastest_for_two_lists(self, tmp_path, operation):
+        generate_parts_list(tmp_path / 'a.csv', 5000, seed = 1)
+        generate_parts_list(tmp_path / 'b.csv', 5000, seed = 2)
+        parts_lists = [PartsList(tmp_path / 'a.csv'), PartsList(tmp_path / 'b.csv')]
+        function = getattr(Operations, operation)
+
+        ## The default engine should be the faster one for the common case of operating on a couple of lists
+        timings = {engine: time_benchmark(lambda _: lambda: function(*parts_lists, engine = engine), None, 5)['best_seconds'] for engine in Engine}
+        assert timings[Operations.engine] <= min(timings.values()) * 1.25
@@ -0,0 +1,147 @@
+import pickle
+import pytest
+import sys
+from copy import deepcopy
+from pathlib import Path
+from typing import List
+
+## Lazily access classes inside the src directory (and suppress pylint errors when it can't resolve the import)
+sys.path.append(str(Path('src').absolute()))
+# pylint: disable=import-error
+import binary_format
+from columnar_parts import ColumnarParts
+from enums import StorageMode
+from parts_list import PartsList
+from operations import Operations
+# pylint: enable=import-error
+
+
+class TestBinaryFormat:
+
+    def check_parts_list_parts_equality(self, parts_list_a: PartsList, parts_list_b: PartsList) -> bool:
+        if (list(parts_list_a.parts.keys()) != list(parts_list_b.parts.keys())):
+            return False
+
+        return all(parts_list_a.parts[part_id] == parts_list_b.parts[part_id] for part_id in parts_list_a.parts)
+
+    ## Fixtures
+
+    @pytest.fixture
+    def complex_binary_path_factory(self, tmp_path, complex_parts_list_factory):
+        def _get_path():
+            path: Path = tmp_path / 'complex.blpl'
+            if (not path.exists()):
+                complex_parts_list_factory().export_binary(path)
+
+            return path
+
+        return _get_path
+
+    ## Tests
+
+    def test_export_binary(self, tmp_path, complex_parts_list_factory):
+        path: Path = tmp_path / 'test-binary.blpl'
+        parts_list: PartsList = complex_parts_list_factory()
+
+        assert not path.exists()
+
+        parts_list.export_binary(path)
+
+        assert path.exists()
+
+        exported_parts_list: PartsList = PartsList(path)
+
+        assert exported_parts_list._header == parts_list._header
+        assert self.check_parts_list_parts_equality(parts_list, exported_parts_list)
+
+
+    def test_import_binary_columnar(self, tmp_path, complex_columnar_parts_list_factory):
+        path: Path = tmp_path / 'test-binary.blpl'
+        parts_list: PartsList = complex_columnar_parts_list_factory()
+
+        ## Make sure tombstoned rows don't leak into the file
+        del parts_list.parts['3003:Red']
+        parts_list.export_binary(path)
+
+        exported_parts_list: PartsList = PartsList(path, StorageMode.COLUMNAR)
+
+        assert isinstance(exported_parts_list.parts, ColumnarParts)
+        assert len(exported_parts_list.parts) == 82
+        assert self.check_parts_list_parts_equality(parts_list, exported_parts_list)
+
+
+    def test_export_empty_binary(self, tmp_path, empty_parts_list_factory):
+        path: Path = tmp_path / 'test-binary.blpl'
+
+        empty_parts_list_factory().export_binary(path)
+        exported_parts_list: PartsList = PartsList(path)
+
+        assert exported_parts_list._header == None
+        assert len(exported_parts_list.parts) == 0
+
+
+    def test_import_invalid_binary(self, tmp_path):
+        path: Path = tmp_path / 'test-binary.blpl'
+        path.write_bytes(b'not a parts list')
+
+        runtime_error_encountered = False
+        try:
+            PartsList(path)
+        except RuntimeError:
+            runtime_error_encountered = True
+
+        assert runtime_error_encountered
+
+
+    def test_mapped_parts(self, complex_binary_path_factory, complex_parts_list_factory):
+        parts_list: PartsList = complex_parts_list_factory()
+        mapped_parts_list: PartsList = PartsList(complex_binary_path_factory(), StorageMode.MAPPED)
+
+        assert isinstance(mapped_parts_list.parts, binary_format.MappedParts)
+        assert mapped_parts_list._header == parts_list._header
+        assert self.check_parts_list_parts_equality(parts_list, mapped_parts_list)
+        assert mapped_parts_list.get_total_qty() == parts_list.get_total_qty()
+        assert mapped_parts_list.parts.get('3001:Red') == None
+
+        mapped_parts_list.parts.close()
+
+
+    def test_mapped_parts_read_only(self, complex_binary_path_factory):
+        mapped_parts = binary_format.MappedParts(complex_binary_path_factory())
+
+        type_error_encountered = False
+        try:
+            mapped_parts['3003:Red'] = mapped_parts['3003:Red']
+        except TypeError:
+            type_error_encountered = True
+
+        assert type_error_encountered
+
+        mapped_parts.close()
+
+
+    def test_mapped_parts_copies(self, complex_binary_path_factory):
+        mapped_parts = binary_format.MappedParts(complex_binary_path_factory())
+
+        columnar_parts = deepcopy(mapped_parts)
+        unpickled_parts = pickle.loads(pickle.dumps(mapped_parts))
+
+        assert isinstance(columnar_parts, ColumnarParts)
+        assert isinstance(unpickled_parts, binary_format.MappedParts)
+        assert list(columnar_parts.items()) == list(mapped_parts.items())
+        assert list(unpickled_parts.items()) == list(mapped_parts.items())
+
+        mapped_parts.close()
+        unpickled_parts.close()
+
+
+    def test_mapped_operations(self, complex_binary_path_factory, red_2x2_and_2x4_brick_parts_list_factory):
+        mapped_parts_list: PartsList = PartsList(complex_binary_path_factory(), StorageMode.MAPPED)
+
+        difference: PartsList = Operations.difference(mapped_parts_list, red_2x2_and_2x4_brick_parts_list_factory())
+        assert difference.parts.get('3003:Red').qty == 31
+
+        ## Clones share the mapped parts rather than copying them
+        clone: PartsList = mapped_parts_list.clone()
+        assert isinstance(clone.parts.base, binary_format.MappedParts)
+        assert clone == mapped_parts_list
@@ -0,0 +1,141 @@
+import pytest
+import sys
+from array import array
+from pathlib import Path
+from typing import List
+
+## Lazily access classes inside the src directory (and suppress pylint errors when it can't resolve the import)
+sys.path.append(str(Path('src').absolute()))
+# pylint: disable=import-error
+from columnar_parts import ColumnarParts, StringPool
+from enums import Engine, StorageMode
+from part import Part
+from parts_list import PartsList
+from operations import Operations
+# pylint: enable=import-error
+
+
+class TestColumnarParts:
+    ## Fixtures
+
+    @pytest.fixture
+    def one_red_2x4_brick_factory(self):
+        def _init_bricks():
+            return Part(['3001', '300121', '3001', 'Brick 2 x 4', '5', '4', 'Red', 'Solid Colors', '1', '2.32'])
+
+        return _init_bricks
+
+    ## Tests
+
+    def test_string_pool(self):
+        pool = StringPool()
+
+        assert pool.encode('Red') == 0
+        assert pool.encode('Blue') == 1
+        assert pool.encode('Red') == 0
+        assert pool.decode(1) == 'Blue'
+        assert len(pool) == 2
+
+
+    def test_set_get(self, one_red_2x4_brick_factory):
+        parts = ColumnarParts()
+        part: Part = one_red_2x4_brick_factory()
+
+        parts[part.id] = part
+
+        assert len(parts) == 1
+        assert part.id in parts
+        assert parts[part.id] == part
+
+
+    def test_overwrite(self, one_red_2x4_brick_factory):
+        parts = ColumnarParts()
+        part: Part = one_red_2x4_brick_factory()
+        parts[part.id] = part
+
+        part.qty = 7
+        parts[part.id] = part
+
+        assert len(parts) == 1
+        assert parts[part.id].qty == 7
+
+
+    def test_delete_keeps_order(self, complex_parts_list_factory):
+        dict_parts = complex_parts_list_factory().parts
+        parts = ColumnarParts()
+        for part_id, part in dict_parts.items():
+            parts[part_id] = part
+
+        ## Delete enough to trigger a compaction
+        part_ids = list(dict_parts.keys())
+        for part_id in part_ids[::2] + part_ids[1:60:2]:
+            del parts[part_id]
+            del dict_parts[part_id]
+
+        assert list(parts.keys()) == list(dict_parts.keys())
+        assert all(parts[part_id] == part for part_id, part in dict_parts.items())
+
+
+    def test_columnar_import(self, complex_parts_list_factory, complex_columnar_parts_list_factory):
+        parts_list: PartsList = complex_parts_list_factory()
+        columnar_parts_list: PartsList = complex_columnar_parts_list_factory()
+
+        assert isinstance(columnar_parts_list.parts, ColumnarParts)
+        assert parts_list == columnar_parts_list
+        assert all(columnar_parts_list.parts[part_id] == part for part_id, part in parts_list.parts.items())
+
+
+    def test_columnar_operations(self, complex_columnar_parts_list_factory, red_2x2_and_2x4_brick_parts_list_factory):
+        union: PartsList = Operations.union(complex_columnar_parts_list_factory(), complex_columnar_parts_list_factory())
+        assert union.storage == StorageMode.COLUMNAR
+        assert union.parts.get('3003:Red').qty == 64
+
+        difference: PartsList = Operations.difference(complex_columnar_parts_list_factory(), red_2x2_and_2x4_brick_parts_list_factory())
+        assert len(difference.parts) == 83
+        assert difference.parts.get('3003:Red').qty == 31
+
+
+    def test_gather(self, complex_parts_list_factory, one_red_2x4_brick_factory):
+        source_a = ColumnarParts.from_parts(complex_parts_list_factory().parts)
+        part_id_a, part_id_c = list(source_a.keys())[:2]
+        source_b = ColumnarParts()
+        part: Part = one_red_2x4_brick_factory()
+        part.part_name = 'Renamed Brick'
+        source_b['renamed'] = part
+
+        ## Rows from both sources, interleaved, with their quantities and weights replaced
+        rows = [source_a.row_of(part_id_a), 0, source_a.row_of(part_id_c)]
+        gathered = ColumnarParts.gather([source_a, source_b], [0, 1, 0], rows, [part_id_a, 'renamed', part_id_c], array('q', [1, 2, 3]), array('d', [0.5, 1.0, 1.5]))
+
+        assert list(gathered.keys()) == [part_id_a, 'renamed', part_id_c]
+        for part_id, source, qty, weight in [(part_id_a, source_a, 1, 0.5), ('renamed', source_b, 2, 1.0), (part_id_c, source_a, 3, 1.5)]:
+            expected: Part = source[part_id]
+            expected.qty = qty
+            expected.weight = weight
+            assert gathered[part_id] == expected and gathered[part_id].part_name == expected.part_name
+
+        ## The pools are copies, so the sources are left alone
+        assert all(gathered.get_pool(field) is not source_a.get_pool(field) for field in ColumnarParts.STRING_FIELDS)
+        assert 'Renamed Brick' in gathered.get_pool('part_name').strings
+        assert 'Renamed Brick' not in source_a.get_pool('part_name').strings
+
+
+    @pytest.mark.parametrize('engine', [Engine.LOOP, Engine.BATCHED])
+    def test_columnar_operations_match_dict(self, complex_csv_path_factory, one_red_2x4_and_2x2_brick_csv_path_factory, one_red_2x2_brick_csv_path_factory, engine):
+        paths = [complex_csv_path_factory(), one_red_2x4_and_2x2_brick_csv_path_factory(), one_red_2x2_brick_csv_path_factory()]
+        columnar = [PartsList(path, StorageMode.COLUMNAR) for path in paths]
+        loaded = [PartsList(path) for path in paths]
+
+        results = [
+            (Operations.union(*columnar, engine = engine), Operations.union(*loaded, engine = engine)),
+            (Operations.difference(columnar[0], columnar[1], engine = engine), Operations.difference(loaded[0], loaded[1], engine = engine)),
+            (Operations.difference_all(columnar[0], columnar[1], columnar[2], engine = engine), Operations.difference_all(loaded[0], loaded[1], loaded[2], engine = engine)),
+            (Operations.intersection(columnar[1], columnar[0], columnar[2], engine = engine), Operations.intersection(loaded[1], loaded[0], loaded[2], engine = engine))
+        ]
+
+        ## Results are built straight from the columns, and still match the dict storage's part for part
+        for columnar_result, result in results:
+            assert isinstance(columnar_result.parts, ColumnarParts)
+            assert list(columnar_result.parts.keys()) == list(result.parts.keys())
+            assert all(columnar_result.parts[part_id] == part for part_id, part in result.parts.items())
+            assert columnar_result.get_summary() == result.get_summary()
@@ -0,0 +1,86 @@
+import gzip
+import io
+import pytest
+import sys
+from pathlib import Path
+
+## Lazily access classes inside the src directory (and suppress pylint errors when it can't resolve the import)
+sys.path.append(str(Path('src').absolute()))
+# pylint: disable=import-error
+import compressed_io
+from enums import Compression, StorageMode
+from parts_list import PartsList
+from parts_stream import PartsStream
+# pylint: enable=import-error
+
+
+class TestCompressedIo:
+    ## Fixtures
+
+    @pytest.fixture
+    def gzip_csv_path_factory(self, tmp_path, complex_csv_path_factory):
+        def _gzip_csv_path_factory() -> Path:
+            path: Path = tmp_path / 'complex.csv.gz'
+            with gzip.open(path, 'wb') as gzip_file:
+                gzip_file.write(complex_csv_path_factory().read_bytes())
+
+            return path
+
+        return _gzip_csv_path_factory
+
+    ## Tests
+
+    def test_content_suffix(self):
+        assert compressed_io.get_content_suffix(Path('parts.csv.gz')) == '.csv'
+        assert compressed_io.get_content_suffix(Path('parts.csv.zst')) == '.csv'
+        assert compressed_io.get_content_suffix(Path('parts.csv')) == '.csv'
+        assert compressed_io.detect_compression(Path('parts.CSV.GZ')) == Compression.GZIP
+
+
+    @pytest.mark.parametrize('storage', [StorageMode.DICT, StorageMode.COLUMNAR, StorageMode.LAZY])
+    def test_import_gzip(self, storage, gzip_csv_path_factory, complex_csv_path_factory):
+        parts_list = PartsList(gzip_csv_path_factory(), storage)
+        expected = PartsList(complex_csv_path_factory(), storage)
+
+        assert parts_list._header == expected._header
+        assert list(parts_list.iter_quantities()) == list(expected.iter_quantities())
+
+
+    def test_stream_gzip(self, gzip_csv_path_factory, complex_csv_path_factory):
+        assert list(PartsStream(gzip_csv_path_factory()).iter_records()) == list(PartsStream(complex_csv_path_factory()).iter_records())
+
+
+    def test_compressed_binary_rejected(self, tmp_path, complex_parts_list_factory):
+        path: Path = tmp_path / 'complex.blpl.gz'
+        path.write_bytes(b'')
+
+        with pytest.raises(RuntimeError):
+            PartsList(path)
+
+
+    def test_decompressor_chunks(self, monkeypatch):
+        data = bytes(range(256)) * 1000
+        monkeypatch.setattr(compressed_io.ThreadedDecompressor, 'CHUNK_SIZE', 1000)
+
+        reader = compressed_io.ThreadedDecompressor(io.BytesIO(data), max_chunks = 2)
+        with io.BufferedReader(reader, 333) as buffered_reader:
+            assert buffered_reader.read() == data
+
+
+    def test_decompressor_close_early(self, monkeypatch):
+        monkeypatch.setattr(compressed_io.ThreadedDecompressor, 'CHUNK_SIZE', 10)
+
+        reader = compressed_io.ThreadedDecompressor(io.BytesIO(b'x' * 1000), max_chunks = 1)
+        assert reader.read(5) == b'xxxxx'
+        reader.close()
+
+        assert not reader._thread.is_alive()
+
+
+    def test_decompressor_errors(self, tmp_path):
+        path: Path = tmp_path / 'corrupt.csv.gz'
+        path.write_bytes(b'definitely not gzip')
+
+        with pytest.raises(OSError):
+            with compressed_io.open_text_reader(path) as text_file:
+                text_file.read()
@@ -0,0 +1,135 @@
+import pytest
+import sys
+from pathlib import Path
+from typing import List
+
+## Lazily access classes inside the src directory (and suppress pylint errors when it can't resolve the import)
+sys.path.append(str(Path('src').absolute()))
+# pylint: disable=import-error
+from copy_on_write_parts import CopyOnWriteParts
+from enums import Engine, StorageMode
+from part import Part
+from parts_list import PartsList
+from operations import Operations
+# pylint: enable=import-error
+
+
+class TestCopyOnWriteParts:
+    ## Tests
+
+    def test_reads_copy_dict_parts(self, red_2x2_and_2x4_brick_parts_list_factory):
+        base = red_2x2_and_2x4_brick_parts_list_factory().parts
+        parts = CopyOnWriteParts(base)
+
+        ## Reads hand out fresh copies without keeping them around, so changes only stick once they're assigned back
+        part: Part = parts['3001:Red']
+        part.qty = 10
+
+        assert part is not base['3001:Red']
+        assert parts['3001:Red'].qty == 1
+        assert parts.modified_count == 0
+
+        parts['3001:Red'] = part
+
+        assert parts['3001:Red'].qty == 10
+        assert base['3001:Red'].qty == 1
+        assert parts.peek('3003:Red') is base['3003:Red']
+
+
+    def test_writes_and_deletes(self, red_2x2_and_2x4_brick_parts_list_factory, complex_parts_list_factory):
+        base = red_2x2_and_2x4_brick_parts_list_factory().parts
+        parts = CopyOnWriteParts(base)
+        new_part: Part = complex_parts_list_factory().parts['14719:Black']
+
+        del parts['3001:Red']
+        parts[new_part.id] = new_part
+
+        assert list(parts.keys()) == ['3003:Red', '14719:Black']
+        assert len(parts) == 2
+        assert '3001:Red' not in parts
+        assert '3001:Red' in base
+        assert len(base) == 2
+        assert parts.modified_count == 2
+
+        parts['3001:Red'] = base['3001:Red']
+        assert '3001:Red' in parts
+        assert len(parts) == 3
+
+
+    def test_iter_quantities(self, complex_parts_list_factory):
+        base = complex_parts_list_factory().parts
+        parts = CopyOnWriteParts(base)
+
+        part: Part = parts['3003:Red']
+        part.qty = 1
+        parts['3003:Red'] = part
+        del parts['14719:Black']
+
+        quantities = {part_id: qty for part_id, qty, _ in parts.iter_quantities()}
+
+        assert len(quantities) == 82
+        assert quantities['3003:Red'] == 1
+        assert '14719:Black' not in quantities
+
+
+    def test_clone_isolation(self, complex_parts_list_factory):
+        parts_list: PartsList = complex_parts_list_factory()
+        source_part: Part = parts_list.parts['11211:Red']
+        clone: PartsList = parts_list.clone()
+
+        clone_part: Part = clone.parts['3003:Red']
+        clone_part.qty = 1
+        clone.parts['3003:Red'] = clone_part
+        del clone.parts['14719:Black']
+        source_part.qty = 999
+        parts_list.parts['99999:Red'] = parts_list.parts['3003:Red']
+
+        assert parts_list.parts['3003:Red'].qty == 32
+        assert '14719:Black' in parts_list.parts
+        assert clone.parts['11211:Red'].qty == 40
+        assert clone.parts['3003:Red'].qty == 1
+        assert '99999:Red' not in clone.parts
+
+        second_clone: PartsList = clone.clone()
+        del second_clone.parts['3003:Red']
+
+        assert '3003:Red' in clone.parts
+        assert '14719:Black' not in second_clone.parts
+
+
+    def test_clone_leaves_source_alone(self, tmp_path, complex_parts_list_factory):
+        parts_list: PartsList = complex_parts_list_factory()
+        parts = parts_list.parts
+        part_objects = dict(parts)
+
+        clone: PartsList = parts_list.clone()
+        for part_list in (parts_list, clone):
+            list(part_list.parts.values())
+
+        ## The source keeps its own storage, and still hands out the very same Parts
+        assert parts_list.parts is parts and type(parts_list.parts) is dict
+        assert all(parts_list.parts[part_id] is part for part_id, part in part_objects.items())
+        assert clone == parts_list
+
+        ## Clones of read-only storage share it, and don't hold onto anything for reads
+        parts_list.export_binary(tmp_path / 'complex.blpl')
+        mapped_parts_list = PartsList(tmp_path / 'complex.blpl', StorageMode.MAPPED)
+        mapped_parts = mapped_parts_list.parts
+        mapped_clone: PartsList = mapped_parts_list.clone()
+        list(mapped_clone.parts.values())
+
+        assert mapped_parts_list.parts is mapped_parts
+        assert mapped_clone.parts.base is mapped_parts
+        assert mapped_clone.parts.modified_count == 0
+
+
+    def test_loop_operations_on_clones(self, tmp_path, complex_parts_list_factory, red_2x2_and_2x4_brick_parts_list_factory):
+        complex_parts_list: PartsList = complex_parts_list_factory()
+        complex_parts_list.export_binary(tmp_path / 'complex.blpl')
+        parts_list = PartsList(tmp_path / 'complex.blpl', StorageMode.MAPPED)
+
+        difference: PartsList = Operations.difference(parts_list, red_2x2_and_2x4_brick_parts_list_factory(), engine = Engine.LOOP)
+
+        assert difference.parts.get('3003:Red').qty == 31
+        assert parts_list.parts.get('3003:Red').qty == 32
+        assert difference.parts.modified_count == 1
@@ -0,0 +1,78 @@
+import pytest
+import sys
+from pathlib import Path
+from typing import List
+
+## Lazily access classes inside the src directory (and suppress pylint errors when it can't resolve the import)
+sys.path.append(str(Path('src').absolute()))
+# pylint: disable=import-error
+from enums import Engine
+from part import Part
+from parts_list import PartsList
+from operations import Operations
+# pylint: enable=import-error
+
+
+class TestEngines:
+
+    def check_parts_list_parts_equality(self, parts_list_a: PartsList, parts_list_b: PartsList) -> bool:
+        if (list(parts_list_a.parts.keys()) != list(parts_list_b.parts.keys())):
+            return False
+
+        return all(parts_list_a.parts[part_id] == parts_list_b.parts[part_id] for part_id in parts_list_a.parts)
+
+    ## Tests
+
+    def test_default_engine(self):
+        assert Operations.engine == Engine.LOOP
+
+
+    def test_union_engines(self, red_2x2_and_2x4_brick_parts_list_factory, complex_parts_list_factory):
+        parts_lists: List[PartsList] = [red_2x2_and_2x4_brick_parts_list_factory(), complex_parts_list_factory(), complex_parts_list_factory()]
+
+        loop: PartsList = Operations.union(*parts_lists, engine = Engine.LOOP)
+        batched: PartsList = Operations.union(*parts_lists, engine = Engine.BATCHED)
+
+        assert self.check_parts_list_parts_equality(loop, batched)
+
+
+    def test_union_mixed_storage_engines(self, red_2x2_and_2x4_brick_parts_list_factory, complex_parts_list_factory, complex_columnar_parts_list_factory):
+        parts_lists: List[PartsList] = [complex_columnar_parts_list_factory(), red_2x2_and_2x4_brick_parts_list_factory(), complex_parts_list_factory().clone()] * 5
+
+        loop: PartsList = Operations.union(*parts_lists, engine = Engine.LOOP)
+        batched: PartsList = Operations.union(*parts_lists, engine = Engine.BATCHED)
+
+        assert self.check_parts_list_parts_equality(loop, batched)
+        assert batched.parts['3003:Red'].qty == 5 * 65
+
+
+    def test_difference_engines(self, red_2x2_and_2x4_brick_parts_list_factory, complex_parts_list_factory):
+        for parts_list_a, parts_list_b in [
+            (red_2x2_and_2x4_brick_parts_list_factory(), complex_parts_list_factory()),
+            (complex_parts_list_factory(), red_2x2_and_2x4_brick_parts_list_factory()),
+            (complex_parts_list_factory(), complex_parts_list_factory())
+        ]:
+            loop: PartsList = Operations.difference(parts_list_a, parts_list_b, engine = Engine.LOOP)
+            batched: PartsList = Operations.difference(parts_list_a, parts_list_b, engine = Engine.BATCHED)
+
+            assert loop == batched
+            assert self.check_parts_list_parts_equality(loop, batched)
+
+
+    def test_intersection_engines(self, red_2x2_and_2x4_brick_parts_list_factory, complex_parts_list_factory):
+        parts_lists: List[PartsList] = [complex_parts_list_factory(), red_2x2_and_2x4_brick_parts_list_factory()]
+
+        loop: PartsList = Operations.intersection(*parts_lists, engine = Engine.LOOP)
+        batched: PartsList = Operations.intersection(*parts_lists, engine = Engine.BATCHED)
+
+        assert loop == batched
+        assert self.check_parts_list_parts_equality(loop, batched)
+
+
+    def test_batched_difference_detaches_parts(self, complex_parts_list_factory, red_2x2_and_2x4_brick_parts_list_factory):
+        parts_list_a: PartsList = complex_parts_list_factory()
+        result: PartsList = Operations.difference(parts_list_a, red_2x2_and_2x4_brick_parts_list_factory(), engine = Engine.BATCHED)
+
+        part: Part
+        for part_id, part in result.parts.items():
+            assert part is not parts_list_a.parts[part_id]
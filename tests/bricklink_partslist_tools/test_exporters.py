@@ -0,0 +1,97 @@
+import csv
+import gzip
+import io
+import pytest
+import sys
+from pathlib import Path
+
+## Lazily access classes inside the src directory (and suppress pylint errors when it can't resolve the import)
+sys.path.append(str(Path('src').absolute()))
+# pylint: disable=import-error
+import compressed_io
+import exporters
+import merge_join
+from enums import Compression
+from operations import Operations
+from parts_list import PartsList
+from parts_stream import PartsStream
+# pylint: enable=import-error
+
+
+class TestExporters:
+    ## Methods
+
+    def build_expected_csv(self, header: list, rows: list) -> str:
+        expected = io.StringIO(newline = '')
+        writer = csv.writer(expected)
+        writer.writerow(header)
+        writer.writerows(rows)
+
+        return expected.getvalue()
+
+    ## Tests
+
+    def test_export_csv_format(self, tmp_path, complex_parts_list_factory):
+        parts_list: PartsList = complex_parts_list_factory()
+        path = tmp_path / 'export.csv'
+
+        parts_list.export_csv(path)
+
+        expected = self.build_expected_csv(parts_list._header, [part.to_csv() for part in parts_list.parts.values()])
+        with open(path, newline = '') as csv_file:
+            assert csv_file.read() == expected
+
+
+    def test_export_simple_csv_format(self, tmp_path, complex_parts_list_factory):
+        parts_list: PartsList = complex_parts_list_factory()
+        path = tmp_path / 'export.csv'
+
+        parts_list.export_simple_csv(path)
+
+        expected = self.build_expected_csv(['part', 'color', 'quantity'], [part.to_simple_csv() for part in parts_list.parts.values()])
+        with open(path, newline = '') as csv_file:
+            assert csv_file.read() == expected
+
+
+    def test_export_gzip(self, tmp_path, complex_parts_list_factory):
+        parts_list: PartsList = complex_parts_list_factory()
+        plain_path = tmp_path / 'export.csv'
+        gzip_path = tmp_path / 'export.csv.gz'
+
+        parts_list.export_csv(plain_path)
+        parts_list.export_csv(gzip_path)
+
+        with gzip.open(gzip_path, 'rb') as gzip_file:
+            assert gzip_file.read() == plain_path.read_bytes()
+
+
+    def test_export_explicit_compression(self, tmp_path, red_2x2_and_2x4_brick_parts_list_factory):
+        path = tmp_path / 'export.csv'
+
+        red_2x2_and_2x4_brick_parts_list_factory().export_simple_csv(path, Compression.GZIP)
+
+        with gzip.open(path, 'rt') as gzip_file:
+            assert gzip_file.readline().strip() == 'part,color,quantity'
+
+
+    @pytest.mark.skipif(compressed_io.zstandard != None, reason = 'zstandard is installed')
+    def test_export_zstd_requires_zstandard(self, tmp_path, red_2x2_and_2x4_brick_parts_list_factory):
+        with pytest.raises(RuntimeError):
+            red_2x2_and_2x4_brick_parts_list_factory().export_csv(tmp_path / 'export.csv.zst')
+
+
+    def test_stream_merge_join_results(self, tmp_path, complex_parts_list_factory, red_2x2_and_2x4_brick_parts_list_factory):
+        ## Sorted inputs can be merge-joined, and their results written out without ever building a PartsList
+        paths = []
+        for name, parts_list in [('a.csv', complex_parts_list_factory()), ('b.csv', red_2x2_and_2x4_brick_parts_list_factory())]:
+            path = tmp_path / name
+            PartsList.from_parts(sorted(parts_list.parts.values(), key = lambda part: (part.bl_item_no, part.color_name)), parts_list._header).export_csv(path)
+            paths.append(path)
+
+        output_path = tmp_path / 'union.csv'
+        exporters.write_csv(output_path, merge_join.union(*[PartsStream(path) for path in paths]))
+
+        expected = Operations.union(*[PartsList(path) for path in paths])
+        result = PartsList(output_path)
+        assert sorted(result.parts.keys()) == sorted(expected.parts.keys())
+        assert result.get_total_qty() == expected.get_total_qty()
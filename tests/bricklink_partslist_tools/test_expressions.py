@@ -0,0 +1,125 @@
+import pytest
+import sys
+from pathlib import Path
+
+## Lazily access classes inside the src directory (and suppress pylint errors when it can't resolve the import)
+sys.path.append(str(Path('src').absolute()))
+# pylint: disable=import-error
+import expressions
+from enums import Engine
+from expressions import DIFFERENCE, INTERSECTION, LOAD, UNION, Node
+from operations import Operations
+from parts_list import PartsList
+# pylint: enable=import-error
+
+
+class TestExpressions:
+    ## Methods
+
+    def build_inputs(self, complex_csv_path_factory, one_red_2x4_and_2x2_brick_csv_path_factory, one_red_2x2_brick_csv_path_factory, one_red_2x4_brick_csv_path_factory) -> dict:
+        return {
+            'A': complex_csv_path_factory(),
+            'B': one_red_2x4_and_2x2_brick_csv_path_factory(),
+            'C': one_red_2x2_brick_csv_path_factory(),
+            'D': one_red_2x4_brick_csv_path_factory()
+        }
+
+
+    def load(self, path: Path) -> Node:
+        return Node(LOAD, (Path(path).resolve(),))
+
+
+    def get_quantities(self, parts_list: PartsList) -> dict:
+        return {part_id: qty for part_id, qty, _ in parts_list.iter_quantities()}
+
+    ## Tests
+
+    def test_parse_precedence(self):
+        inputs = {'A': 'a.csv', 'B': 'b.csv', 'C': 'c.csv'}
+        a, b, c = self.load('a.csv'), self.load('b.csv'), self.load('c.csv')
+
+        ## Intersection binds tighter, while union and difference go left to right
+        assert expressions.parse_expression('A ∪ B ∩ C', inputs) == Node(UNION, (a, Node(INTERSECTION, (b, c))))
+        assert expressions.parse_expression('A - B + C', inputs) == Node(UNION, (Node(DIFFERENCE, (a, b)), c))
+        assert expressions.parse_expression('A − (B | C)', inputs) == Node(DIFFERENCE, (a, Node(UNION, (b, c))))
+        assert expressions.parse_expression('"a.csv" & \'b.csv\'') == Node(INTERSECTION, (a, b))
+
+
+    @pytest.mark.parametrize('text', ['A ∪', '(A ∪ B', 'A B', 'A ∪ Z', 'A ∪ B)', 'A $ B', ''])
+    def test_parse_errors(self, text):
+        with pytest.raises(RuntimeError):
+            expressions.parse_expression(text, {'A': 'a.csv', 'B': 'b.csv'})
+
+
+    def test_optimize(self):
+        inputs = {'A': 'a.csv', 'B': 'b.csv', 'C': 'c.csv', 'D': 'd.csv'}
+        a, b, c, d = self.load('a.csv'), self.load('b.csv'), self.load('c.csv'), self.load('d.csv')
+
+        def optimize(text: str) -> Node:
+            return expressions.optimize(expressions.parse_expression(text, inputs))
+
+        assert optimize('(A ∪ B) ∪ (C ∪ D)') == Node(UNION, (a, b, c, d))
+        assert optimize('A ∩ (B ∩ A)') == Node(INTERSECTION, (a, b))
+        assert optimize('A ∩ A') == a
+        assert optimize('(A − B) − C') == Node(DIFFERENCE, (a, b, c))
+        assert optimize('A − (B ∪ C) − D') == Node(DIFFERENCE, (a, b, c, d))
+        ## Unions are multisets, so repeated operands are kept
+        assert optimize('A ∪ A') == Node(UNION, (a, a))
+
+
+    def test_plan_shares_subexpressions(self):
+        inputs = {'A': 'a.csv', 'B': 'b.csv', 'C': 'c.csv'}
+        plan = expressions.build_plan(expressions.parse_expression('((A ∪ B) ∩ C) ∪ ((B ∪ A) − C)', inputs))
+
+        ## Each file and the commuted union are only evaluated once
+        operations = [step.node.operation for step in plan]
+        assert operations.count(LOAD) == 3
+        assert operations.count(UNION) == 2
+        assert len(plan) == 7
+
+        ## Steps only ever depend on earlier steps, and know the last step that needs them
+        for index, step in enumerate(plan):
+            assert all(operand_index < index for operand_index in step.inputs)
+            assert step.last_use >= index
+
+
+    @pytest.mark.parametrize('engine', [Engine.LOOP, Engine.BATCHED])
+    def test_run_matches_operations(self, monkeypatch, complex_csv_path_factory, one_red_2x4_and_2x2_brick_csv_path_factory, one_red_2x2_brick_csv_path_factory, one_red_2x4_brick_csv_path_factory, engine):
+        monkeypatch.setattr(Operations, 'engine', engine)
+        inputs = self.build_inputs(complex_csv_path_factory, one_red_2x4_and_2x2_brick_csv_path_factory, one_red_2x2_brick_csv_path_factory, one_red_2x4_brick_csv_path_factory)
+        a, b, c, d = [PartsList(Path(inputs[name])) for name in 'ABCD']
+
+        result = expressions.evaluate('((A ∪ B) − C) − (D ∩ B)', inputs)
+        expected = Operations.difference(Operations.difference(Operations.union(a, b), c), Operations.intersection(d, b))
+
+        assert self.get_quantities(result) == self.get_quantities(expected)
+
+
+    def test_run_any_colors(self, complex_csv_path_factory, one_red_2x4_and_2x2_brick_csv_path_factory, one_red_2x2_brick_csv_path_factory, one_red_2x4_brick_csv_path_factory):
+        inputs = self.build_inputs(complex_csv_path_factory, one_red_2x4_and_2x2_brick_csv_path_factory, one_red_2x2_brick_csv_path_factory, one_red_2x4_brick_csv_path_factory)
+
+        ## Any colors are remapped on the way in, so the output never has any parts left in them
+        result = expressions.evaluate('A ∪ B', inputs, ['Red'])
+        assert not any(part_id.endswith(':Red') for part_id in result.parts)
+
+        expected = Operations.union(PartsList(Path(inputs['A'])), PartsList(Path(inputs['B'])))
+        expected.set_any_color(['Red'])
+        assert self.get_quantities(result) == self.get_quantities(expected)
+
+
+    def test_run_missing_file(self, tmp_path):
+        with pytest.raises(RuntimeError):
+            expressions.evaluate('A ∪ A', {'A': tmp_path / 'missing.csv'})
+
+
+    @pytest.mark.parametrize('engine', [Engine.LOOP, Engine.BATCHED])
+    def test_difference_all(self, complex_parts_list_factory, red_2x2_and_2x4_brick_parts_list_factory, one_red_2x2_brick_csv_path_factory, engine):
+        complex_parts_list: PartsList = complex_parts_list_factory()
+        red_parts_list: PartsList = red_2x2_and_2x4_brick_parts_list_factory()
+        red_2x2_parts_list = PartsList(one_red_2x2_brick_csv_path_factory())
+
+        result = Operations.difference_all(complex_parts_list, red_parts_list, red_2x2_parts_list, engine = engine)
+        expected = Operations.difference(complex_parts_list, Operations.union(red_parts_list, red_2x2_parts_list), engine = engine)
+
+        assert self.get_quantities(result) == self.get_quantities(expected)
+        assert Operations.difference_all(complex_parts_list) is complex_parts_list
@@ -0,0 +1,102 @@
+import pytest
+import sys
+from pathlib import Path
+
+## Lazily access classes inside the src directory (and suppress pylint errors when it can't resolve the import)
+sys.path.append(str(Path('src').absolute()))
+# pylint: disable=import-error
+import fast_csv
+from enums import StorageMode
+from parts_list import PartsList
+# pylint: enable=import-error
+
+HEADER = 'BLItemNo,ElementId,LdrawId,PartName,BLColorId,LDrawColorId,ColorName,ColorCategory,Qty,Weight\n'
+SUMMARY = ',,,,,,,,,\nTotal qty,Total Weight,,,,,,,,\n3,1.5,,,,,,,,\n'
+
+
+class TestFastCsv:
+    ## Methods
+
+    def write_csv(self, path: Path, rows: str, header: str = HEADER, summary: str = SUMMARY) -> Path:
+        path.write_text(header + rows + summary)
+        return path
+
+
+    def load_general(self, path: Path) -> PartsList:
+        parts_list = PartsList(storage = StorageMode.COLUMNAR)
+        parts_list.use_fast_csv = False
+        parts_list._import_list(path)
+
+        return parts_list
+
+
+    def check_matches_general(self, path: Path):
+        fast_parts_list = PartsList(path, StorageMode.COLUMNAR)
+        general_parts_list = self.load_general(path)
+
+        assert fast_parts_list._header == general_parts_list._header
+        assert list(fast_parts_list.parts.keys()) == list(general_parts_list.parts.keys())
+        assert all(fast_parts_list.parts[part_id] == part for part_id, part in general_parts_list.parts.items())
+
+    ## Tests
+
+    def test_matches_general_reader(self, complex_csv_path_factory):
+        assert fast_csv.read_columnar_parts(complex_csv_path_factory()) != None
+        self.check_matches_general(complex_csv_path_factory())
+
+
+    def test_chunk_boundaries(self, monkeypatch, tmp_path, complex_csv_path_factory):
+        ## Chunks much smaller than a row still only ever end on a line break
+        monkeypatch.setattr(fast_csv, 'CHUNK_SIZE', 7)
+        self.check_matches_general(complex_csv_path_factory())
+
+        ## The summary can start a chunk as well
+        rows = '3001,300121,3001,Brick 2 x 4,5,4,Red,Solid Colors,1,2.3\n'
+        monkeypatch.setattr(fast_csv, 'CHUNK_SIZE', len(HEADER) + len(rows))
+        path = self.write_csv(tmp_path / 'boundary.csv', rows)
+
+        assert list(fast_csv.read_columnar_parts(path)[1].keys()) == ['3001:Red']
+        self.check_matches_general(path)
+
+
+    def test_quoted_names(self, tmp_path):
+        path = self.write_csv(tmp_path / 'quoted.csv', (
+            '3001,300121,3001,"Brick 2 x 4, ""Classic""",5,4,Red,Solid Colors,1,2.3\n'
+            '3003,300321,3003,"Brick, 2 x 2",5,4,Red,Solid Colors,1,1.2\n'
+            '3003,300321,3003,Brick 2 x 2,5,4,Red,Solid Colors,1,1.2\n'
+            '3004,300421,3004,"",5,4,Red,Solid Colors,1,0.5\n'
+        ))
+
+        _, parts = fast_csv.read_columnar_parts(path)
+        assert [parts.get_field(row, 'part_name') for row in range(len(parts.qty))] == ['Brick 2 x 4, "Classic"', 'Brick, 2 x 2', 'Brick 2 x 2', '']
+        assert list(parts.qty) == [1, 1, 1, 1]
+        self.check_matches_general(path)
+
+
+    def test_empty(self, tmp_path):
+        path = self.write_csv(tmp_path / 'empty.csv', '')
+
+        assert len(PartsList(path, StorageMode.COLUMNAR).parts) == 0
+        self.check_matches_general(path)
+
+
+    @pytest.mark.parametrize('rows,header', [
+        ('"3001",300121,3001,Brick 2 x 4,5,4,Red,Solid Colors,1,2.3\n', HEADER),
+        ('3001,300121,3001,"Brick\n2 x 4",5,4,Red,Solid Colors,1,2.3\n', HEADER),
+        ('3001,300121,3001,Brick "2 x 4",5,4,Red,Solid Colors,1,2.3\n', HEADER),
+        ('3001,300121,3001,Brick 2 x 4,5,4,Red,Solid Colors,1,2.3\n', HEADER.replace('PartName', 'Name'))
+    ])
+    def test_falls_back(self, tmp_path, rows, header):
+        path = self.write_csv(tmp_path / 'anomaly.csv', rows, header)
+
+        assert fast_csv.read_columnar_parts(path) == None
+        self.check_matches_general(path)
+
+
+    @pytest.mark.parametrize('rows', [
+        '3001,300121,3001,Brick 2 x 4,5,4,Red,Solid Colors,1,2.3\n\n3003,300321,3003,Brick 2 x 2,5,4,Red,Solid Colors,1,1.2\n',
+        '3001,300121,3001,Brick 2 x 4,5,4,Red,Solid Colors,one,2.3\n',
+        '3001,300121,3001,Brick 2 x 4,5,4,Red,1,2.3\n3003,300321,3003,Brick 2 x 2,5,4,Red,Solid Colors,1,1.2,1\n'
+    ])
+    def test_rejects_malformed_rows(self, tmp_path, rows):
+        assert fast_csv.read_columnar_parts(self.write_csv(tmp_path / 'malformed.csv', rows)) == None
@@ -0,0 +1,128 @@
+import pytest
+import shutil
+import sys
+from pathlib import Path
+from typing import List
+
+## Lazily access classes inside the src directory (and suppress pylint errors when it can't resolve the import)
+sys.path.append(str(Path('src').absolute()))
+# pylint: disable=import-error
+from incremental import IncrementalMissingParts
+from parts_list import PartsList
+from operations import Operations
+# pylint: enable=import-error
+
+
+class TestIncrementalMissingParts:
+    ## Methods
+
+    def compute_missing_parts(self, unowned_paths: List[Path], owned_paths: List[Path]) -> PartsList:
+        unowned_parts_list = Operations.union(*[PartsList(path) for path in unowned_paths])
+        owned_parts_list = Operations.union(*[PartsList(path) for path in owned_paths])
+
+        return Operations.difference(unowned_parts_list, owned_parts_list)
+
+
+    def check_parts_list_parts_equality(self, parts_list_a: PartsList, parts_list_b: PartsList) -> bool:
+        if (list(parts_list_a.parts.keys()) != list(parts_list_b.parts.keys())):
+            return False
+
+        return all(
+            part.qty == parts_list_b.parts[part_id].qty and part.weight == pytest.approx(parts_list_b.parts[part_id].weight)
+            for part_id, part in parts_list_a.parts.items()
+        )
+
+    ## Tests
+
+    def test_incremental_updates(self, tmp_path, complex_csv_path_factory, one_red_2x2_brick_csv_path_factory, one_red_2x4_and_2x2_brick_csv_path_factory, one_red_2x4_brick_csv_path_factory):
+        unowned_paths = [complex_csv_path_factory()]
+        owned_path: Path = tmp_path / 'owned.csv'
+        shutil.copy(one_red_2x2_brick_csv_path_factory(), owned_path)
+        owned_paths = [owned_path, one_red_2x4_and_2x2_brick_csv_path_factory()]
+
+        incremental = IncrementalMissingParts(tmp_path / 'state.pickle')
+
+        ## First run
+        result: PartsList = incremental.update(unowned_paths, owned_paths)
+        assert incremental.full_rebuild
+        assert self.check_parts_list_parts_equality(result, self.compute_missing_parts(unowned_paths, owned_paths))
+        assert result.parts['3003:Red'].qty == 30
+
+        ## Nothing changed
+        result = incremental.update(unowned_paths, owned_paths)
+        assert not incremental.full_rebuild
+        assert len(incremental.changed_paths) == 0
+        assert incremental.updated_part_count == 0
+        assert result.parts['3003:Red'].qty == 30
+
+        ## One owned list changed
+        shutil.copy(one_red_2x4_brick_csv_path_factory(), owned_path)
+        result = incremental.update(unowned_paths, owned_paths)
+        assert incremental.changed_paths == [owned_path]
+        assert incremental.unchanged_paths == [owned_paths[1]]
+        assert self.check_parts_list_parts_equality(result, self.compute_missing_parts(unowned_paths, owned_paths))
+        assert result.parts['3003:Red'].qty == 31
+
+        ## One owned list removed
+        result = incremental.update(unowned_paths, owned_paths[1:])
+        assert len(incremental.removed_paths) == 1
+        assert self.check_parts_list_parts_equality(result, self.compute_missing_parts(unowned_paths, owned_paths[1:]))
+
+
+    def test_unowned_change_recomputes(self, tmp_path, complex_csv_path_factory, one_red_2x4_and_2x2_brick_csv_path_factory, one_red_2x2_brick_csv_path_factory):
+        unowned_path: Path = tmp_path / 'unowned.csv'
+        shutil.copy(one_red_2x4_and_2x2_brick_csv_path_factory(), unowned_path)
+        owned_paths = [one_red_2x2_brick_csv_path_factory()]
+
+        incremental = IncrementalMissingParts(tmp_path / 'state.pickle')
+        incremental.update([unowned_path], owned_paths)
+
+        shutil.copy(complex_csv_path_factory(), unowned_path)
+        result: PartsList = incremental.update([unowned_path], owned_paths)
+
+        assert incremental.updated_part_count == 83
+        assert self.check_parts_list_parts_equality(result, self.compute_missing_parts([unowned_path], owned_paths))
+
+
+    def test_rows_are_kept_per_file(self, tmp_path, monkeypatch, complex_csv_path_factory, one_red_2x2_brick_csv_path_factory, one_red_2x4_and_2x2_brick_csv_path_factory, one_red_2x4_brick_csv_path_factory):
+        unowned_paths = [complex_csv_path_factory()]
+        owned_path: Path = tmp_path / 'owned.csv'
+        shutil.copy(one_red_2x2_brick_csv_path_factory(), owned_path)
+        owned_paths = [owned_path, one_red_2x4_and_2x2_brick_csv_path_factory()]
+
+        incremental = IncrementalMissingParts(tmp_path / 'state.pickle')
+        incremental.update(unowned_paths, owned_paths)
+        rows_paths = {path: incremental._get_rows_path(str(Path(path).resolve())) for path in owned_paths}
+        unchanged_rows = rows_paths[owned_paths[1]].read_bytes()
+        assert len(list(incremental.rows_directory.iterdir())) == 2
+
+        ## Only the changed file's rows are read and rewritten, and the already loaded unowned list is reused
+        loaded_keys = []
+        load_rows = incremental._load_rows
+        monkeypatch.setattr(incremental, '_load_rows', lambda key, fingerprint: loaded_keys.append(key) or load_rows(key, fingerprint))
+        unowned_parts_list = PartsList(unowned_paths[0])
+        monkeypatch.setattr('incremental.PartsList', None)
+
+        shutil.copy(one_red_2x4_brick_csv_path_factory(), owned_path)
+        result: PartsList = incremental.update(unowned_paths, owned_paths, unowned_parts_list)
+
+        assert loaded_keys == [str(owned_path.resolve())]
+        assert rows_paths[owned_paths[1]].read_bytes() == unchanged_rows
+        assert self.check_parts_list_parts_equality(result, self.compute_missing_parts(unowned_paths, owned_paths))
+
+
+    def test_stale_rows_rebuild(self, tmp_path, complex_csv_path_factory, one_red_2x2_brick_csv_path_factory, one_red_2x4_brick_csv_path_factory):
+        unowned_paths = [complex_csv_path_factory()]
+        owned_path: Path = tmp_path / 'owned.csv'
+        shutil.copy(one_red_2x2_brick_csv_path_factory(), owned_path)
+
+        incremental = IncrementalMissingParts(tmp_path / 'state.pickle')
+        incremental.update(unowned_paths, [owned_path])
+
+        ## Losing a file's rows (ex: an interrupted run) means its old rows can't be backed out of the union
+        incremental._get_rows_path(str(owned_path.resolve())).unlink()
+        shutil.copy(one_red_2x4_brick_csv_path_factory(), owned_path)
+        result: PartsList = incremental.update(unowned_paths, [owned_path])
+
+        assert incremental.full_rebuild
+        assert self.check_parts_list_parts_equality(result, self.compute_missing_parts(unowned_paths, [owned_path]))
@@ -0,0 +1,111 @@
+import json
+import pytest
+import sys
+from pathlib import Path
+
+## Lazily access classes inside the src directory (and suppress pylint errors when it can't resolve the import)
+sys.path.append(str(Path('src').absolute()))
+# pylint: disable=import-error
+import instrumentation
+from enums import StorageMode
+from operations import Operations
+from parts_list import PartsList
+# pylint: enable=import-error
+
+
+class TestInstrumentation:
+    ## Tests
+
+    def test_no_subscribers_skips_timing(self):
+        with instrumentation.stage('unobserved') as stage:
+            assert(stage == None)
+
+
+    def test_subscribe_and_unsubscribe(self, complex_csv_path_factory):
+        stages = []
+        instrumentation.subscribe(stages.append)
+        try:
+            parts_list = PartsList(complex_csv_path_factory())
+        finally:
+            instrumentation.unsubscribe(stages.append)
+
+        PartsList(complex_csv_path_factory())
+
+        assert(len(stages) == 1)
+        assert(stages[0].name == 'import')
+        assert(stages[0].parts == len(parts_list.parts))
+        assert(stages[0].wall_seconds >= 0 and stages[0].cpu_seconds >= 0)
+
+
+    @pytest.mark.parametrize('storage', [StorageMode.DICT, StorageMode.COLUMNAR, StorageMode.LAZY])
+    def test_import_counts_rows(self, complex_csv_path_factory, storage):
+        path = complex_csv_path_factory()
+
+        with instrumentation.TimingsRecorder() as recorder:
+            parts_list = PartsList(path, storage)
+
+        ## Every row up until the summary lines is parsed
+        assert(recorder.stages[0].rows >= len(parts_list.parts))
+
+
+    def test_operations_are_timed(self, complex_parts_list_factory, red_2x2_and_2x4_brick_parts_list_factory):
+        complex_parts_list: PartsList = complex_parts_list_factory()
+        red_parts_list: PartsList = red_2x2_and_2x4_brick_parts_list_factory()
+
+        with instrumentation.TimingsRecorder() as recorder:
+            union = Operations.union(complex_parts_list, red_parts_list)
+            Operations.difference(union, red_parts_list)
+            Operations.intersection(complex_parts_list, red_parts_list)
+            union.set_any_color(['Red'])
+
+        names = [stage.name for stage in recorder.stages]
+        assert(names == ['union', 'difference', 'intersection', 'set_any_color'])
+        assert(recorder.stages[0].parts == len(union.parts))
+
+
+    def test_nested_stages(self, complex_csv_path_factory):
+        with instrumentation.TimingsRecorder() as recorder:
+            with instrumentation.stage('load'):
+                PartsList(complex_csv_path_factory())
+                PartsList(complex_csv_path_factory())
+
+        ## Stages finish from the inside out, but get reported in the order that they started
+        assert([stage.name for stage in recorder.stages] == ['import', 'import', 'load'])
+        assert([stage.name for stage in recorder._in_start_order()] == ['load', 'import', 'import'])
+        assert(recorder.stages[2].depth == 0 and recorder.stages[0].depth == 1)
+        assert(recorder.stages[2].rows == recorder.stages[0].rows + recorder.stages[1].rows)
+
+
+    def test_stage_records_failures(self):
+        with instrumentation.TimingsRecorder() as recorder:
+            with pytest.raises(RuntimeError):
+                with instrumentation.stage('failing'):
+                    raise RuntimeError()
+
+        assert([stage.name for stage in recorder.stages] == ['failing'])
+
+        ## The stack is left clean for later stages
+        with instrumentation.TimingsRecorder() as recorder:
+            with instrumentation.stage('after'):
+                pass
+
+        assert(recorder.stages[0].depth == 0)
+
+
+    def test_table_and_json(self, tmp_path, complex_csv_path_factory):
+        with instrumentation.TimingsRecorder() as recorder:
+            with instrumentation.stage('load'):
+                PartsList(complex_csv_path_factory())
+
+        table = recorder.format_table().splitlines()
+        assert(table[0].startswith('Stage'))
+        assert(table[1].startswith('load'))
+        assert(table[2].startswith('  import'))
+
+        path = tmp_path / 'timings.json'
+        recorder.write_json(path)
+        with open(path) as json_file:
+            timings = json.load(json_file)
+
+        assert([stage['name'] for stage in timings] == ['load', 'import'])
+        assert(set(timings[1].keys()) == {'name', 'depth', 'wall_seconds', 'cpu_seconds', 'peak_rss_bytes', 'rows', 'parts'})
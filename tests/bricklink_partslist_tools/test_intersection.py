@@ -6,6 +6,7 @@ from typing import Callable, List
 ## Lazily access classes inside the src directory (and suppress pylint errors when it can't resolve the import)
 sys.path.append(str(Path('src').absolute()))
 # pylint: disable=import-error
+from enums import Engine, StorageMode
 from part import Part
 from parts_list import PartsList
 from operations import Operations
@@ -100,8 +101,10 @@ class TestIntersection:
         result: PartsList = Operations.intersection(*parts_lists)
 
         assert isinstance(result, PartsList)
-        assert len(result.parts) == 2
+        assert len(result.parts) == 1
         assert result.parts.get('3003:Red').qty == 1
+        ## The complex list doesn't have any red 2x4 bricks
+        assert '3001:Red' not in result.parts
 
 
     def test_large_intersection(self, red_2x2_and_2x4_brick_parts_list_factory):
@@ -115,3 +118,40 @@ class TestIntersection:
 
         assert result.parts.get('3001:Red').qty == 1
         assert result.parts.get('3003:Red').qty == 1
+
+
+    @pytest.mark.parametrize('engine', [Engine.LOOP, Engine.BATCHED])
+    def test_input_order_independence(self, red_2x2_and_2x4_brick_parts_list_factory, complex_parts_list_factory, one_red_2x2_brick_csv_path_factory, engine):
+        parts_lists: List[PartsList] = [complex_parts_list_factory(), red_2x2_and_2x4_brick_parts_list_factory(), PartsList(one_red_2x2_brick_csv_path_factory())]
+
+        forwards: PartsList = Operations.intersection(*parts_lists, engine = engine)
+        backwards: PartsList = Operations.intersection(*reversed(parts_lists), engine = engine)
+
+        assert list(forwards.parts.keys()) == ['3003:Red']
+        assert list(backwards.parts.keys()) == ['3003:Red']
+        assert forwards.parts['3003:Red'].qty == backwards.parts['3003:Red'].qty == 1
+
+
+    @pytest.mark.parametrize('engine', [Engine.LOOP, Engine.BATCHED])
+    def test_drops_keys_missing_from_later_lists(self, red_2x2_and_2x4_brick_parts_list_factory, one_red_2x4_brick_csv_path_factory, one_red_2x2_brick_csv_path_factory, engine):
+        parts_lists: List[PartsList] = [
+            red_2x2_and_2x4_brick_parts_list_factory(),
+            PartsList(one_red_2x4_brick_csv_path_factory()),
+            PartsList(one_red_2x2_brick_csv_path_factory())
+        ]
+
+        ## Every key is dropped by one list or another
+        result: PartsList = Operations.intersection(*parts_lists, engine = engine)
+
+        assert len(result.parts) == 0
+
+
+    @pytest.mark.parametrize('storage', [StorageMode.COLUMNAR, StorageMode.LAZY])
+    def test_storage_intersection(self, complex_csv_path_factory, red_2x2_and_2x4_brick_parts_list_factory, storage):
+        parts_lists: List[PartsList] = [PartsList(complex_csv_path_factory(), storage), red_2x2_and_2x4_brick_parts_list_factory()]
+
+        result: PartsList = Operations.intersection(*parts_lists, engine = Engine.BATCHED)
+        expected: PartsList = Operations.intersection(*parts_lists, engine = Engine.LOOP)
+
+        assert list(result.parts.keys()) == list(expected.parts.keys())
+        assert all(result.parts[part_id].qty == expected.parts[part_id].qty for part_id in result.parts)
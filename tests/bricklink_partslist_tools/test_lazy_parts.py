@@ -0,0 +1,89 @@
+import sys
+from pathlib import Path
+
+## Lazily access classes inside the src directory (and suppress pylint errors when it can't resolve the import)
+sys.path.append(str(Path('src').absolute()))
+# pylint: disable=import-error
+from enums import StorageMode
+from lazy_parts import LazyParts
+from operations import Operations
+from parts_list import PartsList
+# pylint: enable=import-error
+
+HEADER = 'BLItemNo,ElementId,LdrawId,PartName,BLColorId,LDrawColorId,ColorName,ColorCategory,Qty,Weight\n'
+
+
+class TestLazyParts:
+    ## Methods
+
+    def check_matches_dict(self, parts_list: PartsList, dict_parts_list: PartsList):
+        assert list(parts_list.parts.keys()) == list(dict_parts_list.parts.keys())
+        assert all(parts_list.parts[part_id] == part for part_id, part in dict_parts_list.parts.items())
+
+    ## Tests
+
+    def test_import(self, complex_csv_path_factory):
+        parts_list = PartsList(complex_csv_path_factory(), StorageMode.LAZY)
+
+        assert isinstance(parts_list.parts, LazyParts)
+        assert parts_list._header == PartsList(complex_csv_path_factory())._header
+        self.check_matches_dict(parts_list, PartsList(complex_csv_path_factory()))
+        assert list(parts_list.iter_quantities()) == list(PartsList(complex_csv_path_factory()).iter_quantities())
+
+
+    def test_quoted_names(self, tmp_path):
+        path = tmp_path / 'quoted.csv'
+        path.write_text(HEADER + (
+            '3001,300121,3001,"Brick 2 x 4, ""Classic""",5,4,Red,Solid Colors,1,2.3\n'
+            '3003,300321,3003,"Brick, 2 x 2",5,4,Red,Solid Colors,2,1.2\n'
+            '3003,300321,3003,Brick 2 x 2,5,4,Red,Solid Colors,3,1.2\n'
+        ))
+
+        parts_list = PartsList(path, StorageMode.LAZY)
+
+        assert isinstance(parts_list.parts, LazyParts)
+        assert parts_list.parts['3001:Red'].part_name == 'Brick 2 x 4, "Classic"'
+        assert parts_list.parts['3003:Red'].qty == 3
+        self.check_matches_dict(parts_list, PartsList(path))
+
+
+    def test_falls_back(self, tmp_path):
+        path = tmp_path / 'anomaly.csv'
+        path.write_text(HEADER + '3001,300121,3001,Brick 2 x 4,5,4,"Red",Solid Colors,1,2.3\n')
+
+        parts_list = PartsList(path, StorageMode.LAZY)
+
+        assert parts_list.parts.replaced_count == 1
+        self.check_matches_dict(parts_list, PartsList(path))
+
+
+    def test_parts_are_snapshots(self, red_2x2_and_2x4_brick_parts_list_factory):
+        parts_list = PartsList(red_2x2_and_2x4_brick_parts_list_factory().path, StorageMode.LAZY)
+
+        part = parts_list.parts['3003:Red']
+        part.qty += 10
+        assert parts_list.parts['3003:Red'].qty == 1
+
+        parts_list.parts['3003:Red'] = part
+        assert parts_list.parts['3003:Red'].qty == 11
+        assert parts_list.parts.replaced_count == 1
+        assert dict((part_id, qty) for part_id, qty, _ in parts_list.iter_quantities())['3003:Red'] == 11
+
+
+    def test_operations(self, complex_csv_path_factory, one_red_2x4_and_2x2_brick_csv_path_factory, tmp_path):
+        lazy_a = PartsList(complex_csv_path_factory(), StorageMode.LAZY)
+        lazy_b = PartsList(one_red_2x4_and_2x2_brick_csv_path_factory(), StorageMode.LAZY)
+        dict_a = PartsList(complex_csv_path_factory())
+        dict_b = PartsList(one_red_2x4_and_2x2_brick_csv_path_factory())
+
+        self.check_matches_dict(Operations.union(lazy_a, lazy_b), Operations.union(dict_a, dict_b))
+        self.check_matches_dict(Operations.difference(lazy_a, lazy_b), Operations.difference(dict_a, dict_b))
+        self.check_matches_dict(Operations.intersection(lazy_a, lazy_b), Operations.intersection(dict_a, dict_b))
+
+        lazy_a.set_any_color(['Red'])
+        dict_a.set_any_color(['Red'])
+        self.check_matches_dict(lazy_a, dict_a)
+
+        ## The undecoded fields all make it out when exporting
+        lazy_a.export_csv(tmp_path / 'export.csv')
+        self.check_matches_dict(PartsList(tmp_path / 'export.csv'), dict_a)
@@ -0,0 +1,148 @@
+import pytest
+import sys
+from pathlib import Path
+from typing import Callable, List
+
+## Lazily access classes inside the src directory (and suppress pylint errors when it can't resolve the import)
+sys.path.append(str(Path('src').absolute()))
+# pylint: disable=import-error
+import merge_join
+from enums import Engine
+from part import Part
+from parts_list import PartsList
+from parts_stream import PartsStream
+from operations import Operations
+# pylint: enable=import-error
+
+
+class TestMergeJoin:
+    ## Fixtures
+
+    @pytest.fixture
+    def sorted_csv_path_factory(self, tmp_path) -> Callable:
+        def _build_path(parts_list: PartsList, name: str) -> Path:
+            sorted_parts_list = PartsList.from_parts(
+                sorted(parts_list.parts.values(), key = lambda part: (part.bl_item_no, part.color_name)),
+                parts_list._header
+            )
+
+            path: Path = tmp_path / name
+            sorted_parts_list.export_csv(path)
+
+            return path
+
+        return _build_path
+
+
+    @pytest.fixture
+    def unsorted_csv_path_factory(self, tmp_path, complex_parts_list_factory) -> Callable:
+        def _build_path() -> Path:
+            parts_list: PartsList = complex_parts_list_factory()
+            unsorted_parts_list = PartsList.from_parts(reversed(list(parts_list.parts.values())), parts_list._header)
+
+            path: Path = tmp_path / 'unsorted.csv'
+            unsorted_parts_list.export_csv(path)
+
+            return path
+
+        return _build_path
+
+    ## Methods
+
+    def check_parts_equality(self, parts_list_a: PartsList, parts_list_b: PartsList) -> bool:
+        if (set(parts_list_a.parts.keys()) != set(parts_list_b.parts.keys())):
+            return False
+
+        return all(parts_list_a.parts[part_id] == part for part_id, part in parts_list_b.parts.items())
+
+
+    def check_sorted(self, parts_list: PartsList) -> bool:
+        keys = [(part.bl_item_no, part.color_name) for part in parts_list.parts.values()]
+
+        return keys == sorted(keys)
+
+    ## Tests
+
+    def test_detect_sorted(self, sorted_csv_path_factory, unsorted_csv_path_factory, complex_parts_list_factory):
+        sorted_stream = PartsStream(sorted_csv_path_factory(complex_parts_list_factory(), 'sorted.csv'))
+        unsorted_stream = PartsStream(unsorted_csv_path_factory())
+
+        assert sorted_stream.is_sorted
+        assert not unsorted_stream.is_sorted
+        assert PartsStream(unsorted_csv_path_factory(), is_sorted = True).is_sorted
+
+
+    def test_merge_join_union(self, sorted_csv_path_factory, complex_parts_list_factory, red_2x2_and_2x4_brick_parts_list_factory):
+        path_a = sorted_csv_path_factory(complex_parts_list_factory(), 'a.csv')
+        path_b = sorted_csv_path_factory(red_2x2_and_2x4_brick_parts_list_factory(), 'b.csv')
+
+        result: PartsList = Operations.union(PartsStream(path_a), PartsStream(path_b), PartsStream(path_a))
+        expected: PartsList = Operations.union(PartsList(path_a), PartsList(path_b), PartsList(path_a))
+
+        assert self.check_parts_equality(result, expected)
+        assert self.check_sorted(result)
+        assert result._header == PartsList(path_a)._header
+
+
+    def test_merge_join_difference(self, sorted_csv_path_factory, complex_parts_list_factory, red_2x2_and_2x4_brick_parts_list_factory):
+        path_a = sorted_csv_path_factory(complex_parts_list_factory(), 'a.csv')
+        path_b = sorted_csv_path_factory(red_2x2_and_2x4_brick_parts_list_factory(), 'b.csv')
+
+        for stream_a, stream_b, list_a, list_b in [
+            (PartsStream(path_a), PartsStream(path_b), PartsList(path_a), PartsList(path_b)),
+            (PartsStream(path_b), PartsStream(path_a), PartsList(path_b), PartsList(path_a)),
+            (PartsStream(path_a), PartsStream(path_a), PartsList(path_a), PartsList(path_a))
+        ]:
+            result: PartsList = Operations.difference(stream_a, stream_b)
+            expected: PartsList = Operations.difference(list_a, list_b)
+
+            assert self.check_parts_equality(result, expected)
+            assert self.check_sorted(result)
+
+
+    def test_merge_join_intersection(self, sorted_csv_path_factory, complex_parts_list_factory, red_2x2_and_2x4_brick_parts_list_factory):
+        path_a = sorted_csv_path_factory(complex_parts_list_factory(), 'a.csv')
+        path_b = sorted_csv_path_factory(red_2x2_and_2x4_brick_parts_list_factory(), 'b.csv')
+
+        result: PartsList = Operations.intersection(PartsStream(path_a), PartsStream(path_b))
+
+        ## Only the red 2x2 brick is in both lists
+        assert list(result.parts.keys()) == ['3003:Red']
+        assert result.parts['3003:Red'].qty == 1
+
+        result = Operations.intersection(PartsStream(path_a), PartsStream(path_a))
+        assert self.check_parts_equality(result, PartsList(path_a))
+
+
+    def test_intersection_stream_inputs(self, sorted_csv_path_factory, unsorted_csv_path_factory, complex_parts_list_factory):
+        sorted_path = sorted_csv_path_factory(complex_parts_list_factory(), 'a.csv')
+
+        ## A single sorted stream still comes back as a PartsList
+        result: PartsList = Operations.intersection(PartsStream(sorted_path))
+        assert isinstance(result, PartsList)
+        assert self.check_parts_equality(result, PartsList(sorted_path))
+
+        ## Anything else with a stream in it can't be intersected
+        for parts_lists in [
+            [PartsStream(unsorted_csv_path_factory())],
+            [PartsStream(unsorted_csv_path_factory()), PartsStream(sorted_path)],
+            [PartsStream(sorted_path), complex_parts_list_factory()]
+        ]:
+            with pytest.raises(RuntimeError):
+                Operations.intersection(*parts_lists)
+
+
+    def test_unsorted_streams_fall_back(self, unsorted_csv_path_factory, complex_csv_path_factory):
+        result: PartsList = Operations.union(PartsStream(unsorted_csv_path_factory()), PartsStream(complex_csv_path_factory()))
+
+        assert result.parts['3003:Red'].qty == 64
+
+
+    def test_mislabeled_stream(self, unsorted_csv_path_factory):
+        runtime_error_encountered = False
+        try:
+            list(merge_join.union(PartsStream(unsorted_csv_path_factory(), is_sorted = True)))
+        except RuntimeError:
+            runtime_error_encountered = True
+
+        assert runtime_error_encountered
@@ -0,0 +1,76 @@
+import pytest
+import sys
+from pathlib import Path
+from typing import List
+
+## Lazily access classes inside the src directory (and suppress pylint errors when it can't resolve the import)
+sys.path.append(str(Path('src').absolute()))
+# pylint: disable=import-error
+from enums import StorageMode
+from parts_list import PartsList
+from operations import Operations
+from parallel_loading import _chunk_paths, load_parts_list, load_parts_lists, load_union
+# pylint: enable=import-error
+
+
+class TestParallelLoading:
+    ## Tests
+
+    def test_chunk_paths(self):
+        paths = [Path(str(index)) for index in range(7)]
+
+        chunks = _chunk_paths(paths, 3)
+
+        assert [len(chunk) for chunk in chunks] == [3, 2, 2]
+        assert [path for chunk in chunks for path in chunk] == paths
+        assert len(_chunk_paths(paths[:2], 4)) == 2
+
+
+    def test_load_parts_lists(self, one_red_2x2_brick_csv_path_factory, complex_csv_path_factory, one_red_2x4_brick_csv_path_factory):
+        paths = [one_red_2x2_brick_csv_path_factory(), complex_csv_path_factory(), one_red_2x4_brick_csv_path_factory()]
+
+        parts_lists: List[PartsList] = load_parts_lists(*paths, jobs = 2)
+
+        assert [parts_list.path for parts_list in parts_lists] == paths
+        assert parts_lists == [PartsList(path) for path in paths]
+
+
+    def test_load_union(self, one_red_2x2_brick_csv_path_factory, complex_csv_path_factory, one_red_2x4_brick_csv_path_factory):
+        paths = [one_red_2x2_brick_csv_path_factory(), complex_csv_path_factory(), one_red_2x4_brick_csv_path_factory(), complex_csv_path_factory(), one_red_2x2_brick_csv_path_factory()]
+
+        union, loaded_paths = load_union(*paths, storage = StorageMode.COLUMNAR, jobs = 3)
+        expected: PartsList = Operations.union(*[PartsList(path) for path in paths])
+
+        assert loaded_paths == paths
+        assert list(union.parts.keys()) == list(expected.parts.keys())
+        assert all(union.parts[part_id] == part for part_id, part in expected.parts.items())
+        assert union.parts.get('3003:Red').qty == 66
+
+
+    def test_failed_files_are_skipped(self, tmp_path, capsys, one_red_2x2_brick_csv_path_factory, complex_csv_path_factory, corrupt_csv_path_factory):
+        unsupported_path = tmp_path / 'parts.txt'
+        unsupported_path.write_text('')
+        paths = [one_red_2x2_brick_csv_path_factory(), corrupt_csv_path_factory(), complex_csv_path_factory(), unsupported_path]
+        loaded_paths = [paths[0], paths[2]]
+
+        ## Each bad file is reported on its own, and everything else still loads
+        parts_lists: List[PartsList] = load_parts_lists(*paths, jobs = 2)
+        assert [parts_list.path for parts_list in parts_lists] == loaded_paths
+
+        union, union_paths = load_union(*paths, jobs = 2)
+        assert union_paths == loaded_paths
+        assert list(union.parts.keys()) == list(Operations.union(*[PartsList(path) for path in loaded_paths]).parts.keys())
+
+        output = capsys.readouterr().out
+        assert output.count('Unable to generate parts list for file at {}'.format(corrupt_csv_path_factory())) == 2
+        assert output.count('Unable to generate parts list for file at {}'.format(unsupported_path)) == 2
+
+
+    def test_load_parts_list_returns_the_error(self, capsys, complex_csv_path_factory, corrupt_csv_path_factory):
+        parts_list, hit, error = load_parts_list(complex_csv_path_factory(), StorageMode.DICT)
+        assert parts_list.path == complex_csv_path_factory() and not hit and error == None
+
+        ## Failures are handed back for the caller to report, rather than printed here
+        parts_list, hit, error = load_parts_list(corrupt_csv_path_factory(), StorageMode.DICT)
+        assert parts_list == None and not hit and error
+        assert capsys.readouterr().out == ''
@@ -115,3 +115,27 @@ class TestPart:
         clone: Part = one_brick.clone()
 
         assert clone == one_brick
+
+        clone.qty = 5
+        assert one_brick.qty == 1
+
+
+    def test_slots(self, one_red_2x4_brick_factory):
+        part: Part = one_red_2x4_brick_factory()
+
+        assert not hasattr(part, '__dict__')
+
+
+    def test_id_invalidation(self, one_red_2x4_brick_factory):
+        part: Part = one_red_2x4_brick_factory()
+
+        assert part.id == '3001:Red'
+
+        part.color_name = 'Blue'
+        assert part.id == '3001:Blue'
+
+        part.bl_item_no = '3003'
+        assert part.id == '3003:Blue'
+
+        part.enable_any_color()
+        assert part.id == '3003:(Not Applicable)'
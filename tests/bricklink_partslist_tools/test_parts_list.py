@@ -6,6 +6,7 @@ from typing import List
 ## Lazily access classes inside the src directory (and suppress pylint errors when it can't resolve the import)
 sys.path.append(str(Path('src').absolute()))
 # pylint: disable=import-error
+from enums import SaveFormat, StorageMode
 from part import Part
 from parts_list import PartsList
 # pylint: enable=import-error
@@ -102,6 +103,45 @@ class TestPartsList:
             assert part.id in parts_list.parts
 
 
+    def test_set_any_color_merge(self, complex_parts_list_factory):
+        parts_list: PartsList = complex_parts_list_factory()
+        unique_part_count = len(parts_list.parts)
+
+        parts_list.set_any_color(['red', 'LIGHT BLUISH GRAY'])
+
+        ## 11211 comes in both red (40) and light bluish gray (4), so they've been merged into a single lot
+        merged_part: Part = parts_list.parts['11211:(Not Applicable)']
+        assert merged_part.qty == 44
+        assert merged_part.weight == pytest.approx(1.72)
+        assert '11211:Red' not in parts_list.parts
+        assert '11211:Light Bluish Gray' not in parts_list.parts
+        assert len(parts_list.parts) < unique_part_count
+        assert 'red' not in parts_list.get_color_index()
+        assert '11211:(Not Applicable)' in parts_list.get_color_index()['(not applicable)']
+
+
+    def test_set_any_color_columnar(self, complex_parts_list_factory, complex_columnar_parts_list_factory):
+        parts_list: PartsList = complex_parts_list_factory()
+        columnar_parts_list: PartsList = complex_columnar_parts_list_factory()
+
+        parts_list.set_any_color(['Red', 'Black'])
+        columnar_parts_list.set_any_color(['Red', 'Black'])
+
+        assert list(parts_list.parts.keys()) == list(columnar_parts_list.parts.keys())
+        assert all(columnar_parts_list.parts[part_id] == part for part_id, part in parts_list.parts.items())
+
+
+    def test_set_any_color_mapped(self, tmp_path, complex_parts_list_factory):
+        path: Path = tmp_path / 'complex.blpl'
+        complex_parts_list_factory().export_binary(path)
+        parts_list: PartsList = PartsList(path, StorageMode.MAPPED)
+
+        parts_list.set_any_color(['Red'])
+
+        assert '11211:(Not Applicable)' in parts_list.parts
+        assert '11211:Red' not in parts_list.parts
+
+
     def test_clone(self, red_2x2_and_2x4_brick_parts_list_factory):
         parts_list: PartsList = red_2x2_and_2x4_brick_parts_list_factory()
         clone: PartsList = parts_list.clone()
@@ -124,3 +164,16 @@ class TestPartsList:
         exported_parts_list.path = parts_list.path  # Update the path to point to the original path, as otherwise the == check will fail
 
         assert parts_list == exported_parts_list
+
+
+    @pytest.mark.parametrize('save_format', [SaveFormat.CSV, SaveFormat.SIMPLE_CSV, SaveFormat.BINARY])
+    def test_export(self, tmp_path, complex_parts_list_factory, save_format):
+        parts_list: PartsList = complex_parts_list_factory()
+        suffix = '.blpl' if save_format == SaveFormat.BINARY else '.csv'
+        exporters = {SaveFormat.CSV: parts_list.export_csv, SaveFormat.SIMPLE_CSV: parts_list.export_simple_csv, SaveFormat.BINARY: parts_list.export_binary}
+
+        ## Dispatches to the matching export method, and accepts the format's value too
+        parts_list.export(tmp_path / ('exported' + suffix), save_format.value)
+        exporters[save_format](tmp_path / ('expected' + suffix))
+
+        assert (tmp_path / ('exported' + suffix)).read_bytes() == (tmp_path / ('expected' + suffix)).read_bytes()
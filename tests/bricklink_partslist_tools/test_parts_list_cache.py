@@ -0,0 +1,124 @@
+import os
+import pytest
+import shutil
+import sys
+from pathlib import Path
+from typing import List
+
+## Lazily access classes inside the src directory (and suppress pylint errors when it can't resolve the import)
+sys.path.append(str(Path('src').absolute()))
+# pylint: disable=import-error
+from columnar_parts import ColumnarParts
+from enums import StorageMode
+from lazy_parts import LazyParts
+from parts_list import PartsList
+from parts_list_cache import PartsListCache
+from parallel_loading import load_parts_lists
+# pylint: enable=import-error
+
+
+class TestPartsListCache:
+    ## Tests
+
+    def test_load_miss_then_hit(self, tmp_path, complex_csv_path_factory):
+        cache = PartsListCache(tmp_path / 'cache')
+        path = complex_csv_path_factory()
+
+        first: PartsList = cache.load(path)
+        second: PartsList = cache.load(path)
+
+        assert cache.hits == 1
+        assert cache.misses == 1
+        assert first == second
+        assert all(second.parts[part_id] == part for part_id, part in first.parts.items())
+
+
+    def test_load_columnar(self, tmp_path, complex_csv_path_factory):
+        cache = PartsListCache(tmp_path / 'cache')
+        path = complex_csv_path_factory()
+
+        cache.load(path)
+        parts_list: PartsList = cache.load(path, StorageMode.COLUMNAR)
+
+        assert isinstance(parts_list.parts, ColumnarParts)
+        assert parts_list == PartsList(path)
+
+
+    @pytest.mark.parametrize('entry', [b'c__missing_module__\nThing\n.', b'cparts_list\nMissingClass\n.', b'garbage', b'\x80\x05K\x01.'])
+    def test_unreadable_entry_misses(self, tmp_path, complex_csv_path_factory, entry):
+        cache = PartsListCache(tmp_path / 'cache')
+        path = complex_csv_path_factory()
+
+        ## Entries written by older versions of the code (or otherwise mangled) are treated as misses, and replaced
+        cache._entry_path(cache._build_key(path)).write_bytes(entry)
+        parts_list: PartsList = cache.load(path)
+
+        assert cache.misses == 1
+        assert parts_list == PartsList(path)
+        assert cache.get(path) == parts_list
+
+
+    def test_lazy_storage_bypasses_cache(self, tmp_path, complex_csv_path_factory):
+        cache = PartsListCache(tmp_path / 'cache')
+        path = complex_csv_path_factory()
+
+        cache.load(path)
+        parts_list: PartsList = cache.load(path, StorageMode.LAZY)
+
+        ## Lazy parts can't be rebuilt from a columnar entry, so they're parsed from the file as asked
+        assert parts_list.storage == StorageMode.LAZY
+        assert isinstance(parts_list.parts, LazyParts)
+        assert cache.hits == 0 and cache.misses == 1
+        assert cache.get(path, StorageMode.LAZY) == None
+
+
+    def test_modified_file_misses(self, tmp_path, one_red_2x2_brick_csv_path_factory, one_red_2x4_brick_csv_path_factory):
+        cache = PartsListCache(tmp_path / 'cache')
+        path = tmp_path / 'parts.csv'
+        shutil.copy(one_red_2x2_brick_csv_path_factory(), path)
+
+        cache.load(path)
+        shutil.copy(one_red_2x4_brick_csv_path_factory(), path)
+        os.utime(path, ns = (0, 0))
+        parts_list: PartsList = cache.load(path)
+
+        assert cache.misses == 2
+        assert '3001:Red' in parts_list.parts
+
+
+    def test_content_hash(self, tmp_path, complex_csv_path_factory):
+        cache = PartsListCache(tmp_path / 'cache', use_content_hash = True)
+        path = tmp_path / 'parts.csv'
+        shutil.copy(complex_csv_path_factory(), path)
+
+        cache.load(path)
+        os.utime(path, ns = (0, 0))
+        cache.load(path)
+
+        assert cache.hits == 1
+
+
+    def test_eviction(self, tmp_path, one_red_2x2_brick_csv_path_factory, complex_csv_path_factory):
+        cache = PartsListCache(tmp_path / 'cache')
+        cache.load(one_red_2x2_brick_csv_path_factory())
+        entry_size = cache.get_stats()['size_bytes']
+
+        ## Only leave room for the most recent entry
+        cache.max_size_bytes = entry_size
+        cache.load(complex_csv_path_factory())
+
+        stats = cache.get_stats()
+        assert stats['entries'] <= 1
+        assert stats['size_bytes'] <= entry_size
+
+
+    def test_parallel_cache_stats(self, tmp_path, one_red_2x2_brick_csv_path_factory, complex_csv_path_factory):
+        cache = PartsListCache(tmp_path / 'cache')
+        paths = [one_red_2x2_brick_csv_path_factory(), complex_csv_path_factory()]
+
+        load_parts_lists(*paths, jobs = 2, cache = cache)
+        parts_lists: List[PartsList] = load_parts_lists(*paths, jobs = 2, cache = cache)
+
+        assert cache.misses == 2
+        assert cache.hits == 2
+        assert parts_lists == [PartsList(path) for path in paths]
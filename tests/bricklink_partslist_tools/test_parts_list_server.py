@@ -0,0 +1,220 @@
+import json
+import pytest
+import shutil
+import socket
+import sys
+import threading
+from http.client import HTTPConnection
+from pathlib import Path
+
+## Lazily access classes inside the src directory (and suppress pylint errors when it can't resolve the import)
+sys.path.append(str(Path('src').absolute()))
+# pylint: disable=import-error
+from parts_list import PartsList
+from operations import Operations
+from parts_list_server import PartsListRegistry, create_server
+# pylint: enable=import-error
+
+
+class UnixHTTPConnection(HTTPConnection):
+    def __init__(self, socket_path: Path):
+        super().__init__('localhost')
+        self.socket_path = socket_path
+
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(str(self.socket_path))
+
+
+class TestPartsListServer:
+    ## Fixtures
+
+    @pytest.fixture
+    def server(self):
+        server = self.start_server(input_directory = Path('tests/data/parts_lists'))
+
+        yield server
+
+        server.shutdown()
+        server.server_close()
+
+    ## Methods
+
+    def start_server(self, **kwargs):
+        server = create_server(PartsListRegistry(), port = 0, **kwargs)
+        threading.Thread(target = server.serve_forever, daemon = True).start()
+
+        return server
+
+
+    def request(self, connection: HTTPConnection, method: str, path: str, payload: dict = None) -> tuple:
+        body = json.dumps(payload) if payload != None else None
+        connection.request(method, path, body = body, headers = {'Content-Type': 'application/json'})
+        response = connection.getresponse()
+
+        return response.status, json.loads(response.read())
+
+
+    def connect(self, server) -> HTTPConnection:
+        return HTTPConnection(*server.server_address[:2])
+
+    ## Tests
+
+    def test_missing_parts(self, server, complex_csv_path_factory, one_red_2x4_and_2x2_brick_csv_path_factory):
+        status, response = self.request(self.connect(server), 'POST', '/missing-parts', {
+            'unowned': [str(complex_csv_path_factory().resolve())],
+            'owned': [str(one_red_2x4_and_2x2_brick_csv_path_factory().resolve())]
+        })
+
+        expected = Operations.difference(PartsList(complex_csv_path_factory()), PartsList(one_red_2x4_and_2x2_brick_csv_path_factory()))
+        assert status == 200
+        assert response['unique_parts'] == len(expected.parts)
+        assert response['total_parts'] == expected.get_total_qty()
+        assert {part['id']: part['qty'] for part in response['parts']} == {part_id: part.qty for part_id, part in expected.parts.items()}
+
+
+    def test_merge_and_intersection(self, server, complex_csv_path_factory, one_red_2x4_and_2x2_brick_csv_path_factory):
+        paths = [str(complex_csv_path_factory().resolve()), str(one_red_2x4_and_2x2_brick_csv_path_factory().resolve())]
+        connection = self.connect(server)
+
+        status, response = self.request(connection, 'POST', '/merge', {'paths': paths})
+        assert status == 200
+        assert response['total_parts'] == Operations.union(*[PartsList(Path(path)) for path in paths]).get_total_qty()
+
+        status, response = self.request(connection, 'POST', '/intersection', {'paths': paths})
+        assert status == 200
+        assert response['unique_parts'] == len(Operations.intersection(*[PartsList(Path(path)) for path in paths]).parts)
+
+        ## Both lists were only parsed once
+        status, response = self.request(connection, 'GET', '/status')
+        assert response['loads'] == 2
+        assert response['reloads'] == 0
+
+
+    def test_any_color_leaves_resident_lists_untouched(self, server, one_red_2x4_and_2x2_brick_csv_path_factory):
+        path = one_red_2x4_and_2x2_brick_csv_path_factory().resolve()
+        connection = self.connect(server)
+
+        status, response = self.request(connection, 'POST', '/merge', {'paths': [str(path)], 'any_color': ['Red']})
+        assert status == 200
+        assert all(part['color_name'] == '(Not Applicable)' for part in response['parts'])
+
+        status, response = self.request(connection, 'POST', '/merge', {'paths': [str(path)]})
+        assert all(part['color_name'] == 'Red' for part in response['parts'])
+
+
+    def test_reloads_changed_files(self, tmp_path, one_red_2x2_brick_csv_path_factory, one_red_2x4_and_2x2_brick_csv_path_factory):
+        path: Path = tmp_path / 'parts_list.csv'
+        shutil.copy(one_red_2x2_brick_csv_path_factory(), path)
+        server = self.start_server(input_directory = tmp_path)
+
+        try:
+            connection = self.connect(server)
+
+            status, response = self.request(connection, 'POST', '/merge', {'paths': [str(path)]})
+            assert response['unique_parts'] == 1
+
+            shutil.copy(one_red_2x4_and_2x2_brick_csv_path_factory(), path)
+            status, response = self.request(connection, 'POST', '/merge', {'paths': [str(path)]})
+            assert response['unique_parts'] == 2
+
+            status, response = self.request(connection, 'GET', '/status')
+            assert response['reloads'] == 1
+        finally:
+            server.shutdown()
+            server.server_close()
+
+
+    def test_errors(self, server):
+        connection = self.connect(server)
+
+        ## The reason gets reported, without giving away where the server's files live
+        status, response = self.request(connection, 'POST', '/merge', {'paths': ['missing.csv']})
+        assert status == 400
+        assert 'error' in response and str(server.input_directory) not in response['error']
+
+        status, response = self.request(connection, 'POST', '/merge', {'paths': []})
+        assert status == 400
+
+        status, response = self.request(connection, 'POST', '/explode', {})
+        assert status == 404
+
+
+    def test_invalid_any_color(self, server, one_red_2x4_and_2x2_brick_csv_path_factory):
+        connection = self.connect(server)
+        paths = [str(one_red_2x4_and_2x2_brick_csv_path_factory().resolve())]
+
+        for any_color in ['Red', ['Red', 5], {'color': 'Red'}]:
+            status, response = self.request(connection, 'POST', '/merge', {'paths': paths, 'any_color': any_color})
+            assert status == 400
+            assert 'any_color' in response['error']
+
+
+    def test_exports_stay_in_output_directory(self, server, tmp_path, one_red_2x4_and_2x2_brick_csv_path_factory):
+        paths = [str(one_red_2x4_and_2x2_brick_csv_path_factory().resolve())]
+
+        ## Exporting is disabled without an output directory
+        status, response = self.request(self.connect(server), 'POST', '/merge', {'paths': paths, 'save_path': str(tmp_path / 'out.csv'), 'save_format': 'csv'})
+        assert status == 400
+        assert not (tmp_path / 'out.csv').exists()
+
+        output_directory = tmp_path / 'exports'
+        output_directory.mkdir()
+        export_server = self.start_server(input_directory = Path('tests/data/parts_lists'), output_directory = output_directory)
+
+        try:
+            connection = self.connect(export_server)
+            status, _ = self.request(connection, 'POST', '/merge', {'paths': paths, 'save_path': 'out.csv', 'save_format': 'csv'})
+            assert status == 200
+            assert list(PartsList(output_directory / 'out.csv').iter_quantities()) == list(PartsList(Path(paths[0])).iter_quantities())
+
+            for save_path in ['../escaped.csv', str(tmp_path / 'escaped.csv'), 5]:
+                status, _ = self.request(connection, 'POST', '/merge', {'paths': paths, 'save_path': save_path, 'save_format': 'csv'})
+                assert status == 400
+            assert not (tmp_path / 'escaped.csv').exists()
+        finally:
+            export_server.shutdown()
+            export_server.server_close()
+
+
+    def test_inputs_stay_in_input_directory(self, server, tmp_path, one_red_2x2_brick_csv_path_factory):
+        outside_path = tmp_path / 'outside.csv'
+        shutil.copy(one_red_2x2_brick_csv_path_factory(), outside_path)
+        connection = self.connect(server)
+
+        ## Paths are relative to the input directory
+        status, response = self.request(connection, 'POST', '/merge', {'paths': [one_red_2x2_brick_csv_path_factory().name]})
+        assert status == 200
+        assert response['unique_parts'] == 1
+
+        for paths in [[str(outside_path)], ['../../../README.md'], [5]]:
+            status, response = self.request(connection, 'POST', '/merge', {'paths': paths})
+            assert status == 400
+
+        status, response = self.request(connection, 'POST', '/missing-parts', {'unowned': [str(outside_path)], 'owned': []})
+        assert status == 400
+
+        status, response = self.request(connection, 'POST', '/evict', {'paths': [str(outside_path)]})
+        assert status == 400
+
+        status, response = self.request(connection, 'GET', '/status')
+        assert response['loads'] == 1
+
+
+    @pytest.mark.skipif(not hasattr(socket, 'AF_UNIX'), reason = 'Unix sockets are unavailable')
+    def test_unix_socket(self, tmp_path, one_red_2x4_and_2x2_brick_csv_path_factory):
+        socket_path = tmp_path / 'server.sock'
+        server = create_server(PartsListRegistry(), socket_path = socket_path, input_directory = Path('tests/data/parts_lists'))
+        threading.Thread(target = server.serve_forever, daemon = True).start()
+
+        try:
+            status, response = self.request(UnixHTTPConnection(socket_path), 'POST', '/merge', {
+                'paths': [str(one_red_2x4_and_2x2_brick_csv_path_factory().resolve())]
+            })
+        finally:
+            server.shutdown()
+            server.server_close()
+
+        assert status == 200
+        assert response['unique_parts'] == 2
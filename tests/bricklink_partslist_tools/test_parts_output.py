@@ -0,0 +1,109 @@
+import io
+import pytest
+import sys
+from pathlib import Path
+
+## Lazily access classes inside the src directory (and suppress pylint errors when it can't resolve the import)
+sys.path.append(str(Path('src').absolute()))
+# pylint: disable=import-error
+import parts_output
+from enums import Engine, OutputMode, StorageMode
+from operations import Operations
+from part import Part
+from parts_list import PartsList
+from parts_summary import PartsSummary
+# pylint: enable=import-error
+
+
+class TestPartsOutput:
+    ## Methods
+
+    def write(self, parts_list: PartsList, mode: OutputMode, top_count: int = 20) -> list:
+        stream = io.StringIO()
+        parts_output.write_parts_list(parts_list, mode, top_count, stream)
+
+        return stream.getvalue().splitlines()
+
+
+    def build_expected_summary(self, parts_list: PartsList) -> str:
+        return 'Unique parts: {}, total parts: {}'.format(len(parts_list.parts), sum(part.qty for part in parts_list.parts.values()))
+
+    ## Tests
+
+    def test_none(self, complex_parts_list_factory):
+        assert self.write(complex_parts_list_factory(), OutputMode.NONE) == []
+
+
+    def test_summary(self, complex_parts_list_factory):
+        parts_list: PartsList = complex_parts_list_factory()
+
+        assert self.write(parts_list, OutputMode.SUMMARY) == [self.build_expected_summary(parts_list)]
+
+
+    def test_full(self, complex_parts_list_factory):
+        parts_list: PartsList = complex_parts_list_factory()
+
+        ## Matches the original line by line dump, which went through each Part in sorted order
+        part: Part
+        expected = ['Dumping parts list:']
+        for part_id in sorted(parts_list.parts.keys()):
+            part = parts_list.parts[part_id]
+            expected.append('{} \t\t({}) \t{}'.format(part.bl_item_no, part.qty, part.color_name))
+        expected.append(self.build_expected_summary(parts_list))
+
+        assert self.write(parts_list, OutputMode.FULL) == expected
+
+
+    def test_full_in_batches(self, monkeypatch, complex_parts_list_factory):
+        parts_list: PartsList = complex_parts_list_factory()
+        expected = self.write(parts_list, OutputMode.FULL)
+
+        monkeypatch.setattr(parts_output, 'WRITE_BATCH_SIZE', 3)
+
+        assert self.write(parts_list, OutputMode.FULL) == expected
+
+
+    @pytest.mark.parametrize('mode', [OutputMode.TOP_QTY, OutputMode.TOP_WEIGHT])
+    def test_top(self, complex_parts_list_factory, mode):
+        parts_list: PartsList = complex_parts_list_factory()
+        field = 'qty' if mode == OutputMode.TOP_QTY else 'weight'
+
+        lines = self.write(parts_list, mode, 3)
+
+        assert len(lines) == 5
+        assert lines[-1] == self.build_expected_summary(parts_list)
+
+        ## The printed parts are the heaviest (or most numerous) ones, in descending order
+        expected_parts = sorted(parts_list.parts.values(), key = lambda part: getattr(part, field), reverse = True)[:3]
+        assert [line.split(' \t')[0] for line in lines[1:4]] == [part.bl_item_no for part in expected_parts]
+
+
+    @pytest.mark.parametrize('engine', [Engine.LOOP, Engine.BATCHED])
+    @pytest.mark.parametrize('storage', [StorageMode.DICT, StorageMode.COLUMNAR])
+    def test_operation_summaries(self, complex_csv_path_factory, red_2x2_and_2x4_brick_parts_list_factory, engine, storage):
+        complex_parts_list = PartsList(complex_csv_path_factory(), storage)
+        red_parts_list: PartsList = red_2x2_and_2x4_brick_parts_list_factory()
+
+        results = [
+            Operations.union(complex_parts_list, red_parts_list, engine = engine),
+            Operations.difference(complex_parts_list, red_parts_list, engine = engine),
+            Operations.intersection(complex_parts_list, red_parts_list, engine = engine)
+        ]
+
+        ## Summaries filled in by the operations match ones computed from scratch
+        for result in results:
+            summary = result.get_summary()
+            expected = PartsSummary.from_quantities(result.iter_quantities())
+            assert summary.unique_parts == expected.unique_parts
+            assert summary.total_qty == expected.total_qty
+            assert summary.total_weight == pytest.approx(expected.total_weight)
+
+
+    def test_set_any_color_summary(self, complex_parts_list_factory):
+        parts_list: PartsList = complex_parts_list_factory()
+        summary = parts_list.get_summary()
+
+        parts_list.set_any_color(['Red', 'Black'])
+
+        assert parts_list.get_summary().unique_parts == len(parts_list.parts)
+        assert parts_list.get_summary().total_qty == summary.total_qty
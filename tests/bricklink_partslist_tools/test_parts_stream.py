@@ -0,0 +1,95 @@
+import pytest
+import sys
+from pathlib import Path
+from typing import List
+
+## Lazily access classes inside the src directory (and suppress pylint errors when it can't resolve the import)
+sys.path.append(str(Path('src').absolute()))
+# pylint: disable=import-error
+from enums import Engine
+from part import Part
+from parts_list import PartsList
+from parts_stream import PartsStream
+from operations import Operations
+# pylint: enable=import-error
+
+
+class TestPartsStream:
+    ## Tests
+
+    def test_iter_records(self, complex_csv_path_factory, complex_parts_list_factory):
+        stream = PartsStream(complex_csv_path_factory())
+        parts_list: PartsList = complex_parts_list_factory()
+
+        records = list(stream.iter_records())
+
+        assert len(records) == len(parts_list.parts)
+        for record in records:
+            assert parts_list.parts[record.part_id].qty == record.qty
+            assert parts_list.parts[record.part_id].weight == record.weight
+
+
+    def test_iter_parts(self, one_red_2x4_and_2x2_brick_csv_path_factory, red_2x2_and_2x4_brick_parts_list_factory):
+        stream = PartsStream(one_red_2x4_and_2x2_brick_csv_path_factory())
+        parts_list: PartsList = red_2x2_and_2x4_brick_parts_list_factory()
+
+        parts: List[Part] = list(stream.iter_parts())
+
+        assert parts == list(parts_list.parts.values())
+        assert stream._header == parts_list._header
+
+
+    def test_stream_nonexistant_list(self):
+        runtime_error_encountered = False
+        try:
+            PartsStream(Path('/some/path/that/doesnt/exist.csv'))
+        except RuntimeError:
+            runtime_error_encountered = True
+
+        assert runtime_error_encountered
+
+
+    def test_stream_difference(self, complex_parts_list_factory, one_red_2x4_and_2x2_brick_csv_path_factory, red_2x2_and_2x4_brick_parts_list_factory):
+        stream = PartsStream(one_red_2x4_and_2x2_brick_csv_path_factory())
+
+        streamed: PartsList = Operations.difference(complex_parts_list_factory(), stream)
+        loaded: PartsList = Operations.difference(complex_parts_list_factory(), red_2x2_and_2x4_brick_parts_list_factory())
+
+        assert streamed == loaded
+        assert streamed.parts.get('3003:Red').qty == 31
+
+
+    @pytest.mark.parametrize('engine', [Engine.LOOP, Engine.BATCHED])
+    def test_stream_difference_all(self, monkeypatch, complex_parts_list_factory, one_red_2x4_and_2x2_brick_csv_path_factory, one_red_2x2_brick_csv_path_factory, engine):
+        streams = [PartsStream(one_red_2x4_and_2x2_brick_csv_path_factory()), PartsStream(one_red_2x2_brick_csv_path_factory())]
+        loaded: PartsList = Operations.difference(complex_parts_list_factory(), Operations.union(*[PartsList(stream.path) for stream in streams]))
+
+        ## Every stream is subtracted in a single pass, without unioning them into memory first
+        def fail_union(*parts_lists):
+            raise AssertionError('The streams were unioned together')
+        monkeypatch.setattr(Operations, '_union_batched', fail_union)
+
+        streamed: PartsList = Operations.difference_all(complex_parts_list_factory(), *streams, engine = engine)
+
+        assert streamed == loaded
+        assert streamed.parts.get('3003:Red').qty == 30
+
+
+    def test_stream_union(self, complex_csv_path_factory, complex_parts_list_factory, red_2x2_and_2x4_brick_parts_list_factory):
+        stream = PartsStream(complex_csv_path_factory())
+
+        streamed: PartsList = Operations.union(red_2x2_and_2x4_brick_parts_list_factory(), stream, stream)
+        loaded: PartsList = Operations.union(red_2x2_and_2x4_brick_parts_list_factory(), complex_parts_list_factory(), complex_parts_list_factory())
+
+        assert list(streamed.parts.keys()) == list(loaded.parts.keys())
+        assert all(streamed.parts[part_id] == part for part_id, part in loaded.parts.items())
+        assert streamed.parts.get('3003:Red').qty == 65
+
+
+    def test_single_stream_union(self, complex_csv_path_factory):
+        stream = PartsStream(complex_csv_path_factory())
+
+        result: PartsList = Operations.union(stream)
+
+        assert isinstance(result, PartsList)
+        assert len(result.parts) == 83
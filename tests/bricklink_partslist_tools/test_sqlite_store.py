@@ -0,0 +1,142 @@
+import pytest
+import shutil
+import sys
+from pathlib import Path
+
+## Lazily access classes inside the src directory (and suppress pylint errors when it can't resolve the import)
+sys.path.append(str(Path('src').absolute()))
+# pylint: disable=import-error
+import sqlite_store
+from enums import Engine, StorageMode
+from operations import Operations
+from parts_list import PartsList
+from sqlite_store import SqliteParts, SqliteStore
+# pylint: enable=import-error
+
+
+class TestSqliteStore:
+    ## Fixtures
+
+    @pytest.fixture
+    def store(self, tmp_path, monkeypatch):
+        store = SqliteStore(tmp_path / 'parts.db')
+        monkeypatch.setattr(PartsList, 'sqlite_store', store)
+
+        yield store
+
+        store.close()
+
+    ## Methods
+
+    def get_quantities(self, parts_list: PartsList) -> list:
+        return list(parts_list.iter_quantities())
+
+
+    def check_parts_equality(self, parts_list_a: PartsList, parts_list_b: PartsList) -> bool:
+        if (list(parts_list_a.parts.keys()) != list(parts_list_b.parts.keys())):
+            return False
+
+        return all(parts_list_a.parts[part_id] == parts_list_b.parts[part_id] for part_id in parts_list_a.parts)
+
+    ## Tests
+
+    def test_import(self, store, complex_csv_path_factory):
+        path = complex_csv_path_factory()
+        parts_list = PartsList(path, StorageMode.SQLITE)
+        expected = PartsList(path)
+
+        assert isinstance(parts_list.parts, SqliteParts)
+        assert parts_list._header == expected._header
+        assert self.check_parts_equality(parts_list, expected)
+        assert '3003:Red' in parts_list.parts and '3003:Nope' not in parts_list.parts
+        assert parts_list.get_qty('3003:Red') == expected.parts['3003:Red'].qty
+        assert parts_list.get_summary() == expected.get_summary()
+
+
+    def test_import_only_when_changed(self, store, tmp_path, complex_csv_path_factory, one_red_2x2_brick_csv_path_factory):
+        path = tmp_path / 'parts.csv'
+        shutil.copy(complex_csv_path_factory(), path)
+
+        list_id = PartsList(path, StorageMode.SQLITE).parts.list_id
+        assert PartsList(path, StorageMode.SQLITE).parts.list_id == list_id
+
+        shutil.copy(one_red_2x2_brick_csv_path_factory(), path)
+        parts_list = PartsList(path, StorageMode.SQLITE)
+
+        assert list(parts_list.parts.keys()) == ['3003:Red']
+        assert store.get_names() == [str(path.resolve())]
+
+
+    def test_stored_lists_are_read_only(self, store, complex_csv_path_factory):
+        parts_list = PartsList(complex_csv_path_factory(), StorageMode.SQLITE)
+        stored_parts = parts_list.parts
+
+        with pytest.raises(RuntimeError):
+            del parts_list.parts['3003:Red']
+
+        ## Remapping colors works on a copy, so the stored list is left alone
+        expected = PartsList(complex_csv_path_factory())
+        expected.set_any_color(['Red'])
+        parts_list.set_any_color(['Red'])
+
+        assert parts_list.parts is not stored_parts and not parts_list.parts.read_only
+        assert '3003:Red' in stored_parts
+        assert self.get_quantities(parts_list) == self.get_quantities(expected)
+
+
+    @pytest.mark.parametrize('engine', [Engine.LOOP, Engine.BATCHED])
+    def test_operations(self, store, complex_csv_path_factory, one_red_2x4_and_2x2_brick_csv_path_factory, one_red_2x2_brick_csv_path_factory, engine):
+        paths = [complex_csv_path_factory(), one_red_2x4_and_2x2_brick_csv_path_factory(), one_red_2x2_brick_csv_path_factory()]
+        stored = [PartsList(path, StorageMode.SQLITE) for path in paths]
+        loaded = [PartsList(path) for path in paths]
+
+        ## Every operation runs in the database, and matches running them in memory
+        assert self.check_parts_equality(Operations.union(*stored, engine = engine), Operations.union(*loaded, engine = engine))
+        assert self.check_parts_equality(Operations.union(stored[0], stored[0]), Operations.union(loaded[0], loaded[0]))
+        assert self.check_parts_equality(Operations.difference(stored[0], stored[2], engine = engine), Operations.difference(loaded[0], loaded[2], engine = engine))
+        assert self.check_parts_equality(Operations.difference_all(stored[0], stored[1], stored[2], stored[2]), Operations.difference_all(loaded[0], loaded[1], loaded[2], loaded[2]))
+        assert self.check_parts_equality(Operations.intersection(*stored, engine = engine), Operations.intersection(*loaded, engine = engine))
+        assert self.check_parts_equality(Operations.intersection(stored[1], stored[0]), Operations.intersection(loaded[1], loaded[0]))
+
+
+    def test_results_stay_in_the_database(self, store, complex_csv_path_factory, one_red_2x2_brick_csv_path_factory):
+        union = Operations.union(PartsList(complex_csv_path_factory(), StorageMode.SQLITE), PartsList(one_red_2x2_brick_csv_path_factory(), StorageMode.SQLITE))
+
+        assert sqlite_store.can_run_in_sql(union)
+        assert union.get_summary() == Operations.union(PartsList(complex_csv_path_factory()), PartsList(one_red_2x2_brick_csv_path_factory())).get_summary()
+
+        ## Results can be queried directly
+        qty = store.execute('SELECT qty FROM parts WHERE list_id = ? AND bl_item_no = ? AND color_name = ?', (union.parts.list_id, '3003', 'Red')).fetchone()[0]
+        assert qty == union.parts['3003:Red'].qty
+
+
+    def test_export(self, store, tmp_path, complex_csv_path_factory):
+        PartsList(complex_csv_path_factory(), StorageMode.SQLITE).export_csv(tmp_path / 'stored.csv')
+        PartsList(complex_csv_path_factory()).export_csv(tmp_path / 'loaded.csv')
+
+        assert (tmp_path / 'stored.csv').read_text() == (tmp_path / 'loaded.csv').read_text()
+
+
+    def test_anonymous_lists_are_temporary(self, tmp_path, complex_csv_path_factory, one_red_2x2_brick_csv_path_factory):
+        path = tmp_path / 'parts.db'
+
+        with SqliteStore(path) as store:
+            complex_parts = store.import_file(complex_csv_path_factory())
+            red_parts = store.import_file(one_red_2x2_brick_csv_path_factory())
+            union = SqliteParts(store)
+            store.union(union, [complex_parts, red_parts])
+            union_length = len(union)
+            store.save_as(union, 'union')
+            store.save_as(union.copy(), 'copy')
+
+            assert store.remove('copy')
+
+        with SqliteStore(path) as store:
+            assert store.get_names() == sorted([str(complex_csv_path_factory().resolve()), str(one_red_2x2_brick_csv_path_factory().resolve()), 'union'])
+            assert store.execute('SELECT COUNT(*) FROM parts_lists WHERE name IS NULL').fetchone()[0] == 0
+            assert len(SqliteParts(store, store.get_list_id('union'))) == union_length
+
+
+    def test_requires_store(self, complex_csv_path_factory):
+        with pytest.raises(RuntimeError):
+            PartsList(complex_csv_path_factory(), StorageMode.SQLITE)
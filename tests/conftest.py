@@ -7,6 +7,7 @@ from pathlib import Path
 ## Lazily access classes inside the src directory (and suppress pylint errors when it can't resolve the import)
 sys.path.append(str(Path('src').absolute()))
 # pylint: disable=import-error
+from enums import StorageMode
 from parts_list import PartsList
 # pylint: enable=import-error
 
@@ -70,6 +71,13 @@ def complex_csv_path_factory() -> Callable:
 
     return _get_path
 
+@pytest.fixture
+def corrupt_csv_path_factory() -> Callable:
+    def _get_path():
+        return PartsListPathProvider.get_parts_list_paths('corrupt_qty.csv')
+
+    return _get_path
+
 ## PartsList Factory Fixtures
 
 @pytest.fixture
@@ -88,6 +96,14 @@ def complex_parts_list_factory(complex_csv_path_factory) -> Callable:
     return _init
 
 
+@pytest.fixture
+def complex_columnar_parts_list_factory(complex_csv_path_factory) -> Callable:
+    def _init():
+        return PartsList(complex_csv_path_factory(), StorageMode.COLUMNAR)
+
+    return _init
+
+
 @pytest.fixture
 def empty_parts_list_factory() -> Callable:
     def _init():